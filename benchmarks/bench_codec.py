@@ -0,0 +1,100 @@
+""" Benchmark of the json codecs of `rds_client/codec.py`.
+
+Encodes and decodes payloads shaped like the ones the client moves: a batch
+of conversion events, a field listing and a single contact.
+
+usage:
+	python benchmarks/bench_codec.py [--number 2000] | tee bench_output.txt
+"""
+
+import os
+import sys
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rds_client'))
+
+# pylint: disable=wrong-import-position
+from codec import CODECS
+from codec import get_codec
+from events import RDConversionEvent
+
+
+def event_batch(size=100):
+	""" body of the events batch endpoint """
+	return [
+		RDConversionEvent(
+			event_type='CONVERSION',
+			event_family='CDP',
+			conversion_identifier='newsletter',
+			email=f'contact-{index}@example.com',
+			name=f'Contact {index}',
+			city='Florianópolis',
+			tags=['lead', 'newsletter'],
+			legal_bases=[{'category': 'communications', 'type': 'consent', 'status': 'granted'}]
+		).to_event()
+		for index in range(size)
+	]
+
+
+def field_listing(size=200):
+	""" response of the fields endpoint """
+	return {'fields': [
+		{
+			'uuid': f'fdeba6ec-f1cf-4b13-b2ea-e93d47c0{index:04d}',
+			'api_identifier': f'cf_custom_field_{index}',
+			'custom_field': True,
+			'data_type': 'STRING',
+			'name': {'default': f'custom field {index}', 'pt-BR': f'campo {index}'},
+			'label': {'default': f'Custom field {index}', 'pt-BR': f'Campo {index}'},
+			'presentation_type': 'TEXT_INPUT',
+			'validation_rules': {}
+		}
+		for index in range(size)
+	]}
+
+
+def contact():
+	""" response of the contacts endpoint """
+	return {
+		'uuid': 'c2f3d2b3-7250-4d27-97f4-eef38be32f7f',
+		'email': 'contact@example.com',
+		'name': 'Contact',
+		'job_title': 'engineer',
+		'tags': ['lead'],
+		'legal_bases': [{'category': 'communications', 'type': 'consent', 'status': 'granted'}],
+		'links': [{'rel': 'SELF', 'href': 'https://api.rd.services/platform/contacts/uuid:c2f3'}]
+	}
+
+
+def available_codecs():
+	""" codecs installed in the environment """
+	codecs = []
+	for name in CODECS:
+		try:
+			codecs.append(get_codec(name))
+		except ImportError:
+			print(f"{name}: not installed")
+	return codecs
+
+
+def main():
+	""" runs the benchmark """
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument('--number', type=int, default=2000)
+	number = parser.parse_args().number
+	payloads = {'event batch': event_batch(), 'field listing': field_listing(), 'contact': contact()}
+	print(f"{'payload':<14} {'codec':<7} {'bytes':>7} {'dumps µs':>10} {'loads µs':>10}")
+	for label, payload in payloads.items():
+		for codec in available_codecs():
+			encoded = codec.dumps(payload)
+			dumps = timeit.timeit(lambda: codec.dumps(payload), number=number) / number # pylint: disable=cell-var-from-loop
+			loads = timeit.timeit(lambda: codec.loads(encoded), number=number) / number # pylint: disable=cell-var-from-loop
+			print(f"{label:<14} {codec.name:<7} {len(encoded):>7} {dumps * 1e6:>10.1f} {loads * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+	main()
+
+
+# end-of-file
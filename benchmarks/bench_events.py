@@ -0,0 +1,87 @@
+""" Benchmark of the serialization and memory of the `events.py` models.
+
+Compares the `__dict__` serialization the models used to have with the
+compiled `to_event` of the models and of their `__slots__` variants.
+
+usage:
+	python benchmarks/bench_events.py [--number 20000] | tee bench_output.txt
+"""
+
+import os
+import sys
+import timeit
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rds_client'))
+
+# pylint: disable=wrong-import-position
+from events import EVENT_ATTRIBUTES
+from events import RDConversionEvent
+from events import RDConversionEventSlots
+from events import RDMediaPlaybackStoppedEvent
+from events import RDMediaPlaybackStoppedEventSlots
+
+
+def dict_event(event):
+	""" serialization through `__dict__` """
+	attributes = event.__dict__
+	return {
+		"event_type": attributes.get('event_type', attributes.get('event_tye')),
+		"event_family": attributes.get('event_family'),
+		"payload": {
+			key: value for key, value in attributes.items()
+			if value is not None and key not in EVENT_ATTRIBUTES
+		}
+	}
+
+
+def conversion(model, index=0):
+	""" conversion event with a few of its optional fields set """
+	return model('CONVERSION', 'CDP', 'newsletter', f'contact-{index}@example.com',
+	             name='Contact', tags=['lead'])
+
+
+def media(model, index=0):
+	""" media playback stopped event with a few of its optional fields set """
+	return model('MEDIA_PLAYBACK_STOPPED', 'CDP', f'contact-{index}@example.com', 'video', 'intro',
+	             media_duration=120, media_finished=True)
+
+
+def memory(build, model, size=10000):
+	""" bytes allocated per instance """
+	tracemalloc.start()
+	instances = [build(model, index) for index in range(size)]
+	allocated = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del instances
+	return allocated // size
+
+
+def main():
+	""" runs the benchmark """
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument('--number', type=int, default=20000)
+	number = parser.parse_args().number
+	cases = (
+		('conversion', conversion, RDConversionEvent, RDConversionEventSlots),
+		('media stopped', media, RDMediaPlaybackStoppedEvent, RDMediaPlaybackStoppedEventSlots)
+	)
+	print(f"{'model':<14} {'variant':<9} {'to_event µs':>12} {'bytes/instance':>15}")
+	for label, build, model, slots in cases:
+		event, slotted = build(model), build(slots)
+		rows = (
+			('__dict__', lambda: dict_event(event), model), # pylint: disable=cell-var-from-loop
+			('compiled', lambda: event.to_event(), model), # pylint: disable=cell-var-from-loop,unnecessary-lambda
+			('slots', lambda: slotted.to_event(), slots) # pylint: disable=cell-var-from-loop,unnecessary-lambda
+		)
+		for variant, function, cls in rows:
+			elapsed = timeit.timeit(function, number=number) / number
+			print(f"{label:<14} {variant:<9} {elapsed * 1e6:>12.2f} {memory(build, cls):>15}")
+
+
+if __name__ == '__main__':
+	main()
+
+
+# end-of-file
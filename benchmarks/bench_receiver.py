@@ -0,0 +1,76 @@
+""" Benchmark of the deliveries per second of the webhook receiver.
+
+Starts `RDSWebhookReceiver` on a local port with a no-op handler and posts
+`{"leads": [...]}` deliveries over keep-alive connections, the receiver and
+the senders sharing one core.
+
+usage:
+	python benchmarks/bench_receiver.py [--connections 20] [--number 1000]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rds_client'))
+
+# pylint: disable=wrong-import-position
+from codec import CODEC
+from receiver import RDSWebhookReceiver
+from receiver import WEBHOOK_CONVERTED
+
+
+PAYLOAD = CODEC.dumps({'leads': [{
+	'uuid': 'c2f3d2b3-7250-4d27-97f4-eef38be32f7f',
+	'email': 'contact@example.com',
+	'name': 'Contact',
+	'opportunity': 'false',
+	'lead_stage': 'Lead',
+	'tags': ['lead'],
+	'last_conversion': {'content': {'identificador': 'newsletter'}, 'created_at': '2019-06-21T12:08:38-03:00'}
+}]})
+
+
+async def handler(contact): # pylint: disable=unused-argument
+	""" no-op handler """
+
+
+async def sender(port, number):
+	""" posts `number` deliveries over one connection """
+	reader, writer = await asyncio.open_connection('127.0.0.1', port)
+	request = (f"POST /webhooks HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+	           f"Content-Length: {len(PAYLOAD)}\r\n\r\n").encode('latin-1') + PAYLOAD
+	for _ in range(number):
+		writer.write(request)
+		await reader.readuntil(b'\r\n\r\n')
+	writer.close()
+
+
+async def run(connections, number):
+	""" runs the benchmark """
+	receiver = RDSWebhookReceiver(handler, host='127.0.0.1', port=0, routes={'/webhooks': WEBHOOK_CONVERTED})
+	async with receiver:
+		started = time.perf_counter()
+		await asyncio.gather(*(sender(receiver.address[1], number) for _ in range(connections)))
+		elapsed = time.perf_counter() - started
+	stats = receiver.stats()
+	print(f"deliveries: {stats['accepted']}  per second: {stats['accepted'] / elapsed:.0f}  "
+	      f"queue peak: {stats['queue_peak']}  handled: {stats['handled']}")
+
+
+def main():
+	""" parses the arguments """
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument('--connections', type=int, default=20)
+	parser.add_argument('--number', type=int, default=1000)
+	arguments = parser.parse_args()
+	asyncio.run(run(arguments.connections, arguments.number))
+
+
+if __name__ == '__main__':
+	main()
+
+
+# end-of-file
@@ -0,0 +1,240 @@
+""" asyncio flavour of the RD Station api client.
+
+Every resource of `rds_client/resources/` only delegates to `client.send_request`,
+so the very same resource classes become awaitable once `send_request` is a
+coroutine. The responses still go through :class:`RDSResponse
+<rds_client.response.RDSResponse>`, keeping the same error mapping.
+
+ref: https://developers.rdstation.com/en/overview
+"""
+
+import asyncio
+import logging
+import aiohttp
+
+from cache import cache_key
+from codec import CODEC
+from response import RDSResponse
+from exceptions import RDStationException
+from rest_client import RDStationRestClient
+from rest_client import unique
+from rest_client import outcome
+from rest_client import fill_pending
+from tokens import is_unauthorized
+
+
+LOG = logging.getLogger(__name__)
+
+
+class RDSAsyncResponse():
+	""" Already read aiohttp response exposing the interface used by RDSResponse. """
+
+	def __init__(self, response, content, codec=CODEC):
+		self.codec = codec
+		self.status_code = response.status
+		self.headers = response.headers
+		self.cookies = response.cookies
+		self.content = content
+
+	@property
+	def text(self):
+		""" decoded body of the response """
+		return self.content.decode('utf-8', errors='replace')
+
+	def json(self):
+		""" body of the response parsed as json """
+		return self.codec.loads(self.content)
+
+
+class AsyncRDStationRestClient(RDStationRestClient):
+	"""Class responsible for implementing an asyncio RDStation API client.
+
+	usage:
+		async with AsyncRDStationRestClient(client) as rds:
+			contacts = await asyncio.gather(
+				*(rds.get_contacts_by_uiid(uuid) for uuid in uuids))
+	"""
+
+	def __init__(self, client, **kwargs):
+		self._limit = kwargs.get('limit', 100)
+		self._timeout = kwargs.get('timeout', 30)
+		super(AsyncRDStationRestClient, self).__init__(client, **kwargs)
+
+	def create_session(self):
+		"""
+		the aiohttp session must be created inside a running event loop,
+		so it is only opened by the first request.
+		"""
+		return None
+
+	async def open(self):
+		"""
+		method responsible for opening the http session shared by all requests.
+
+		:return: `<aiohttp.ClientSession>`.
+		"""
+		if self.session is None or self.session.closed:
+			self.session = aiohttp.ClientSession(
+				connector=aiohttp.TCPConnector(limit=self._limit),
+				timeout=aiohttp.ClientTimeout(total=self._timeout))
+		return self.session
+
+	async def close(self):
+		""" method responsible for closing the http session. """
+		if self.session is not None and not self.session.closed:
+			await self.session.close()
+
+	async def acquire_rate_limit_async(self, resource, data=None):
+		"""
+		coroutine version of :meth:`acquire_rate_limit`.
+		"""
+		waited = 0.0
+		if self._rate_limiter is None:
+			return waited
+		for family, key in resource.rate_limits(data):
+			waited += await self._rate_limiter.acquire_async(family, key=key, timeout=self._rate_limit_timeout)
+			LOG.debug(f"rate-limit {family} waited: {waited:.3f}s")
+		return waited
+
+	async def send_request(self, resource, method, data=None, **kwargs): # pylint: disable=arguments-differ
+		"""
+		method responsible for sending resource request processing.
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:param method: http method
+		:param kwargs: others params
+
+			:return: `<rds_client.RDSJsonResponse>`.
+		"""
+		url = self.prepare_path(resource, kwargs.pop('route_params', None))
+		raw = kwargs.pop('raw', False)
+		cached = None if raw else self.get_cached_response(resource, method, url, kwargs.get('params'))
+		if cached is not None:
+			return cached
+		if method == "GET" and self._single_flight is not None:
+			key = (cache_key(url, kwargs.get('params'), self._account_id), raw)
+			return await self._single_flight.do_async(
+				key, self.dispatch, resource, method, url, data, raw, **kwargs)
+		return await self.dispatch(resource, method, url, data, raw, **kwargs)
+
+	async def get_token_async(self, resource):
+		"""
+		coroutine version of :meth:`RDStationRestClient.get_token`.
+		"""
+		if not resource.authenticated:
+			return None
+		return await self._token_manager.token_async()
+
+	async def dispatch(self, resource, method, url, data=None, raw=False, **kwargs): # pylint: disable=invalid-overridden-method
+		"""
+		coroutine version of :meth:`RDStationRestClient.dispatch`.
+		"""
+		token = await self.get_token_async(resource)
+		try:
+			return await self.dispatch_once(resource, method, url, data, raw, token, **kwargs)
+		except RDStationException as error:
+			if token is None or not is_unauthorized(error):
+				raise
+			LOG.info(f"access token rejected by {method} {url}, renewing it.")
+			token = await self._token_manager.refresh_async(stale=token)
+			return await self.dispatch_once(resource, method, url, data, raw, token, **kwargs)
+
+	async def dispatch_once(self, resource, method, url, data=None, raw=False, token=None, **kwargs): # pylint: disable=invalid-overridden-method
+		"""
+		coroutine version of :meth:`RDStationRestClient.dispatch_once`.
+		"""
+		body = self.encode_body(data)
+		headers = self.request_headers(token)
+		policy = self.get_retry_policy(resource)
+		breaker = self.get_circuit_breaker(resource)
+		session = await self.open()
+		if isinstance(kwargs.get('timeout'), (int, float)):
+			kwargs['timeout'] = aiohttp.ClientTimeout(total=kwargs['timeout'])
+		attempt = 0
+		while True:
+			if breaker is not None:
+				breaker.before_request()
+			await self.acquire_rate_limit_async(resource, data)
+			try:
+				# pylint disable=bad-continuation
+				async with session.request(method=method, url=url, \
+						data=body, headers=headers, **kwargs) as response:
+					content = await response.read()
+				# pylint disable=bad-continuation
+			except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+				delay = self.next_attempt(method, url, policy, breaker, attempt, error=error)
+				if delay is None:
+					raise
+			else:
+				delay = self.next_attempt(method, url, policy, breaker, attempt, response.status,
+				                          response.headers.get('Retry-After'))
+				if delay is None:
+					break
+			attempt += 1
+			await asyncio.sleep(delay)
+		LOG.debug(response)
+		LOG.debug(content)
+		LOG.debug(response.headers)
+
+		rds_response = await self.parse_response_async(
+			resource, method, url, data, RDSAsyncResponse(response, content, self._codec), raw)
+		self.update_cache(resource, method, url, rds_response, len(content), kwargs.get('params'))
+		return rds_response
+
+	async def parse_response_async(self, resource, method, url, data, response, raw=False): # pylint: disable=too-many-arguments
+		"""
+		coroutine version of :meth:`RDStationRestClient.parse_response`, writing
+		the dead letters in a thread, off the event loop.
+		"""
+		try:
+			return self.decode_response(response, raw)
+		except RDStationException as error:
+			if self._dead_letters is not None and method != "GET":
+				# to_thread carries the context, a replay in progress included
+				await asyncio.to_thread(self._dead_letters.record, resource, method, url, data, error)
+			raise
+
+	async def get_contacts_many(self, identifiers, by='uuid', max_workers=8, **kwargs): # pylint: disable=invalid-overridden-method
+		"""
+		asynchronous generator version of :meth:`RDStationRestClient.get_contacts_many`.
+
+		usage:
+			async for identifier, contact in client.get_contacts_many(uuids, max_workers=64):
+				...
+		"""
+		fetch = self._contacts_fetcher(by)
+		pending = {}
+		identifiers = unique(identifiers)
+		try:
+			while True:
+				fill_pending(identifiers, pending, lambda identifier: asyncio.ensure_future(fetch(identifier, **kwargs)),
+				             max_workers)
+				if not pending:
+					return
+				done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					yield pending.pop(task), outcome(task)
+		finally:
+			for task in pending:
+				task.cancel()
+
+	async def connect(self): # pylint: disable=invalid-overridden-method
+		"""
+		method responsible for activating a connection with the RD Station api,
+		fetching the access token and starting its background refresher.
+			<rds_client.AsyncRDStationRestClient.connect>`.
+		"""
+		await self._token_manager.token_async()
+		self._token_manager.start_async()
+		LOG.debug(f"expire-in: {self._token_manager.expires_in}")
+		return self
+
+	async def __aenter__(self):
+		await self.connect()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.close()
+		self.__exit__(exc_type, exc_val, exc_tb)
+
+
+# end-of-file
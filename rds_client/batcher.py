@@ -0,0 +1,208 @@
+""" Automatic batching of events through the events batch endpoint.
+
+Events of `events.py` are submitted one at a time and accumulated by a
+background sender, which flushes them through `create_event_batch` as soon
+as `max_items` events, `max_bytes` of payload or `linger` seconds since the
+first buffered event is reached. The bounded queue applies backpressure to
+the producers when the sender falls behind. Each event is encoded once, the
+batch is sent as the join of its encoded events.
+
+ref: https://developers.rdstation.com/en/reference/events
+"""
+
+import time
+import queue
+import logging
+import threading
+
+from exceptions import RDStationException
+from validation import RDSInvalidEvent
+from validation import RDSValidationError
+
+
+LOG = logging.getLogger(__name__)
+
+_CLOSE = object()
+
+
+class RDEventBatcher():
+	""" Background sender batching events.
+
+	usage:
+		with RDEventBatcher(client, max_items=100, linger=0.5) as batcher:
+			for order in orders:
+				batcher.submit(RDPlacedOrderEvent(...))
+
+	invalid events dead-lettered instead of sent:
+		batcher = RDEventBatcher(client, validator=RDSEventValidator(),
+		                         on_invalid=partial(store.record_invalid, client))
+	"""
+
+	def __init__(self, client, max_items=100, max_bytes=512 * 1024, linger=1.0, # pylint: disable=too-many-arguments
+	             max_queue=10000, on_error=None, validator=None, on_invalid=None):
+		"""
+		:param client: instance of `<rds_client.RDStationRestClient>`.
+		:param max_items: events per batch.
+		:param max_bytes: max size of the encoded events of a batch.
+		:param linger: max seconds an event waits for its batch to fill.
+		:param max_queue: events buffered before `submit` blocks.
+		:param on_error: callable(events, error) for the batches that failed.
+		:param validator: `<rds_client.validation.RDSEventValidator>` checking the
+		events before they are batched.
+		:param on_invalid: callable(`<rds_client.validation.RDSInvalidEvent>`) for the
+		events rejected by the validator or that can not be encoded, which are dropped
+		by default.
+		"""
+		self.client = client
+		self.max_items = max_items
+		self.max_bytes = max_bytes
+		self.linger = linger
+		self.on_error = on_error
+		self.validator = validator
+		self.on_invalid = on_invalid
+		self.submitted = 0
+		self.invalid = 0
+		self.sent = 0
+		self.failed = 0
+		self.batches = 0
+		self._closed = False
+		self._lock = threading.Lock()
+		self._queue = queue.Queue(maxsize=max_queue)
+		self._thread = threading.Thread(target=self._run, name='rds-event-batcher', daemon=True)
+		self._thread.start()
+
+	def submit(self, event, block=True, timeout=None):
+		"""
+		method responsible for enqueuing an event.
+
+		:param event: instance of `<rds_client.events.RDRequestBody>` or dict event body.
+		:param block: wait for room in the queue when it is full.
+		:param timeout: max seconds to wait for room in the queue.
+		:raises queue.Full: when the queue stays full.
+		"""
+		if self._closed:
+			raise RDStationException("event batcher is closed.")
+		self._queue.put(event, block=block, timeout=timeout)
+		with self._lock:
+			self.submitted += 1
+
+	def flush(self, timeout=None):
+		"""
+		method responsible for sending every event submitted so far.
+
+		:return: True when the events were sent before the timeout, False at once
+		when the batcher is closed.
+		"""
+		if self._closed or not self._thread.is_alive():
+			return False
+		flushed = threading.Event()
+		try:
+			self._queue.put(flushed, timeout=timeout)
+		except queue.Full:
+			return False
+		return flushed.wait(timeout)
+
+	def close(self, timeout=None):
+		""" method responsible for flushing the pending events and stopping the sender. """
+		if self._closed:
+			return
+		self._closed = True
+		self._queue.put(_CLOSE, timeout=timeout)
+		self._thread.join(timeout)
+
+	def _run(self):
+		batch, encoded, size, deadline, received = [], [], 0, None, 0
+		while True:
+			wait = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+			try:
+				item = self._queue.get(timeout=wait)
+			except queue.Empty:
+				item = None
+			if item is None or item is _CLOSE or isinstance(item, threading.Event):
+				self._send(batch, encoded)
+				batch, encoded, size, deadline = [], [], 0, None
+				if item is _CLOSE:
+					return
+				if item is not None:
+					item.set()
+				continue
+			received += 1
+			if self.validator is not None and not self._validate(received - 1, item):
+				continue
+			try:
+				event = item.to_event() if hasattr(item, 'to_event') else item
+				body = self.client.encode_body(event)
+			except Exception as error: # pylint: disable=broad-except
+				self._reject(received - 1, item, [RDSValidationError(
+					'event', 'INVALID_FORMAT', f"event can not be encoded: {error}")])
+				continue
+			# the commas and brackets of the batch body
+			if batch and size + len(body) + 1 > self.max_bytes:
+				self._send(batch, encoded)
+				batch, encoded, size, deadline = [], [], 0, None
+			batch.append(event)
+			encoded.append(body)
+			size += len(body) + 1
+			if deadline is None:
+				deadline = time.monotonic() + self.linger
+			if len(batch) >= self.max_items:
+				self._send(batch, encoded)
+				batch, encoded, size, deadline = [], [], 0, None
+
+	def _validate(self, index, event):
+		errors = self.validator.validate(event)
+		if not errors:
+			return True
+		self._reject(index, event, errors)
+		return False
+
+	def _reject(self, index, event, errors):
+		self.invalid += 1
+		invalid = RDSInvalidEvent(index, event, errors)
+		if self.on_invalid is None:
+			LOG.warning(f"invalid event dropped: {errors}")
+			return
+		try:
+			self.on_invalid(invalid)
+		except Exception as error: # pylint: disable=broad-except
+			LOG.error(f"invalid event handler failed: {error}")
+
+	def _send(self, batch, encoded):
+		if not batch:
+			return
+		try:
+			self.client.create_event_batch(b'[' + b','.join(encoded) + b']')
+			self.sent += len(batch)
+			self.batches += 1
+		except Exception as error: # pylint: disable=broad-except
+			self.failed += len(batch)
+			LOG.error(f"event batch of {len(batch)} events failed: {error}")
+			if self.on_error is not None:
+				try:
+					self.on_error(batch, error)
+				except Exception as callback_error: # pylint: disable=broad-except
+					LOG.error(f"event batch error handler failed: {callback_error}")
+
+	def stats(self):
+		"""
+		method responsible for reporting the activity of the batcher.
+
+		:return: dict with submitted, sent, failed, invalid, batches and queued events.
+		"""
+		return {
+			'submitted': self.submitted,
+			'sent': self.sent,
+			'failed': self.failed,
+			'invalid': self.invalid,
+			'batches': self.batches,
+			'queued': self._queue.qsize()
+		}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+
+# end-of-file
@@ -0,0 +1,194 @@
+""" Response cache for the read endpoints of the RD Station api.
+
+Responses of `GET` requests are kept with a time to live chosen by the
+`cache` family of the resource and evicted in least recently used order once
+the cache holds more than `max_entries` entries or `max_bytes` bytes of body.
+
+Each entry is tagged with its family and with the contact it describes
+(uuid and email), so a write to a contact drops every cached view of it,
+whichever identifier was used to read it.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import unquote
+
+
+DEFAULT_TTLS = {
+	"contacts": 30,
+	"funnels": 30,
+	"fields": 300,
+	"marketing": 3600
+}
+
+# families whose urls and bodies identify a contact
+CONTACT_FAMILIES = ("contacts", "funnels")
+CONTACT_PATTERN = re.compile(r'/contacts/([^/?]+)')
+
+
+def cache_key(url, params=None, account=None):
+	"""
+	method responsible for building the key of a request.
+
+	:param url: complete url of the request.
+	:param params: query string parameters.
+	:param account: identifier of the account of the client, keeps accounts apart.
+	:return: hashable key.
+	"""
+	params = tuple(sorted(params.items())) if isinstance(params, dict) else params
+	return url, params, account
+
+
+def cache_tags(family, url, response=None):
+	"""
+	method responsible for listing the tags of a request.
+
+	:param family: cache family of the resource.
+	:param url: complete url of the request.
+	:param response: parsed response, its `uuid` and `email` tag the contact.
+	:return: set of tags.
+	"""
+	tags = {f'family:{family}'}
+	if family not in CONTACT_FAMILIES:
+		return tags
+	match = CONTACT_PATTERN.search(url)
+	if match:
+		identifier = unquote(match.group(1))
+		if identifier.startswith('uuid:'):
+			identifier = identifier[len('uuid:'):]
+		tags.add(f'contact:{identifier}')
+	if response is not None:
+		if getattr(response, 'uuid', None):
+			tags.add(f'contact:{response.uuid}')
+		if getattr(response, 'email', None):
+			tags.add(f'contact:email:{response.email}')
+	return tags
+
+
+class RDSResponseCache():
+	""" Thread-safe TTL and LRU cache of parsed responses.
+
+	Cached responses are shared by every caller and must be treated as read only.
+
+	usage:
+		cache = RDSResponseCache(max_entries=10000, ttls={'contacts': 10})
+		client = RDStationRestClient(credentials, response_cache=cache)
+	"""
+
+	def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttls=None):
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+		self.invalidations = 0
+		self.bytes = 0
+		# key -> (expires, size, tags, response)
+		self._entries = OrderedDict()
+		self._tags = {}
+		self._lock = threading.Lock()
+
+	def get(self, key):
+		"""
+		method responsible for returning a fresh cached response.
+
+		:param key: key built by :func:`cache_key`.
+		:return: the cached response, None on miss.
+		"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			if entry[0] <= time.monotonic():
+				self._remove(key)
+				self.expirations += 1
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return entry[3]
+
+	def set(self, key, response, family, size, tags=()): # pylint: disable=too-many-arguments
+		"""
+		method responsible for caching a response.
+
+		:param key: key built by :func:`cache_key`.
+		:param response: parsed response.
+		:param family: cache family choosing the time to live.
+		:param size: size in bytes of the response body.
+		:param tags: tags invalidating the entry.
+		"""
+		ttl = self.ttls.get(family, 0)
+		if ttl <= 0 or size > self.max_bytes:
+			return
+		with self._lock:
+			if key in self._entries:
+				self._remove(key)
+			self._entries[key] = (time.monotonic() + ttl, size, frozenset(tags), response)
+			self.bytes += size
+			for tag in tags:
+				self._tags.setdefault(tag, set()).add(key)
+			while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+				self._remove(next(iter(self._entries)))
+				self.evictions += 1
+
+	def invalidate(self, tags):
+		"""
+		method responsible for dropping the entries carrying any of the tags.
+
+		:param tags: tags built by :func:`cache_tags`.
+		:return: number of entries dropped.
+		"""
+		with self._lock:
+			keys = set()
+			for tag in tags:
+				keys.update(self._tags.get(tag, ()))
+			for key in keys:
+				self._remove(key)
+			self.invalidations += len(keys)
+			return len(keys)
+
+	def clear(self):
+		""" method responsible for dropping every entry. """
+		with self._lock:
+			self._entries.clear()
+			self._tags.clear()
+			self.bytes = 0
+
+	def _remove(self, key):
+		_, size, tags, _ = self._entries.pop(key)
+		self.bytes -= size
+		for tag in tags:
+			keys = self._tags.get(tag)
+			if keys is not None:
+				keys.discard(key)
+				if not keys:
+					del self._tags[tag]
+
+	def stats(self):
+		"""
+		method responsible for reporting the usage of the cache.
+
+		:return: dict with hits, misses, hit_ratio, evictions, expirations,
+		invalidations, entries and bytes.
+		"""
+		with self._lock:
+			lookups = self.hits + self.misses
+			return {
+				'hits': self.hits,
+				'misses': self.misses,
+				'hit_ratio': self.hits / lookups if lookups else 0.0,
+				'evictions': self.evictions,
+				'expirations': self.expirations,
+				'invalidations': self.invalidations,
+				'entries': len(self._entries),
+				'bytes': self.bytes
+			}
+
+
+# end-of-file
@@ -0,0 +1,128 @@
+""" Circuit breakers in front of the RD Station api.
+
+When a resource family keeps failing (connection errors, timeouts or 5xx
+responses) its breaker opens and every request of that family fails fast
+with :class:`RDCircuitOpen <rds_client.exceptions.RDCircuitOpen>` instead
+of waiting for a timeout. After `recovery_timeout` seconds the breaker is
+half-open and lets a few trial requests through: a success closes it, a
+failure opens it again.
+"""
+
+import time
+import threading
+
+from exceptions import RDCircuitOpen
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class RDSCircuitBreaker():
+	""" Thread-safe breaker with closed, open and half-open states. """
+
+	def __init__(self, name, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1):
+		self.name = name
+		self.failure_threshold = failure_threshold
+		self.recovery_timeout = recovery_timeout
+		self.half_open_max_calls = half_open_max_calls
+		self.rejected = 0
+		self._state = CLOSED
+		self._failures = 0
+		self._opened_at = 0.0
+		self._trials = 0
+		self._lock = threading.Lock()
+
+	@property
+	def state(self):
+		""" current state of the breaker """
+		with self._lock:
+			return self._current_state(time.monotonic())
+
+	def _current_state(self, now):
+		if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+			self._state = HALF_OPEN
+			self._opened_at = now
+			self._trials = 0
+		return self._state
+
+	def before_request(self):
+		"""
+		method responsible for letting a request through the breaker.
+
+		:raises RDCircuitOpen: when the breaker is open or has no trial left.
+		"""
+		with self._lock:
+			now = time.monotonic()
+			state = self._current_state(now)
+			if state == CLOSED:
+				return
+			if state == HALF_OPEN:
+				# a trial which never reported back must not hold the breaker forever
+				if self._trials < self.half_open_max_calls or \
+						now - self._opened_at >= self.recovery_timeout:
+					self._trials += 1
+					self._opened_at = now
+					return
+			self.rejected += 1
+			retry_in = max(self.recovery_timeout - (now - self._opened_at), 0.0)
+			raise RDCircuitOpen(f"circuit '{self.name}' is {state}, retry in {retry_in:.1f}s.")
+
+	def record(self, success):
+		"""
+		method responsible for registering the outcome of a request.
+
+		:param success: False for connection errors, timeouts and 5xx responses.
+		"""
+		with self._lock:
+			if success:
+				self._state = CLOSED
+				self._failures = 0
+				self._trials = 0
+				return
+			self._failures += 1
+			if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+				self._state = OPEN
+				self._opened_at = time.monotonic()
+				self._trials = 0
+
+
+class RDSCircuitBreakers():
+	""" Circuit breakers keyed by resource family, created on first use.
+
+	usage:
+		breakers = RDSCircuitBreakers(failure_threshold=3, recovery_timeout=10)
+		client = RDStationRestClient(credentials, circuit_breakers=breakers)
+	"""
+
+	def __init__(self, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1):
+		self.failure_threshold = failure_threshold
+		self.recovery_timeout = recovery_timeout
+		self.half_open_max_calls = half_open_max_calls
+		self._breakers = {}
+		self._lock = threading.Lock()
+
+	def get(self, family):
+		"""
+		method responsible for returning the breaker of a family.
+
+		:param family: resource family, e.g. `contacts`.
+		:return: `<rds_client.circuit.RDSCircuitBreaker>`, None when family is None.
+		"""
+		if family is None:
+			return None
+		with self._lock:
+			if family not in self._breakers:
+				self._breakers[family] = RDSCircuitBreaker(
+					family, self.failure_threshold, self.recovery_timeout, self.half_open_max_calls)
+			return self._breakers[family]
+
+	def states(self):
+		""" state of every breaker created so far """
+		with self._lock:
+			breakers = list(self._breakers.values())
+		return {breaker.name: breaker.state for breaker in breakers}
+
+
+# end-of-file
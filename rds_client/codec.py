@@ -0,0 +1,96 @@
+""" JSON codecs used to encode the requests and decode the responses.
+
+The fastest library installed is selected: orjson, then ujson, falling back
+to the standard library. Every codec encodes to bytes, which are sent as the
+request body without any further copy.
+"""
+
+import json
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+try:
+	import ujson
+except ImportError:
+	ujson = None
+
+
+class RDSJSONCodec():
+	""" Standard library codec, always available. """
+
+	name = 'json'
+
+	def dumps(self, obj, indent=False):
+		"""
+		method responsible for encoding an object.
+
+		:param obj: object to encode.
+		:param indent: human readable output.
+		:return: bytes.
+		"""
+		if indent:
+			return json.dumps(obj, indent=4).encode('utf-8')
+		return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+	def loads(self, data):
+		"""
+		method responsible for decoding a document.
+
+		:param data: bytes or str.
+		:return: decoded object.
+		"""
+		return json.loads(data)
+
+
+class RDSOrjsonCodec(RDSJSONCodec):
+	""" orjson codec. """
+
+	name = 'orjson'
+
+	def dumps(self, obj, indent=False):
+		return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+
+	def loads(self, data):
+		return orjson.loads(data)
+
+
+class RDSUjsonCodec(RDSJSONCodec):
+	""" ujson codec. """
+
+	name = 'ujson'
+
+	def dumps(self, obj, indent=False):
+		return ujson.dumps(obj, indent=4 if indent else 0, ensure_ascii=False).encode('utf-8')
+
+	def loads(self, data):
+		return ujson.loads(data)
+
+
+CODECS = {
+	RDSJSONCodec.name: RDSJSONCodec,
+	RDSOrjsonCodec.name: RDSOrjsonCodec,
+	RDSUjsonCodec.name: RDSUjsonCodec
+}
+
+
+def get_codec(name=None):
+	"""
+	method responsible for choosing a codec.
+
+	:param name: `orjson`, `ujson` or `json`, None selects the fastest installed.
+	:return: `<rds_client.codec.RDSJSONCodec>`.
+	"""
+	if name is None:
+		name = 'orjson' if orjson is not None else 'ujson' if ujson is not None else 'json'
+	if (name == 'orjson' and orjson is None) or (name == 'ujson' and ujson is None):
+		raise ImportError(f"the '{name}' codec is not installed.")
+	return CODECS[name]()
+
+
+CODEC = get_codec()
+
+
+# end-of-file
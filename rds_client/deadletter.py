@@ -0,0 +1,271 @@
+""" Dead-letter store for requests rejected because of their data.
+
+When the api rejects a write with one of the data related errors of
+`response.py` (invalid format, validation, conflicting fields, ...) the
+client stores the payload here, with the mapped exception type and message,
+instead of losing it in a log line. Once the data is fixed, :meth:`replay`
+re-submits the selected failures at a controlled rate, :meth:`replay_async`
+through an asyncio client.
+
+ref: https://developers.rdstation.com/en/error-states
+"""
+
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextvars import ContextVar
+
+from exceptions import RDStationException
+from exceptions import RDBadRequestException
+from exceptions import RDInvalidDataType
+from exceptions import RDReadOnlyFieldsException
+from exceptions import RDInexistentFields
+from exceptions import RDConflictingField
+from exceptions import RDEmailAlreadyInUse
+from exceptions import RDValidationRelatedException
+from codec import CODEC
+from ratelimit import RDSTokenBucket
+from response import mapped_errors
+from resources.resource import RDStationResource
+from resources.event import RDEvent
+
+
+LOG = logging.getLogger(__name__)
+
+# store whose replay is running in the current thread or task, its own requests are not recorded again
+_REPLAYING = ContextVar('rds_dead_letters_replaying', default=None)
+
+# errors caused by the payload itself, sending it again unchanged fails the same way
+DEAD_LETTER_EXCEPTIONS = (
+	RDBadRequestException,
+	RDInvalidDataType,
+	RDReadOnlyFieldsException,
+	RDInexistentFields,
+	RDConflictingField,
+	RDEmailAlreadyInUse,
+	RDValidationRelatedException
+)
+
+
+def resource_classes(base=RDStationResource):
+	""" every resource class, keyed by name """
+	classes = {}
+	for subclass in base.__subclasses__():
+		classes[subclass.__name__] = subclass
+		classes.update(resource_classes(subclass))
+	return classes
+
+
+class RDSDeadLetterStore():
+	""" SQLite store of the payloads rejected by the api.
+
+	usage:
+		store = RDSDeadLetterStore('dead-letters.db')
+		client = RDStationRestClient(credentials, dead_letters=store)
+		...
+		store.replay(client, error_types=['RDInvalidFormat'], rate=5)
+	"""
+
+	def __init__(self, path, exceptions=DEAD_LETTER_EXCEPTIONS):
+		self.path = path
+		self.exceptions = exceptions
+		self._local = threading.local()
+		self._connection().execute(
+			"CREATE TABLE IF NOT EXISTS dead_letters ("
+			"id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, "
+			"resource TEXT NOT NULL, method TEXT NOT NULL, url TEXT NOT NULL, "
+			"payload TEXT, error_type TEXT NOT NULL, error_message TEXT, "
+			"attempts INTEGER NOT NULL DEFAULT 0)")
+
+	def _connection(self):
+		connection = getattr(self._local, 'connection', None)
+		if connection is None:
+			connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+			connection.execute("PRAGMA journal_mode=WAL")
+			connection.row_factory = sqlite3.Row
+			self._local.connection = connection
+		return connection
+
+	def _dead_errors(self, error):
+		return [item for item in mapped_errors(error) if isinstance(item, self.exceptions)]
+
+	def record(self, resource, method, url, payload, error): # pylint: disable=too-many-arguments
+		"""
+		method responsible for storing a rejected request, when its errors are data related.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:param payload: body of the request.
+		:param error: exception raised by `<rds_client.RDSJsonResponse>`.
+		:return: True when the request was stored.
+		"""
+		errors = self._dead_errors(error)
+		if not errors or _REPLAYING.get() is self:
+			return False
+		try:
+			encoded = self.encode(resource.client, payload)
+		except (TypeError, ValueError) as encode_error:
+			# called while the api error is raised, which must not be replaced by this one
+			LOG.error(f"dead letter of {method} {url} not stored: {encode_error}")
+			return False
+		self._connection().execute(
+			"INSERT INTO dead_letters (created, resource, method, url, payload, error_type, error_message) "
+			"VALUES (?, ?, ?, ?, ?, ?, ?)",
+			(time.time(), type(resource).__name__, method, url, encoded,
+			 type(errors[0]).__name__, "; ".join(str(item) for item in errors)))
+		return True
+
+	@staticmethod
+	def encode(client, payload):
+		"""
+		method responsible for encoding a payload as the client sent it.
+
+		:param client: instance of `<rds_client.RDStationRestClient>`.
+		:param payload: body of the request, an event model is stored as its event body.
+		:return: str, None when there is no body.
+		"""
+		if hasattr(payload, 'to_event'):
+			payload = payload.to_event()
+		encoded = client.encode_body(payload)
+		return encoded.decode('utf-8') if encoded is not None else None
+
+	@staticmethod
+	def decode(payload):
+		""" stored payload decoded, as it is when it is not json """
+		if payload is None:
+			return None
+		try:
+			return CODEC.loads(payload)
+		except ValueError:
+			return payload
+
+	def record_invalid(self, client, invalid):
+		"""
+		method responsible for storing an event rejected by the local validation,
+		to be replayed through the events endpoint once fixed.
+
+		:param client: instance of `<rds_client.RDStationRestClient>`.
+		:param invalid: `<rds_client.validation.RDSInvalidEvent>`.
+		:return: True when the event was stored.
+		"""
+		resource = RDEvent(client)
+		return self.record(resource, "POST", client.prepare_path(resource), invalid.payload, invalid.exception)
+
+	def select(self, error_types=None, resources=None, limit=None):
+		"""
+		method responsible for listing the stored requests.
+
+		:param error_types: names of the exception types to select, e.g. ['RDInvalidFormat'].
+		:param resources: names of the resource classes to select, e.g. ['RDEvent'].
+		:param limit: max rows returned.
+		:return: list of dict rows, the payload already decoded.
+		"""
+		query, params = "SELECT * FROM dead_letters WHERE 1 = 1", []
+		for column, values in (('error_type', error_types), ('resource', resources)):
+			if values:
+				query += f" AND {column} IN ({', '.join('?' * len(values))})"
+				params.extend(values)
+		query += " ORDER BY id"
+		if limit:
+			query += " LIMIT ?"
+			params.append(limit)
+		rows = [dict(row) for row in self._connection().execute(query, params)]
+		for row in rows:
+			row['payload'] = self.decode(row['payload'])
+		return rows
+
+	def summary(self):
+		""" number of stored requests per exception type """
+		return dict(self._connection().execute(
+			"SELECT error_type, COUNT(*) FROM dead_letters GROUP BY error_type").fetchall())
+
+	def delete(self, identifier):
+		""" method responsible for dropping a stored request. """
+		self._connection().execute("DELETE FROM dead_letters WHERE id = ?", (identifier,))
+
+	def replay(self, client, error_types=None, resources=None, rate=1.0, transform=None): # pylint: disable=too-many-arguments
+		"""
+		method responsible for re-submitting the selected requests.
+
+		Replayed requests are deleted when accepted. Those rejected again keep
+		their row, updated with the new error; other failures are left untouched.
+
+		:param client: instance of `<rds_client.RDStationRestClient>`.
+		:param error_types: names of the exception types to replay.
+		:param resources: names of the resource classes to replay.
+		:param rate: max requests per second.
+		:param transform: callable(payload) returning the payload to send.
+		:raises TypeError: for an asyncio client, replayed by :meth:`replay_async`.
+		:return: dict with replayed, failed and skipped requests.
+		"""
+		if asyncio.iscoroutinefunction(client.dispatch):
+			raise TypeError("an asyncio client is replayed by replay_async.")
+		report = {'replayed': 0, 'failed': 0, 'skipped': 0}
+		bucket = RDSTokenBucket(1, 1.0 / rate)
+		replaying = _REPLAYING.set(self)
+		try:
+			for row, resource, payload in self._replayable(client, error_types, resources, transform, report):
+				time.sleep(bucket.reserve())
+				try:
+					client.dispatch(resource, row['method'], row['url'], payload)
+				except Exception as error: # pylint: disable=broad-except
+					self._failed(client, row, payload, error, report)
+					continue
+				self._replayed(row, report)
+		finally:
+			_REPLAYING.reset(replaying)
+		LOG.info(f"dead letters replay: {report}")
+		return report
+
+	async def replay_async(self, client, error_types=None, resources=None, rate=1.0, transform=None): # pylint: disable=too-many-arguments
+		"""
+		coroutine version of :meth:`replay`, for `<rds_client.AsyncRDStationRestClient>`.
+
+		The SQLite calls are short and run on the event loop, the waits for the rate do not.
+		"""
+		report = {'replayed': 0, 'failed': 0, 'skipped': 0}
+		bucket = RDSTokenBucket(1, 1.0 / rate)
+		# a context variable, the other tasks of the loop keep recording their dead letters
+		replaying = _REPLAYING.set(self)
+		try:
+			for row, resource, payload in self._replayable(client, error_types, resources, transform, report):
+				await asyncio.sleep(bucket.reserve())
+				try:
+					await client.dispatch(resource, row['method'], row['url'], payload)
+				except Exception as error: # pylint: disable=broad-except
+					self._failed(client, row, payload, error, report)
+					continue
+				self._replayed(row, report)
+		finally:
+			_REPLAYING.reset(replaying)
+		LOG.info(f"dead letters replay: {report}")
+		return report
+
+	def _replayable(self, client, error_types, resources, transform, report): # pylint: disable=too-many-arguments
+		classes = resource_classes()
+		for row in self.select(error_types, resources):
+			payload = transform(row['payload']) if transform else row['payload']
+			if payload is None or row['resource'] not in classes:
+				report['skipped'] += 1
+				continue
+			yield row, classes[row['resource']](client), payload
+
+	def _replayed(self, row, report):
+		self.delete(row['id'])
+		report['replayed'] += 1
+
+	def _failed(self, client, row, payload, error, report): # pylint: disable=too-many-arguments
+		report['failed'] += 1
+		errors = self._dead_errors(error) if isinstance(error, RDStationException) else None
+		if not errors:
+			LOG.warning(f"dead letter {row['id']} not replayed: {error}")
+			return
+		self._connection().execute(
+			"UPDATE dead_letters SET payload = ?, error_type = ?, error_message = ?, "
+			"attempts = attempts + 1 WHERE id = ?",
+			(self.encode(client, payload), type(errors[0]).__name__,
+			 "; ".join(str(item) for item in errors), row['id']))
+
+
+# end-of-file
@@ -0,0 +1,414 @@
+""" Deduplication of the webhook deliveries.
+
+RD Station redelivers a webhook until it is acknowledged, so during
+incidents the same conversion arrives more than once. The deduplicators
+remember the deliveries already received, keyed on the contact, event type,
+event identifier and timestamp of `<rds_client.receiver.RDSWebhookContact>`,
+within a time window and a bounded memory:
+
+	* `RDSWindowDedup` keeps the exact keys of the window in an LRU, no false
+	  positives, memory proportional to the number of deliveries.
+	* `RDSBloomDedup` keeps a scalable Bloom filter, a chain of slices growing
+	  as deliveries arrive, within `max_bytes` whatever the traffic, at the cost
+	  of a small, reported, false positive rate.
+
+Both can persist to a file, so a restarted receiver still drops the
+deliveries of the window instead of handling them again. The periodic writes
+run in a background thread, off the event loop checking the deliveries.
+
+ref: https://developers.rdstation.com/en/reference/webhooks#webhooks-retries
+"""
+
+import os
+import math
+import time
+import struct
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from codec import CODEC
+
+
+LOG = logging.getLogger(__name__)
+
+
+def dedup_key(contact):
+	"""
+	method responsible for building the key identifying a delivery.
+
+	:param contact: `<rds_client.receiver.RDSWebhookContact>`.
+	:return: str key.
+	"""
+	return f"{contact.uuid or contact.email}|{contact.event_type}|{contact.event_identifier}|{contact.timestamp}"
+
+
+def write_atomic(path, data):
+	""" method responsible for replacing a file with `data` in one step """
+	temporary = f'{path}.{os.getpid()}.tmp'
+	with open(temporary, 'wb') as target:
+		target.write(data)
+		target.flush()
+		os.fsync(target.fileno())
+	os.replace(temporary, path)
+
+
+class RDSDedup(ABC):
+	""" Base of the deduplicators: counters and periodic persistence. """
+
+	def __init__(self, window, path=None, persist_every=60.0):
+		"""
+		:param window: seconds a delivery is remembered, None for as long as memory allows.
+		:param path: file the deduplicator is persisted to, None to keep it in memory only.
+		:param persist_every: seconds between the writes of the file while receiving.
+		"""
+		self.window = window
+		self.path = path
+		self.persist_every = persist_every
+		self.checked = 0
+		self.duplicates = 0
+		self._lock = threading.Lock()
+		self._persisted = time.monotonic()
+		# background write in progress, at most one at a time
+		self._persisting = None
+		if path is not None and os.path.exists(path):
+			try:
+				self.load()
+			except (OSError, ValueError, struct.error) as error:
+				LOG.warning(f"dedup file {path} not loaded: {error}")
+
+	def seen(self, key, now=None):
+		"""
+		method responsible for checking a delivery and remembering it.
+
+		:param key: key of the delivery, see :func:`dedup_key`.
+		:param now: time of the delivery, `time.time()` by default.
+		:return: True when the delivery was already received.
+		"""
+		now = now or time.time()
+		persist = None
+		with self._lock:
+			self.checked += 1
+			duplicate = self._seen(key, now)
+			if duplicate:
+				self.duplicates += 1
+			if self.path is not None and self._persisting is None and \
+					time.monotonic() - self._persisted >= self.persist_every:
+				persist = self._persisting = threading.Thread(
+					target=self._persist, name='rds-dedup-persist', daemon=True)
+		if persist is not None:
+			persist.start()
+		return duplicate
+
+	def seen_contact(self, contact):
+		"""
+		:param contact: `<rds_client.receiver.RDSWebhookContact>`.
+		:return: True when the delivery of the contact was already received.
+		"""
+		return self.seen(dedup_key(contact), contact.received_at)
+
+	def save(self):
+		""" method responsible for writing the deduplicator to its file. """
+		if self.path is None:
+			return
+		# copied under the lock, encoded outside of it while the deliveries go on
+		with self._lock:
+			snapshot = self._snapshot()
+		write_atomic(self.path, self._dump(snapshot))
+		self._persisted = time.monotonic()
+
+	def _persist(self):
+		try:
+			self.save()
+		except OSError as error:
+			LOG.error(f"dedup file {self.path} not saved: {error}")
+			# tried again after `persist_every`
+			self._persisted = time.monotonic()
+		finally:
+			self._persisting = None
+
+	def load(self):
+		""" method responsible for reading the deduplicator from its file. """
+		with open(self.path, 'rb') as source:
+			data = source.read()
+		with self._lock:
+			self._load(data)
+
+	def close(self):
+		""" method responsible for persisting the deduplicator before exiting. """
+		persisting = self._persisting
+		if persisting is not None:
+			persisting.join()
+		self.save()
+
+	@property
+	def false_positive_rate(self):
+		""" estimated probability of a new delivery being taken as a duplicate """
+		return 0.0
+
+	def stats(self):
+		"""
+		method responsible for reporting the activity of the deduplicator.
+
+		:return: dict with the deliveries checked, the duplicates dropped, the keys
+		remembered, the memory used and the estimated false positive rate.
+		"""
+		return {
+			'checked': self.checked,
+			'duplicates': self.duplicates,
+			'entries': len(self),
+			'bytes': self.memory(),
+			'false_positive_rate': self.false_positive_rate
+		}
+
+	@abstractmethod
+	def _seen(self, key, now):
+		pass
+
+	@abstractmethod
+	def _snapshot(self):
+		pass
+
+	@abstractmethod
+	def _dump(self, snapshot):
+		pass
+
+	@abstractmethod
+	def _load(self, data):
+		pass
+
+	@abstractmethod
+	def memory(self):
+		""" approximate bytes held by the deduplicator """
+
+	@abstractmethod
+	def __len__(self):
+		pass
+
+
+class RDSWindowDedup(RDSDedup):
+	""" Exact deduplication of the deliveries of a time window, in an LRU.
+
+	usage:
+		dedup = RDSWindowDedup(window=3600, max_entries=200000, path='/var/lib/rdstation/dedup.json')
+		receiver = RDSWebhookReceiver(handler, dedup=dedup)
+	"""
+
+	# approximate bytes of an entry: key, timestamp and the links of the ordered dict
+	ENTRY_BYTES = 200
+
+	def __init__(self, window=3600.0, max_entries=100000, path=None, persist_every=60.0):
+		"""
+		:param max_entries: keys remembered, the least recently received are forgotten first.
+		"""
+		self.max_entries = max_entries
+		self._entries = OrderedDict()
+		super().__init__(window, path, persist_every)
+
+	def _seen(self, key, now):
+		entries = self._entries
+		if self.window is not None:
+			horizon = now - self.window
+			while entries:
+				oldest = next(iter(entries.values()))
+				if oldest > horizon:
+					break
+				entries.popitem(last=False)
+		if key in entries:
+			entries.move_to_end(key)
+			entries[key] = now
+			return True
+		entries[key] = now
+		if len(entries) > self.max_entries:
+			entries.popitem(last=False)
+		return False
+
+	def _snapshot(self):
+		return list(self._entries.items())
+
+	def _dump(self, snapshot):
+		return CODEC.dumps({'window': self.window, 'entries': snapshot})
+
+	def _load(self, data):
+		horizon = time.time() - self.window if self.window is not None else None
+		entries = sorted(CODEC.loads(data)['entries'], key=lambda entry: entry[1])
+		self._entries = OrderedDict(
+			(key, seen_at) for key, seen_at in entries[-self.max_entries:]
+			if horizon is None or seen_at > horizon
+		)
+
+	def memory(self):
+		return len(self._entries) * self.ENTRY_BYTES
+
+	def __len__(self):
+		return len(self._entries)
+
+
+class RDSBloomSlice():
+	""" Bloom filter of a fixed capacity and false positive rate. """
+
+	__slots__ = ('capacity', 'error_rate', 'size', 'hashes', 'bits', 'count', 'created', 'updated')
+
+	def __init__(self, capacity, error_rate, created, bits=None):
+		self.capacity = capacity
+		self.error_rate = error_rate
+		self.size = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+		self.hashes = max(int(math.ceil(math.log2(1 / error_rate))), 1)
+		self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+		self.count = 0
+		self.created = created
+		self.updated = created
+
+	def __contains__(self, hashes):
+		# double hashing: position i is first + i * second
+		bits, size = self.bits, self.size
+		position, step = hashes[0] % size, hashes[1] % size
+		for _ in range(self.hashes):
+			if not bits[position >> 3] & (1 << (position & 7)):
+				return False
+			position = (position + step) % size
+		return True
+
+	def add(self, hashes, now):
+		""" method responsible for setting the bits of a key """
+		bits, size = self.bits, self.size
+		position, step = hashes[0] % size, hashes[1] % size
+		for _ in range(self.hashes):
+			bits[position >> 3] |= 1 << (position & 7)
+			position = (position + step) % size
+		self.count += 1
+		self.updated = now
+
+	@property
+	def false_positive_rate(self):
+		""" estimated false positive rate at the current fill """
+		return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class RDSBloomDedup(RDSDedup):
+	""" Probabilistic deduplication in a scalable Bloom filter of bounded memory.
+
+	A slice filled up is followed by one of `growth` times its capacity, and a
+	new slice is also started every half `window`. The slice started at the
+	position k of the chain gets `tightening` ** k times the rate of the first
+	one, so the rate of the chain stays under `error_rate` however its slices
+	were started. The slices last updated before the window, and the oldest
+	ones past `max_bytes`, are dropped.
+
+	usage:
+		dedup = RDSBloomDedup(capacity=1000000, error_rate=0.0001, window=86400,
+		                      path='/var/lib/rdstation/dedup.bloom')
+		receiver = RDSWebhookReceiver(handler, dedup=dedup)
+		LOG.info(dedup.stats()['false_positive_rate'])
+	"""
+
+	MAGIC = b'RDSBLOOM1'
+	HEADER = struct.Struct('<QdQdd')
+
+	def __init__(self, capacity=100000, error_rate=0.001, window=86400.0, max_bytes=16 * 1024 * 1024, # pylint: disable=too-many-arguments
+	             growth=2, tightening=0.5, path=None, persist_every=60.0):
+		"""
+		:param capacity: deliveries of the first slice.
+		:param error_rate: false positive rate the chain of slices is kept under.
+		:param max_bytes: memory of the bits of all the slices.
+		"""
+		self.capacity = capacity
+		self.error_rate = error_rate
+		self.max_bytes = max_bytes
+		self.growth = growth
+		self.tightening = tightening
+		self._slices = []
+		super().__init__(window, path, persist_every)
+
+	@staticmethod
+	def hash(key):
+		""" two 64 bits hashes of a key """
+		digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+		return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+	def _next_slice(self, now):
+		current = self._slices[-1] if self._slices else None
+		# the rates of the live slices sum up to less than `error_rate`
+		error_rate = self.error_rate * (1 - self.tightening) * self.tightening ** len(self._slices)
+		if current is None:
+			capacity = self.capacity
+		elif current.count >= current.capacity:
+			capacity = current.capacity * self.growth
+		else:
+			# started by the window, the traffic did not grow
+			capacity = current.capacity
+		created = RDSBloomSlice(capacity, error_rate, now)
+		if len(created.bits) > self.max_bytes:
+			# the largest slice fitting the memory, growing stops there
+			capacity = max(int(self.max_bytes * 8 * math.log(2) ** 2 / -math.log(error_rate)), 1)
+			created = RDSBloomSlice(capacity, error_rate, now)
+		while self._slices and self.memory() + len(created.bits) > self.max_bytes:
+			dropped = self._slices.pop(0)
+			LOG.debug(f"bloom slice of {dropped.count} deliveries dropped for memory.")
+		self._slices.append(created)
+		return created
+
+	def _seen(self, key, now):
+		slices = self._slices
+		if self.window is not None:
+			while slices and slices[0].updated <= now - self.window:
+				slices.pop(0)
+		hashes = self.hash(key)
+		for item in reversed(slices):
+			if hashes in item:
+				return True
+		current = slices[-1] if slices else None
+		if current is None or current.count >= current.capacity or (
+				self.window is not None and now - current.created >= self.window / 2):
+			current = self._next_slice(now)
+		current.add(hashes, now)
+		return False
+
+	@property
+	def false_positive_rate(self):
+		probability = 1.0
+		for item in self._slices:
+			probability *= 1 - item.false_positive_rate
+		return 1 - probability
+
+	def _snapshot(self):
+		return [(item.capacity, item.error_rate, item.count, item.created, item.updated, bytes(item.bits))
+		        for item in self._slices]
+
+	def _dump(self, snapshot):
+		chunks = [self.MAGIC, struct.pack('<I', len(snapshot))]
+		for *header, bits in snapshot:
+			chunks.append(self.HEADER.pack(*header))
+			chunks.append(bits)
+		return b''.join(chunks)
+
+	def _load(self, data):
+		if not data.startswith(self.MAGIC):
+			raise ValueError("not a bloom dedup file.")
+		offset = len(self.MAGIC)
+		(number,), offset = struct.unpack_from('<I', data, offset), offset + 4
+		horizon = time.time() - self.window if self.window is not None else None
+		slices = []
+		for _ in range(number):
+			capacity, error_rate, count, created, updated = self.HEADER.unpack_from(data, offset)
+			offset += self.HEADER.size
+			item = RDSBloomSlice(capacity, error_rate, created)
+			if len(data) < offset + len(item.bits):
+				raise ValueError("bloom dedup file truncated.")
+			item.bits = bytearray(data[offset:offset + len(item.bits)])
+			offset += len(item.bits)
+			item.count, item.updated = count, updated
+			if horizon is None or updated > horizon:
+				slices.append(item)
+		self._slices = slices
+
+	def memory(self):
+		return sum(len(item.bits) for item in self._slices)
+
+	def __len__(self):
+		return sum(item.count for item in self._slices)
+
+
+# end-of-file
@@ -0,0 +1,354 @@
+""" Per-contact ordered, sharded execution of the webhook handlers.
+
+The deliveries are hashed by contact (uuid, or email) into a fixed number of
+buckets, and each bucket is assigned to one of N shards, a queue drained by
+its own worker. The deliveries of a contact always go through the same
+shard, in the order they were submitted, while different contacts are
+handled in parallel; with `processes=True` each shard hands its deliveries
+to a process of its own.
+
+When a shard falls behind, its busiest buckets move to the least lagging
+shard. A bucket with no delivery pending moves right away; one with pending
+deliveries is parked: its new deliveries are held until the old shard
+handled the pending ones, then go to the new shard, so the order of its
+contacts is kept across the rebalancing. The held deliveries are bounded by
+`max_queue` as the queues are, `submit` waits for room past it.
+
+ref: https://developers.rdstation.com/en/reference/webhooks
+"""
+
+import zlib
+import time
+import logging
+import threading
+from queue import Full
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+LOG = logging.getLogger(__name__)
+
+_CLOSE = object()
+
+
+def contact_key(item):
+	"""
+	method responsible for choosing the key ordering a delivery.
+
+	:param item: `<rds_client.receiver.RDSWebhookContact>` or dict payload.
+	:return: the uuid of the contact, its email when there is no uuid.
+	"""
+	if isinstance(item, dict):
+		contact = item.get('contact') or item
+		return contact.get('uuid') or contact.get('email')
+	return item.uuid or item.email
+
+
+class RDSShard():
+	""" Bounded queue of a shard, with the timing of its deliveries. """
+
+	def __init__(self, index, max_queue):
+		self.index = index
+		self.max_queue = max_queue
+		self.processed = 0
+		self.failed = 0
+		self.handler_seconds = 0.0
+		self._items = deque()
+		self._condition = threading.Condition()
+
+	def put(self, entry, block=True, timeout=None):
+		"""
+		method responsible for queueing an entry.
+
+		:raises queue.Full: when the shard is full and `block` is False or the timeout expired.
+		"""
+		with self._condition:
+			if len(self._items) >= self.max_queue:
+				if not block or not self._condition.wait_for(
+						lambda: len(self._items) < self.max_queue, timeout):
+					raise Full
+			self._items.append(entry)
+			self._condition.notify_all()
+
+	def extend(self, entries):
+		"""
+		method responsible for queueing the held entries of a parked bucket at once.
+
+		The entries may go past the bound, each parked bucket holding at most
+		`max_queue` of them, and `put` waits until the queue is back under it.
+		"""
+		with self._condition:
+			self._items.extend(entries)
+			self._condition.notify_all()
+
+	def get(self):
+		""" method responsible for blocking until an entry is queued. """
+		with self._condition:
+			self._condition.wait_for(lambda: self._items)
+			entry = self._items.popleft()
+			self._condition.notify_all()
+			return entry
+
+	def lag(self, now=None):
+		""" seconds the oldest queued entry is waiting """
+		items = self._items
+		try:
+			return (now or time.monotonic()) - items[0][2] if items else 0.0
+		except IndexError:
+			return 0.0
+
+	def __len__(self):
+		return len(self._items)
+
+
+class RDSShardedDispatcher():
+	""" Dispatcher of deliveries to shards, ordered per contact.
+
+	usage:
+		dispatcher = RDSShardedDispatcher(handler, shards=8)
+		for contact in contacts:
+			dispatcher.submit(contact)
+		dispatcher.close()
+
+	behind the webhook receiver, a single receiver worker keeps the order of the submits:
+		with RDSShardedDispatcher(handler, shards=16, processes=True) as dispatcher:
+			RDSWebhookReceiver(dispatcher.submit, workers=1).run()
+	"""
+
+	def __init__(self, handler, shards=8, buckets=1024, max_queue=1000, key=contact_key, # pylint: disable=too-many-arguments
+	             processes=False, rebalance_every=5.0, hot_lag=1.0, on_error=None):
+		"""
+		:param handler: callable(item) run for each delivery, picklable when `processes` is True.
+		:param shards: number of shards, each one with its own worker.
+		:param buckets: number of hash buckets mapped to the shards, the unit of the rebalancing.
+		:param max_queue: deliveries queued per shard, and held per parked bucket, before `submit` blocks.
+		:param key: callable(item) returning the key ordering the deliveries.
+		:param processes: hands the deliveries of each shard to a process of its own.
+		:param rebalance_every: seconds between the rebalancing checks, None to disable them.
+		:param hot_lag: seconds of lag from which a shard gives away its busiest buckets.
+		:param on_error: callable(item, error) called when the handler fails.
+		"""
+		self.handler = handler
+		self.key = key
+		self.buckets = buckets
+		self.max_queue = max_queue
+		self.rebalance_every = rebalance_every
+		self.hot_lag = hot_lag
+		self.on_error = on_error
+		self.submitted = 0
+		self.rebalances = 0
+		self.moved = 0
+		self._lock = threading.Lock()
+		self._idle = threading.Condition(self._lock)
+		self._table = [bucket % shards for bucket in range(buckets)]
+		# deliveries queued or being handled on the shard of each bucket
+		self._pending = [0] * buckets
+		self._load = [0] * buckets
+		# bucket -> (shard it moves to, deliveries held until its pending ones are handled)
+		self._parked = {}
+		self._rebalanced = time.monotonic()
+		self._shards = [RDSShard(index, max_queue) for index in range(shards)]
+		self._executors = [ProcessPoolExecutor(max_workers=1) for _ in range(shards)] if processes else None
+		self._threads = [
+			threading.Thread(target=self._work, args=(shard,), name=f'rds-shard-{shard.index}', daemon=True)
+			for shard in self._shards
+		]
+		for thread in self._threads:
+			thread.start()
+
+	def bucket(self, item):
+		""" hash bucket of a delivery """
+		key = self.key(item)
+		return zlib.crc32(str(key).encode('utf-8')) % self.buckets
+
+	def shard_of(self, item):
+		""" index of the shard currently handling the contact of a delivery """
+		return self._table[self.bucket(item)]
+
+	def submit(self, item, block=True, timeout=None):
+		"""
+		method responsible for queueing a delivery on the shard of its contact.
+
+		:param item: delivery, `<rds_client.receiver.RDSWebhookContact>` by default.
+		:param block: waits for room when the shard, or the held deliveries of a parked bucket, are full.
+		:raises queue.Full: when the shard is full and `block` is False or the timeout expired.
+		"""
+		bucket = self.bucket(item)
+		now = time.monotonic()
+		with self._idle:
+			while True:
+				parked = self._parked.get(bucket)
+				if parked is None or len(parked[1]) < self.max_queue:
+					break
+				# the held deliveries are released once the old shard handled the pending ones
+				if not block or not self._idle.wait_for(
+						lambda held=parked: self._parked.get(bucket) is not held, timeout):
+					raise Full
+			self._load[bucket] += 1
+			self.submitted += 1
+			if parked is not None:
+				parked[1].append((bucket, item, now))
+				return
+			# a pending bucket only moves once handled, so the shard stays the same
+			shard = self._shards[self._table[bucket]]
+			self._pending[bucket] += 1
+		try:
+			shard.put((bucket, item, now), block, timeout)
+		except Full:
+			self._done(bucket)
+			raise
+		if self.rebalance_every is not None and now - self._rebalanced >= self.rebalance_every:
+			self.rebalance()
+
+	def rebalance(self):
+		"""
+		method responsible for moving buckets out of the most lagging shard.
+
+		The buckets with the most deliveries since the last rebalancing move to
+		the least lagging shard, the idle ones first, until about half the load
+		difference between both shards moved.
+
+		:return: number of buckets moved.
+		"""
+		now = time.monotonic()
+		with self._lock:
+			self._rebalanced = now
+			lags = [shard.lag(now) for shard in self._shards]
+			hot = max(range(len(lags)), key=lags.__getitem__)
+			cold = min(range(len(lags)), key=lags.__getitem__)
+			moved = 0
+			if hot != cold and lags[hot] >= self.hot_lag:
+				loads = [0] * len(self._shards)
+				for bucket, shard in enumerate(self._table):
+					loads[shard] += self._load[bucket]
+				target = (loads[hot] - loads[cold]) / 2
+				candidates = sorted(
+					(bucket for bucket, shard in enumerate(self._table)
+					 if shard == hot and self._load[bucket] and bucket not in self._parked),
+					key=lambda bucket: (bool(self._pending[bucket]), -self._load[bucket]))
+				shifted = 0
+				for bucket in candidates:
+					if shifted >= target:
+						break
+					if self._pending[bucket]:
+						self._parked[bucket] = (cold, [])
+					else:
+						self._table[bucket] = cold
+					shifted += self._load[bucket]
+					moved += 1
+				if moved:
+					self.rebalances += 1
+					self.moved += moved
+					LOG.info(f"{moved} buckets moved from shard {hot} (lag {lags[hot]:.2f}s) to shard {cold}.")
+			# halves the load, the next rebalancing weighs the recent deliveries
+			self._load = [load // 2 for load in self._load]
+		return moved
+
+	def join(self, timeout=None):
+		"""
+		method responsible for waiting until every submitted delivery was handled.
+
+		:return: True when nothing is pending.
+		"""
+		with self._idle:
+			return self._idle.wait_for(lambda: not self._parked and not any(self._pending), timeout)
+
+	def close(self, timeout=None):
+		""" method responsible for handling the queued deliveries and stopping the workers. """
+		# the held deliveries are released before the stop, or their new shard would be gone
+		with self._idle:
+			self._idle.wait_for(lambda: not self._parked, timeout)
+		for shard in self._shards:
+			shard.put((None, _CLOSE, time.monotonic()))
+		for thread in self._threads:
+			thread.join(timeout)
+		for executor in self._executors or ():
+			executor.shutdown(wait=True)
+
+	def stats(self):
+		"""
+		method responsible for reporting the activity of the shards.
+
+		:return: dict with the totals and, per shard, the queued deliveries, the lag of
+		the oldest one, the deliveries handled and failed, the buckets held and the
+		mean handler time.
+		"""
+		now = time.monotonic()
+		buckets = [0] * len(self._shards)
+		for shard in self._table:
+			buckets[shard] += 1
+		shards = []
+		for shard in self._shards:
+			handled = shard.processed + shard.failed
+			shards.append({
+				'queued': len(shard),
+				'lag': shard.lag(now),
+				'processed': shard.processed,
+				'failed': shard.failed,
+				'buckets': buckets[shard.index],
+				'handler_mean_ms': shard.handler_seconds / handled * 1000 if handled else 0.0
+			})
+		with self._lock:
+			parked = sum(len(entries) for _, entries in self._parked.values())
+		return {
+			'submitted': self.submitted,
+			'processed': sum(shard['processed'] for shard in shards),
+			'failed': sum(shard['failed'] for shard in shards),
+			'max_lag': max(shard['lag'] for shard in shards),
+			'rebalances': self.rebalances,
+			'moved': self.moved,
+			'parked': parked,
+			'shards': shards
+		}
+
+	def _done(self, bucket):
+		with self._idle:
+			self._pending[bucket] -= 1
+			if self._pending[bucket]:
+				return
+			parked = self._parked.pop(bucket, None)
+			if parked is not None:
+				# the old shard is done with the bucket, its held deliveries follow on the new one
+				target, entries = parked
+				self._table[bucket] = target
+				self._pending[bucket] = len(entries)
+				# wakes the submits waiting for the held deliveries to be released
+				self._idle.notify_all()
+				if entries:
+					self._shards[target].extend(entries)
+				return
+			self._idle.notify_all()
+
+	def _work(self, shard):
+		executor = self._executors[shard.index] if self._executors else None
+		while True:
+			bucket, item, _ = shard.get()
+			if item is _CLOSE:
+				return
+			started = time.perf_counter()
+			try:
+				if executor is not None:
+					executor.submit(self.handler, item).result()
+				else:
+					self.handler(item)
+				shard.processed += 1
+			except Exception as error: # pylint: disable=broad-except
+				shard.failed += 1
+				LOG.error(f"handler failed on shard {shard.index}: {error}")
+				if self.on_error is not None:
+					try:
+						self.on_error(item, error)
+					except Exception as callback_error: # pylint: disable=broad-except
+						LOG.error(f"on_error failed on shard {shard.index}: {callback_error}")
+			finally:
+				shard.handler_seconds += time.perf_counter() - started
+				self._done(bucket)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+
+# end-of-file
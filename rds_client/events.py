@@ -9,9 +9,87 @@ ref: https://developers.rdstation.com/en/reference/events
 # pylint: disable=unused-import
 # pylint: disable=R0902
 
-import json
 from abc import ABC
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, make_dataclass
+
+from codec import CODEC
+
+
+# attributes of the models sent outside the payload of the event
+EVENT_ATTRIBUTES = ('event_type', 'event_tye', 'event_family')
+
+
+def compile_serializer(model):
+	"""
+	method responsible for generating the `to_event` of a model, reading each
+	field directly and leaving the unset (None) ones out of the payload.
+
+	:param model: dataclass subclass of `<rds_client.events.RDRequestBody>`.
+	:return: function(event) -> dict body of the events endpoint, installed as
+	the `to_event` method of the model on its first call.
+	"""
+	names = [item.name for item in fields(model)]
+	lines = [
+		"def to_event(self):",
+		# subclasses of the model compile their own serializer
+		"\tif type(self) is not MODEL:",
+		"\t\treturn RDRequestBody.to_event(self)",
+		"\tpayload = {}"
+	]
+	for name in names:
+		if name not in EVENT_ATTRIBUTES:
+			lines += [
+				f"\tvalue = self.{name}",
+				"\tif value is not None:",
+				f"\t\tpayload['{name}'] = value"
+			]
+	if '__slots__' not in model.__dict__:
+		# attributes set through `update` outside of the fields
+		lines += [
+			f"\tif len(self.__dict__) != {len(names)}:",
+			"\t\tfor key, value in self.__dict__.items():",
+			"\t\t\tif key not in FIELDS and value is not None:",
+			"\t\t\t\tpayload[key] = value"
+		]
+	if 'event_type' in names:
+		event_type = "self.event_type"
+	elif 'event_tye' in names:
+		event_type = "self.event_tye"
+	else:
+		event_type = "getattr(self, 'event_type', getattr(self, 'event_tye', None))"
+	event_family = "self.event_family" if 'event_family' in names else "getattr(self, 'event_family', None)"
+	lines.append(f"\treturn {{'event_type': {event_type}, 'event_family': {event_family}, 'payload': payload}}")
+	namespace = {
+		'MODEL': model,
+		'RDRequestBody': RDRequestBody,
+		'FIELDS': frozenset(names) | frozenset(EVENT_ATTRIBUTES)
+	}
+	exec("\n".join(lines), namespace) # pylint: disable=exec-used
+	return namespace['to_event']
+
+
+def slotted(model):
+	"""
+	method responsible for creating the `__slots__` variant of a model, with
+	the same fields and serialization but no per-instance `__dict__`.
+
+	:param model: dataclass subclass of `<rds_client.events.RDRequestBody>`.
+	:return: dataclass named after the model with a `Slots` suffix.
+	"""
+	namespace = {'__doc__': model.__doc__}
+	if 'to_event' in model.__dict__:
+		# serialization written by hand, e.g. the batch one, kept as it is
+		namespace['to_event'] = model.__dict__['to_event']
+	variant = make_dataclass(
+		f"{model.__name__}Slots",
+		[(item.name, item.type, field(default=item.default, default_factory=item.default_factory))
+		 for item in fields(model)],
+		bases=(RDRequestBody,),
+		namespace=namespace,
+		slots=True
+	)
+	variant.__module__ = model.__module__
+	return variant
 
 
 @dataclass
@@ -19,6 +97,15 @@ class RDRequestBody(ABC):
 	""" Classe responsável por representar um  objeto
 	de entidade, podendo ter diversas referências. """
 
+	__slots__ = ()
+
+	def attributes(self):
+		""" dict of the attributes of the model """
+		try:
+			return self.__dict__
+		except AttributeError:
+			return {name: getattr(self, name) for name in self.__slots__}
+
 	def update(self, new_dict):
 		""" update representation """
 		# pylint: disable=E0213
@@ -28,11 +115,11 @@ class RDRequestBody(ABC):
 	def get(self, key, value=None):
 		""" get dict representation """
 		# pylint: disable=E0213
-		return self.__dict__.get(key, value)
+		return getattr(self, key, value)
 
 	def __str__(self):
 		# pylint: disable=E0213
-		return str(json.dumps(self.__dict__, indent=4))
+		return CODEC.dumps(self.attributes(), indent=True).decode('utf-8')
 
 	def __repr__(self):
 		return self.__str__()
@@ -44,7 +131,20 @@ class RDRequestBody(ABC):
 		return setattr(self, key, value)
 
 	def __len__(self):
-		return len(self.__dict__)
+		return len(self.attributes())
+
+	def to_event(self):
+		""" body of the events endpoint, only the attributes set go in the payload """
+		# pylint: disable=E0213
+		# compiled once per model, replacing this method on the model class
+		model = type(self)
+		serializer = compile_serializer(model)
+		model.to_event = serializer
+		return serializer(self)
+
+	def dumps(self):
+		""" body of the events endpoint encoded by the codec """
+		return CODEC.dumps(self.to_event())
 
 
 @dataclass
@@ -331,5 +431,25 @@ class RDEventsBatch(RDRequestBody):
 	event_family: str
 	payload: object
 
+	def to_event(self):
+		""" body of the batch endpoint, the list of the events of the batch """
+		return [item.to_event() if hasattr(item, 'to_event') else item for item in self.payload or ()]
+
+
+# `__slots__` variants, for the producers buffering many events
+RDConversionEventSlots = slotted(RDConversionEvent)
+RDMarkOpportunityEventSlots = slotted(RDMarkOpportunityEvent)
+RDMarkOpportunityLostEventSlots = slotted(RDMarkOpportunityLostEvent)
+RDPlacedOrderEventSlots = slotted(RDPlacedOrderEvent)
+RDPlacedOrderEventWithItemSlots = slotted(RDPlacedOrderEventWithItem)
+RDAbandonedCartEventSlots = slotted(RDAbandonedCartEvent)
+RDAbandonedCartEventWithItemSlots = slotted(RDAbandonedCartEventWithItem)
+RDChatStartedEventSlots = slotted(RDChatStartedEvent)
+RDChatFinishedEventSlots = slotted(RDChatFinishedEvent)
+RDCallFinishedEventSlots = slotted(RDCallFinishedEvent)
+RDMediaEventsSlots = slotted(RDMediaEvents)
+RDMediaPlaybackStoppedEventSlots = slotted(RDMediaPlaybackStoppedEvent)
+RDEventsBatchSlots = slotted(RDEventsBatch)
+
 
 # end-of-file
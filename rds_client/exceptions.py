@@ -7,7 +7,8 @@ in the 5xx range indicate an error with our servers (these are rare). """
 
 class RDStationException(Exception):
 	""" ref: https://developers.rdstation.com/en/error-states """
-	pass
+	# http status of the response which raised the exception, None when not raised by a response
+	status_code = None
 
 
 class RDUnauthorizedRequest(RDStationException):
@@ -50,7 +51,7 @@ class RDUnsupportedMediaType(RDStationException):
 
 class RDBadRequestException(RDStationException):
 	def __init__(self, msg):
-		super(RDMalformedBodyRequest, self).__init__(msg)
+		super(RDBadRequestException, self).__init__(msg)
 
 
 class RDMalformedBodyRequest(RDBadRequestException):
@@ -65,7 +66,7 @@ class RDInvalidFormat(RDBadRequestException):
 	""" If an invalid format for an attribute is sent Status 400 Bad Request. """
 
 	def __init__(self, msg):
-		super(RDMalformedBodyRequest, self).__init__(msg)
+		super(RDInvalidFormat, self).__init__(msg)
 
 
 class RDUpperCaseTagsException(RDBadRequestException):
@@ -101,7 +102,7 @@ class RDConflictingField(RDStationException):
 	the lead appears again in the request payload Status 400 Bad Request. """
 
 	def __init__(self, msg):
-		super(RDInexistentFields, self).__init__(msg)
+		super(RDConflictingField, self).__init__(msg)
 
 
 class RDEmailAlreadyInUse(RDStationException):
@@ -119,4 +120,20 @@ class RDValidationRelatedException(RDStationException):
 		super(RDValidationRelatedException, self).__init__(msg)
 
 
+class RDRateLimitExceeded(RDStationException):
+	""" When the client side rate limit of a resource family has no budget left
+	and the caller did not accept to wait for it. """
+
+	def __init__(self, msg):
+		super(RDRateLimitExceeded, self).__init__(msg)
+
+
+class RDCircuitOpen(RDStationException):
+	""" When the circuit breaker of a resource family is open and the request
+	fails fast without being sent. """
+
+	def __init__(self, msg):
+		super(RDCircuitOpen, self).__init__(msg)
+
+
 # end-of-file
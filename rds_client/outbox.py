@@ -0,0 +1,315 @@
+""" Durable on-disk outbox for events.
+
+Producers append events to segment files of a local directory and return
+right away; the write only reaches the page cache, so an event survives a
+crash of the process as soon as `append` returns (pass `fsync=True` to also
+survive a crash of the host). A background sender reads the segments through
+memory maps, posts the events through `create_event_batch` and moves a
+persisted cursor forward. Segments behind the cursor are deleted, and on
+startup the sender resumes from the cursor, replaying what was not
+acknowledged.
+
+Each record is framed as `length | crc32 | json`, so a record torn by a
+crash is detected and dropped from the tail of the last segment.
+
+ref: https://developers.rdstation.com/en/reference/events
+"""
+
+import os
+import mmap
+import zlib
+import struct
+import logging
+import threading
+
+from codec import CODEC
+from exceptions import RDStationException
+
+
+LOG = logging.getLogger(__name__)
+
+HEADER = struct.Struct('<II')
+SEGMENT_SUFFIX = '.seg'
+# client errors worth sending again: a renewed token, a timeout, the rate limit;
+# every other 4xx rejects the batch itself, sending it again fails the same way
+RETRIED_CLIENT_STATUSES = (401, 408, 429)
+
+
+def is_rejection(error):
+	""" True when the api refused the batch for good, a 4xx status not worth retrying """
+	status = getattr(error, 'status_code', None) if isinstance(error, RDStationException) else None
+	return status is not None and 400 <= status < 500 and status not in RETRIED_CLIENT_STATUSES
+
+
+class RDEventOutbox():
+	""" Append-only, segmented event log with a persisted read cursor.
+
+	The outbox is meant to be written by a single process.
+
+	usage:
+		outbox = RDEventOutbox('/var/lib/rdstation/outbox')
+		outbox.append(RDConversionEvent(...))
+	"""
+
+	def __init__(self, directory, segment_bytes=16 * 1024 * 1024, fsync=False):
+		self.directory = directory
+		self.segment_bytes = segment_bytes
+		self.fsync = fsync
+		self.appended = 0
+		self._lock = threading.Lock()
+		self._appended = threading.Condition(self._lock)
+		os.makedirs(directory, exist_ok=True)
+		segments = self.segments()
+		self._segment = segments[-1] if segments else 1
+		self._size = self._recover(self._segment)
+		self._fd = self._open(self._segment)
+
+	def segments(self):
+		""" ids of the segments on disk, oldest first """
+		return sorted(
+			int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+			if name.endswith(SEGMENT_SUFFIX))
+
+	def _path(self, segment):
+		return os.path.join(self.directory, f'{segment:020d}{SEGMENT_SUFFIX}')
+
+	def _open(self, segment):
+		return os.open(self._path(segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+	def _recover(self, segment):
+		# drops a record torn by a crash from the tail of the last segment
+		path = self._path(segment)
+		if not os.path.exists(path):
+			return 0
+		end = 0
+		for end, _ in self._scan(segment, 0):
+			pass
+		if end != os.path.getsize(path):
+			LOG.warning(f"outbox segment {segment} truncated from {os.path.getsize(path)} to {end} bytes.")
+			os.truncate(path, end)
+		return end
+
+	def append(self, event):
+		"""
+		method responsible for enqueuing an event.
+
+		:param event: instance of `<rds_client.events.RDRequestBody>` or dict event body.
+		"""
+		if hasattr(event, 'to_event'):
+			event = event.to_event()
+		payload = CODEC.dumps(event)
+		record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+		with self._lock:
+			if self._size and self._size + len(record) > self.segment_bytes:
+				os.close(self._fd)
+				self._segment += 1
+				self._size = 0
+				self._fd = self._open(self._segment)
+			os.write(self._fd, record)
+			if self.fsync:
+				os.fsync(self._fd)
+			self._size += len(record)
+			self.appended += 1
+			self._appended.notify_all()
+
+	def wait(self, timeout=None):
+		""" method responsible for waiting for the next append. """
+		with self._lock:
+			self._appended.wait(timeout)
+
+	def wake(self):
+		""" method responsible for releasing the readers waiting for an append. """
+		with self._lock:
+			self._appended.notify_all()
+
+	def _scan(self, segment, offset):
+		path = self._path(segment)
+		try:
+			size = os.path.getsize(path)
+		except FileNotFoundError:
+			return
+		if size <= offset:
+			return
+		with open(path, 'rb') as source, \
+				mmap.mmap(source.fileno(), size, access=mmap.ACCESS_READ) as view:
+			while offset + HEADER.size <= size:
+				length, crc = HEADER.unpack_from(view, offset)
+				end = offset + HEADER.size + length
+				if end > size:
+					return
+				payload = view[offset + HEADER.size:end]
+				if zlib.crc32(payload) != crc:
+					return
+				offset = end
+				yield end, payload
+
+	def read(self, cursor, max_records=100):
+		"""
+		method responsible for reading the events after a cursor.
+
+		:param cursor: tuple (segment, offset) as returned by :meth:`cursor`.
+		:param max_records: max events returned.
+		:return: list of (cursor after the event, event).
+		"""
+		segment, offset = cursor
+		records = []
+		while len(records) < max_records:
+			for end, payload in self._scan(segment, offset):
+				records.append(((segment, end), CODEC.loads(payload)))
+				if len(records) >= max_records:
+					break
+			with self._lock:
+				current = self._segment
+			if records or segment >= current:
+				return records
+			# sealed segment fully read, moves on to the next one
+			segment, offset = segment + 1, 0
+		return records
+
+	def cursor(self):
+		"""
+		method responsible for loading the acknowledged position.
+
+		:return: tuple (segment, offset).
+		"""
+		try:
+			with open(os.path.join(self.directory, 'cursor'), encoding='utf-8') as source:
+				segment, offset = source.read().split()
+				return int(segment), int(offset)
+		except FileNotFoundError:
+			segments = self.segments()
+			return (segments[0] if segments else 1), 0
+
+	def acknowledge(self, cursor):
+		"""
+		method responsible for persisting the acknowledged position and deleting
+		the segments behind it.
+
+		:param cursor: tuple (segment, offset).
+		"""
+		path = os.path.join(self.directory, 'cursor')
+		with open(f'{path}.tmp', 'w', encoding='utf-8') as target:
+			target.write(f'{cursor[0]} {cursor[1]}')
+			target.flush()
+			os.fsync(target.fileno())
+		os.replace(f'{path}.tmp', path)
+		for segment in self.segments():
+			if segment >= cursor[0]:
+				break
+			os.remove(self._path(segment))
+
+	def close(self):
+		""" method responsible for closing the segment being written. """
+		with self._lock:
+			os.close(self._fd)
+
+
+class RDOutboxSender():
+	""" Background thread draining an outbox to RD Station.
+
+	Batches rejected by the api (the 4xx statuses but 401, 408 and 429) are
+	handed to `on_error` and acknowledged. Every other failure, 5xx, 401, 408
+	and 429 responses, connection errors, open circuits and exhausted rate
+	limits, keeps the batch in the outbox and is retried with an exponential
+	backoff, up to `max_attempts` sends when given, after which the batch is
+	handed to `on_error` and acknowledged too.
+
+	usage:
+		sender = RDOutboxSender(client, outbox)
+		sender.start()
+		...
+		sender.stop()
+	"""
+
+	def __init__(self, client, outbox, batch_size=100, backoff=1.0, max_backoff=60.0, on_error=None, # pylint: disable=too-many-arguments
+	             max_attempts=None):
+		"""
+		:param backoff: seconds waited before the first retry, doubled up to `max_backoff`.
+		:param on_error: callable(events, error) for the rejected batches, e.g.
+		`<rds_client.deadletter.RDSDeadLetterStore>` recording them.
+		:param max_attempts: sends of a failing batch before it is given up, None to retry it until sent.
+		"""
+		self.client = client
+		self.outbox = outbox
+		self.batch_size = batch_size
+		self.backoff = backoff
+		self.max_backoff = max_backoff
+		self.on_error = on_error
+		self.max_attempts = max_attempts
+		self.sent = 0
+		self.rejected = 0
+		self.retries = 0
+		self._stopping = threading.Event()
+		self._drain = True
+		self._thread = None
+
+	def start(self):
+		""" method responsible for starting the sender, replaying what was not acknowledged. """
+		self._stopping.clear()
+		self._thread = threading.Thread(target=self._run, name='rds-outbox-sender', daemon=True)
+		self._thread.start()
+
+	def stop(self, drain=True, timeout=None):
+		"""
+		method responsible for stopping the sender.
+
+		:param drain: send the pending events before stopping, the batches
+		failing at that point stay in the outbox for the next start.
+		"""
+		self._drain = drain
+		self._stopping.set()
+		self.outbox.wake()
+		if self._thread is not None:
+			self._thread.join(timeout)
+
+	def _run(self):
+		cursor = self.outbox.cursor()
+		failures = 0
+		while True:
+			records = self.outbox.read(cursor, self.batch_size)
+			if not records:
+				if self._stopping.is_set():
+					return
+				self.outbox.wait(self.backoff)
+				continue
+			if self._stopping.is_set() and not self._drain:
+				return
+			events = [event for _, event in records]
+			try:
+				self.client.create_event_batch(events)
+				self.sent += len(events)
+			except Exception as error: # pylint: disable=broad-except
+				failures += 1
+				if not is_rejection(error) and (self.max_attempts is None or failures < self.max_attempts):
+					delay = min(self.backoff * 2 ** (failures - 1), self.max_backoff)
+					self.retries += 1
+					LOG.warning(f"outbox sender retrying in {delay:.1f}s: {error}")
+					if self._stopping.wait(delay):
+						return
+					continue
+				self.rejected += len(events)
+				LOG.error(f"outbox batch of {len(events)} events given up after {failures} attempts: {error}")
+				self._report(events, error)
+			failures = 0
+			cursor = records[-1][0]
+			self.outbox.acknowledge(cursor)
+
+	def _report(self, events, error):
+		if self.on_error is None:
+			return
+		try:
+			self.on_error(events, error)
+		except Exception as callback_error: # pylint: disable=broad-except
+			LOG.error(f"outbox error handler failed: {callback_error}")
+
+	def stats(self):
+		"""
+		method responsible for reporting the activity of the sender.
+
+		:return: dict with sent, rejected and appended events and the retried batches.
+		"""
+		return {'sent': self.sent, 'rejected': self.rejected, 'retries': self.retries,
+		        'appended': self.outbox.appended}
+
+
+# end-of-file
@@ -0,0 +1,173 @@
+""" Streaming bulk upsert of contacts.
+
+Records `(identifier, value, body)` are read lazily from any iterator and
+sent through `upsert_contact_per_identifier` by a bounded pool of workers,
+so memory stays flat whatever the size of the input. The contacts rate
+limit of the client paces the workers.
+
+The pipeline acknowledges records in input order: the checkpoint stores how
+many records from the start of the input already have an outcome, and a
+resumed run skips them.
+
+ref: https://developers.rdstation.com/en/reference/contacts
+"""
+
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+
+LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class RDSUpsertOutcome:
+	""" Outcome of one record of the upsert pipeline. """
+
+	index: int
+	identifier: str
+	value: str
+	response: object = field(default=None)
+	error: Exception = field(default=None)
+
+	@property
+	def ok(self):
+		""" True when the record was upserted """
+		return self.error is None
+
+
+class RDSUpsertPipeline():
+	""" Bounded, checkpointed pipeline of contact upserts.
+
+	usage:
+		pipeline = RDSUpsertPipeline(client, max_workers=16, checkpoint='crm-sync.json')
+		for outcome in pipeline.run(read_crm_export()):
+			if not outcome.ok:
+				LOG.error(outcome.error)
+		LOG.info(pipeline.stats())
+	"""
+
+	def __init__(self, client, max_workers=8, max_in_flight=None, checkpoint=None, # pylint: disable=too-many-arguments
+	             checkpoint_every=100):
+		self.client = client
+		self.max_workers = max_workers
+		self.max_in_flight = max_in_flight or max_workers * 4
+		self.checkpoint = checkpoint
+		self.checkpoint_every = checkpoint_every
+		self.acknowledged = 0
+		self.succeeded = 0
+		self.failed = 0
+		self.skipped = 0
+		self._started = None
+		self._finished = None
+
+	def load_checkpoint(self):
+		"""
+		method responsible for reading how many records were already acknowledged.
+
+		:return: number of records to skip.
+		"""
+		if not self.checkpoint or not os.path.exists(self.checkpoint):
+			return 0
+		with open(self.checkpoint, encoding='utf-8') as checkpoint:
+			return json.load(checkpoint).get('acknowledged', 0)
+
+	def save_checkpoint(self):
+		""" method responsible for atomically storing the acknowledged records. """
+		if not self.checkpoint:
+			return
+		temporary = f"{self.checkpoint}.tmp"
+		with open(temporary, 'w', encoding='utf-8') as checkpoint:
+			json.dump({'acknowledged': self.acknowledged}, checkpoint)
+			checkpoint.flush()
+			os.fsync(checkpoint.fileno())
+		os.replace(temporary, self.checkpoint)
+
+	def upsert(self, identifier, value, body):
+		"""
+		method responsible for sending one record.
+
+		:return: `<rds_client.RDSJsonResponse>`.
+		"""
+		return self.client.upsert_contact_per_identifier(identifier, value, body)
+
+	def run(self, records):
+		"""
+		method responsible for upserting the records.
+
+		:param records: iterable of (identifier, value, body).
+		:return: generator of `<rds_client.pipeline.RDSUpsertOutcome>` in completion order.
+		"""
+		self.acknowledged = self.skipped = self.load_checkpoint()
+		self._started, self._finished = time.monotonic(), None
+		records = enumerate(records)
+		for _ in range(self.skipped):
+			if next(records, None) is None:
+				break
+		pending = {}
+		done_out_of_order = set()
+		last_checkpoint = self.acknowledged
+		executor = ThreadPoolExecutor(max_workers=self.max_workers)
+		try:
+			while True:
+				# the window is bounded by the oldest unacknowledged record
+				while len(pending) + len(done_out_of_order) < self.max_in_flight:
+					record = next(records, None)
+					if record is None:
+						break
+					index, (identifier, value, body) = record
+					future = executor.submit(self.upsert, identifier, value, body)
+					pending[future] = RDSUpsertOutcome(index, identifier, value)
+				if not pending:
+					break
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					outcome = pending.pop(future)
+					try:
+						outcome.response = future.result()
+						self.succeeded += 1
+					except Exception as error: # pylint: disable=broad-except
+						outcome.error = error
+						self.failed += 1
+					done_out_of_order.add(outcome.index)
+					yield outcome
+				while self.acknowledged in done_out_of_order:
+					done_out_of_order.remove(self.acknowledged)
+					self.acknowledged += 1
+				if self.acknowledged - last_checkpoint >= self.checkpoint_every:
+					self.save_checkpoint()
+					last_checkpoint = self.acknowledged
+		finally:
+			executor.shutdown(wait=False, cancel_futures=True)
+			self.save_checkpoint()
+			self._finished = time.monotonic()
+			LOG.info(self.stats())
+
+	def stats(self):
+		"""
+		method responsible for reporting the progress of the pipeline.
+
+		:return: dict with acknowledged, succeeded, failed, skipped, elapsed and
+		throughput in records per second.
+		"""
+		if self._started is None:
+			elapsed = 0.0
+		else:
+			elapsed = (self._finished or time.monotonic()) - self._started
+		processed = self.succeeded + self.failed
+		return {
+			'acknowledged': self.acknowledged,
+			'succeeded': self.succeeded,
+			'failed': self.failed,
+			'skipped': self.skipped,
+			'elapsed': elapsed,
+			'throughput': processed / elapsed if elapsed else 0.0
+		}
+
+
+# end-of-file
@@ -0,0 +1,175 @@
+""" Pool of clients of many RD Station accounts.
+
+Every account keeps its own client, with its own token manager and rate
+limiter, while all of them send their requests through a single
+`requests.Session`, whose connection pool is sized for the whole worker
+instead of holding idle sockets per account, and renew their tokens through
+a single `RDSTokenScheduler` thread instead of a refresher thread each.
+
+ref: https://developers.rdstation.com/en/overview
+"""
+
+import logging
+import threading
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from ratelimit import RDSRateLimiter
+from rest_client import RDStationRestClient
+from tokens import RDSTokenScheduler
+
+
+LOG = logging.getLogger(__name__)
+
+
+class RDStationClientPool():
+	""" Clients of many accounts multiplexed over one http connection pool.
+
+	usage:
+		pool = RDStationClientPool(pool_maxsize=64, token_cache=RDSTokenCache('/var/cache/rdstation'))
+		for account_id, credentials in accounts.items():
+			pool.register(account_id, credentials)
+		contact = pool[account_id].get_contacts_by_email(email)
+		contact = pool.call(account_id, 'get_contacts_by_email', email)
+	"""
+
+	def __init__(self, pool_connections=10, pool_maxsize=32, pool_block=False, # pylint: disable=too-many-arguments
+	             rate_limiter_factory=None, **kwargs):
+		"""
+		:param pool_connections: number of hosts with a pool of connections.
+		:param pool_maxsize: connections kept open per host, shared by every account.
+		:param pool_block: wait for a free connection instead of opening an extra one.
+		:param rate_limiter_factory: callable(account_id) returning the rate limiter of an
+		account, a `<rds_client.ratelimit.RDSRateLimiter>` per account by default.
+		:param kwargs: arguments of `<rds_client.RDStationRestClient>` shared by every account,
+		`token_scheduler` defaults to a scheduler of the pool.
+		"""
+		self.scheduler = kwargs.pop('token_scheduler', None) or RDSTokenScheduler()
+		self.session = self.create_session(pool_connections, pool_maxsize, pool_block)
+		self.rate_limiter_factory = rate_limiter_factory or (lambda account_id: RDSRateLimiter())
+		self._kwargs = kwargs
+		self._clients = {}
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def create_session(pool_connections, pool_maxsize, pool_block):
+		"""
+		method responsible for creating the session shared by the accounts.
+
+		The adapter does not retry, the retry policy of the clients does.
+
+		:return: `<requests.Session>`.
+		"""
+		session = Session()
+		adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+		                      pool_block=pool_block, max_retries=0)
+		session.mount('https://', adapter)
+		session.mount('http://', adapter)
+		return session
+
+	def register(self, account_id, credentials, **kwargs):
+		"""
+		method responsible for adding an account to the pool.
+
+		:param account_id: identifier routing the calls to the account.
+		:param credentials: instance of `<rds_client.RDStationClient>`.
+		:param kwargs: arguments of `<rds_client.RDStationRestClient>` for this account, its
+		`account_id` keys the cached responses and tokens, the routing identifier by default.
+		:return: `<rds_client.RDStationRestClient>` of the account.
+		"""
+		options = {**self._kwargs, **kwargs}
+		options['session'] = self.session
+		options['token_scheduler'] = self.scheduler
+		options.setdefault('account_id', account_id)
+		if 'rate_limiter' not in options:
+			options['rate_limiter'] = self.rate_limiter_factory(account_id)
+		client = RDStationRestClient(credentials, **options)
+		with self._lock:
+			previous = self._clients.get(account_id)
+			self._clients[account_id] = client
+		if previous is not None:
+			previous.get_token_manager.stop()
+		return client
+
+	def unregister(self, account_id):
+		""" method responsible for removing an account from the pool. """
+		with self._lock:
+			client = self._clients.pop(account_id, None)
+		if client is not None:
+			client.get_token_manager.stop()
+
+	def __getitem__(self, account_id):
+		"""
+		:return: `<rds_client.RDStationRestClient>` of the account.
+		:raises KeyError: when the account was not registered.
+		"""
+		return self._clients[account_id]
+
+	def __contains__(self, account_id):
+		return account_id in self._clients
+
+	def __iter__(self):
+		return iter(list(self._clients))
+
+	def __len__(self):
+		return len(self._clients)
+
+	def call(self, account_id, method, *args, **kwargs):
+		"""
+		method responsible for routing a call to the client of an account.
+
+		:param account_id: identifier of the account.
+		:param method: name of the method of `<rds_client.RDStationRestClient>`.
+		:return: the result of the method.
+		"""
+		return getattr(self[account_id], method)(*args, **kwargs)
+
+	def connect(self):
+		""" method responsible for fetching the tokens of every account and starting their refreshers. """
+		for account_id in self:
+			try:
+				self[account_id].connect()
+			except Exception as error: # pylint: disable=broad-except
+				LOG.error(f"account {account_id} not connected: {error}")
+
+	def stats(self):
+		"""
+		method responsible for reporting the accounts of the pool.
+
+		:return: dict with the number of accounts, the hosts with open connections
+		and, per account, the rate limit buckets and the token expiry.
+		"""
+		adapter = self.session.get_adapter('https://')
+		accounts = {}
+		for account_id in self:
+			client = self._clients.get(account_id)
+			if client is None:
+				continue
+			limiter = client.get_rate_limiter
+			accounts[account_id] = {
+				'rate_limit': limiter.stats() if limiter is not None else None,
+				'expires_in': client.get_expires_in
+			}
+		return {
+			'accounts': len(self),
+			'hosts': len(adapter.poolmanager.pools),
+			'per_account': accounts
+		}
+
+	def close(self):
+		""" method responsible for stopping the token refreshers and closing the connections. """
+		with self._lock:
+			clients, self._clients = list(self._clients.values()), {}
+		for client in clients:
+			client.get_token_manager.stop()
+		self.scheduler.stop()
+		self.session.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.close()
+
+
+# end-of-file
@@ -0,0 +1,319 @@
+""" Client side rate limit for the limits declared in `settings.RDSTATION`.
+
+Each resource family (`contacts`, `events.lead`, `events.account`) gets a
+token bucket holding `max_requests` tokens refilled along `period` seconds.
+Blocking callers reserve a token ahead of time and sleep only until it is
+due, so the lock is never held while waiting. A family can also be drawn per
+key, e.g. `events.lead` per contact, each key getting a bucket of its own;
+the least recently used keys past `max_keys` are forgotten.
+
+:class:`RDSSharedRateLimiter` keeps the buckets in a SQLite file instead of
+the process memory, so every worker of the host draws from the same account
+wide budget. The buckets are keyed by account and family, the accounts
+sharing the file keep budgets of their own.
+
+ref: https://developers.rdstation.com/en/request-limit
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+
+import settings
+from exceptions import RDRateLimitExceeded
+
+
+def rate_limit_families(limits, prefix=''):
+	"""
+	method responsible for flattening the rate limit declarations of the settings.
+
+	:param limits: dict like `settings.RDSTATION`.
+	:return: dict of family name -> (max_requests, period).
+	"""
+	families = {}
+	for key, value in limits.items():
+		if not isinstance(value, dict):
+			continue
+		name = '.'.join((prefix, key)) if prefix else key
+		if 'max_requests' in value and 'period' in value:
+			families[name] = (value['max_requests'], value['period'])
+		else:
+			families.update(rate_limit_families(value, name))
+	return families
+
+
+class RDSTokenBucket():
+	""" Thread-safe token bucket with `max_requests` tokens per `period` seconds. """
+
+	def __init__(self, max_requests, period):
+		self.capacity = float(max_requests)
+		self.rate = max_requests / float(period)
+		self.acquired = 0
+		self.rejected = 0
+		self.waited = 0.0
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def take(self, tokens, elapsed, blocking=True, timeout=None):
+		"""
+		method responsible for refilling a bucket state and taking one token of it.
+
+		:param tokens: tokens of the bucket at its last update.
+		:param elapsed: seconds since the last update.
+		:return: tuple of (tokens left, delay), delay is None when not reserved.
+		"""
+		tokens = min(self.capacity, tokens + max(elapsed, 0.0) * self.rate)
+		delay = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+		if delay and (not blocking or (timeout is not None and delay > timeout)):
+			self.rejected += 1
+			return tokens, None
+		self.acquired += 1
+		self.waited += delay
+		return tokens - 1, delay
+
+	def reserve(self, blocking=True, timeout=None):
+		"""
+		method responsible for reserving one token of the bucket.
+
+		:param blocking: when False a token is only taken if available right now.
+		:param timeout: max seconds the caller accepts to wait for the token.
+		:return: seconds to wait before the token is due, or None when not reserved.
+		"""
+		with self._lock:
+			now = time.monotonic()
+			self._tokens, delay = self.take(
+				self._tokens, now - self._updated, blocking, timeout)
+			self._updated = now
+			return delay
+
+	@property
+	def tokens(self):
+		""" tokens currently available in the bucket """
+		with self._lock:
+			elapsed = time.monotonic() - self._updated
+			return min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class RDSRateLimiter():
+	""" Token buckets keyed by resource family, usable from threads and asyncio.
+
+	usage:
+		limiter = RDSRateLimiter()
+		waited = limiter.acquire('contacts')
+		waited = limiter.acquire('events.lead', key='contact@example.com')
+		waited = await limiter.acquire_async('events.account')
+	"""
+
+	def __init__(self, limits=None, max_keys=10000):
+		"""
+		:param limits: dict like `settings.RDSTATION`, the settings by default.
+		:param max_keys: keyed buckets kept, the least recently used are dropped past it.
+		"""
+		self._families = rate_limit_families(limits or settings.RDSTATION)
+		self._buckets = {
+			family: self.create_bucket(family, max_requests, period)
+			for family, (max_requests, period) in self._families.items()
+		}
+		self.max_keys = max_keys
+		self._keyed = OrderedDict()
+		self._keyed_lock = threading.Lock()
+
+	def create_bucket(self, family, max_requests, period): # pylint: disable=unused-argument
+		"""
+		method responsible for creating the bucket of a family.
+
+		:return: `<rds_client.ratelimit.RDSTokenBucket>`.
+		"""
+		return RDSTokenBucket(max_requests, period)
+
+	def bucket(self, family, key=None):
+		"""
+		bucket of the family, of the key within the family when given, None when
+		the family has no limit.
+		"""
+		if key is None or family not in self._families:
+			return self._buckets.get(family)
+		with self._keyed_lock:
+			bucket = self._keyed.get((family, key))
+			if bucket is not None:
+				self._keyed.move_to_end((family, key))
+				return bucket
+			max_requests, period = self._families[family]
+			bucket = self._keyed[(family, key)] = self.create_bucket(f'{family}:{key}', max_requests, period)
+			if len(self._keyed) > self.max_keys:
+				self._keyed.popitem(last=False)
+			return bucket
+
+	def _reserve(self, family, blocking, timeout, key=None):
+		bucket = self.bucket(family, key)
+		if bucket is None:
+			return 0.0
+		delay = bucket.reserve(blocking=blocking, timeout=timeout)
+		if delay is None:
+			raise RDRateLimitExceeded(f"rate limit of '{family}' exhausted.")
+		return delay
+
+	def acquire(self, family, blocking=True, timeout=None, key=None):
+		"""
+		method responsible for taking one request of the family budget.
+
+		:param family: resource family, e.g. `contacts`.
+		:param key: draws from the budget of the key within the family, e.g. a contact.
+		:param blocking: wait for the budget instead of failing.
+		:param timeout: max seconds to wait for the budget.
+		:raises RDRateLimitExceeded: when the budget could not be taken.
+		:return: seconds the caller waited.
+		"""
+		delay = self._reserve(family, blocking, timeout, key)
+		if delay:
+			time.sleep(delay)
+		return delay
+
+	async def acquire_async(self, family, blocking=True, timeout=None, key=None):
+		"""
+		coroutine version of :meth:`acquire`, waits without blocking the event loop.
+		"""
+		delay = self._reserve(family, blocking, timeout, key)
+		if delay:
+			await asyncio.sleep(delay)
+		return delay
+
+	def try_acquire(self, family, key=None):
+		"""
+		method responsible for taking one request of the family budget if available now.
+
+		:return: True when the request may be sent.
+		"""
+		try:
+			self._reserve(family, False, None, key)
+		except RDRateLimitExceeded:
+			return False
+		return True
+
+	def stats(self):
+		"""
+		method responsible for reporting the usage of every family.
+
+		:return: dict of family -> dict(acquired, rejected, waited, tokens), the
+		keyed buckets aside.
+		"""
+		return {
+			family: {
+				'acquired': bucket.acquired,
+				'rejected': bucket.rejected,
+				'waited': bucket.waited,
+				'tokens': bucket.tokens
+			} for family, bucket in self._buckets.items()
+		}
+
+
+class RDSSharedTokenBucket(RDSTokenBucket):
+	""" Token bucket stored in a SQLite database shared by the processes of the host. """
+
+	def __init__(self, path, account, family, max_requests, period): # pylint: disable=too-many-arguments
+		super(RDSSharedTokenBucket, self).__init__(max_requests, period)
+		self.path = path
+		self.account = str(account)
+		self.family = family
+		self._local = threading.local()
+		now = time.time()
+		with self._connection() as connection:
+			if ':' in family:
+				# a key idle for a whole period is back to full, its row goes without losing budget
+				connection.execute(
+					"DELETE FROM rate_limits WHERE account = ? AND family LIKE ? AND updated < ?",
+					(self.account, family.split(':', 1)[0] + ':%', now - period))
+			connection.execute(
+				"INSERT OR IGNORE INTO rate_limits (account, family, tokens, updated) VALUES (?, ?, ?, ?)",
+				(self.account, family, self.capacity, now))
+
+	def _connection(self):
+		# sqlite connections can not cross threads nor forks
+		connection = getattr(self._local, 'connection', None)
+		if connection is None or self._local.pid != os.getpid():
+			connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+			connection.execute("PRAGMA journal_mode=WAL")
+			connection.execute(
+				"CREATE TABLE IF NOT EXISTS rate_limits (account TEXT NOT NULL, family TEXT NOT NULL, "
+				"tokens REAL NOT NULL, updated REAL NOT NULL, PRIMARY KEY (account, family))")
+			self._local.connection = connection
+			self._local.pid = os.getpid()
+		return _SQLiteTransaction(connection)
+
+	def reserve(self, blocking=True, timeout=None):
+		with self._lock, self._connection() as connection:
+			tokens, updated = connection.execute(
+				"SELECT tokens, updated FROM rate_limits WHERE account = ? AND family = ?",
+				(self.account, self.family)).fetchone()
+			now = time.time()
+			tokens, delay = self.take(tokens, now - updated, blocking, timeout)
+			connection.execute(
+				"UPDATE rate_limits SET tokens = ?, updated = ? WHERE account = ? AND family = ?",
+				(tokens, max(now, updated), self.account, self.family))
+			return delay
+
+	@property
+	def tokens(self):
+		with self._lock, self._connection() as connection:
+			tokens, updated = connection.execute(
+				"SELECT tokens, updated FROM rate_limits WHERE account = ? AND family = ?",
+				(self.account, self.family)).fetchone()
+		return min(self.capacity, tokens + max(time.time() - updated, 0.0) * self.rate)
+
+
+class _SQLiteTransaction():
+	""" `BEGIN IMMEDIATE` transaction, serializing the writers of every process. """
+
+	def __init__(self, connection):
+		self.connection = connection
+
+	def __enter__(self):
+		self.connection.execute("BEGIN IMMEDIATE")
+		return self.connection
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class RDSSharedRateLimiter(RDSRateLimiter):
+	""" Rate limiter whose budget is shared by all the processes of the host.
+
+	usage:
+		limiter = RDSSharedRateLimiter('/var/run/rdstation/ratelimit.db', account_id)
+		client = RDStationRestClient(credentials, rate_limiter=limiter)
+
+		pool = RDStationClientPool(rate_limiter_factory=lambda account_id: RDSSharedRateLimiter(
+			'/var/run/rdstation/ratelimit.db', account_id))
+
+	SQLite state must not cross a fork: each worker process creates its limiter
+	after it was forked, or the workers are spawned.
+	"""
+
+	def __init__(self, path, account, limits=None, max_keys=10000):
+		"""
+		:param path: SQLite file shared by the processes.
+		:param account: identifier of the RD Station account whose budget is drawn.
+		"""
+		self.path = path
+		self.account = account
+		super(RDSSharedRateLimiter, self).__init__(limits, max_keys)
+
+	def create_bucket(self, family, max_requests, period):
+		return RDSSharedTokenBucket(self.path, self.account, family, max_requests, period)
+
+	async def acquire_async(self, family, blocking=True, timeout=None, key=None):
+		"""
+		coroutine version of :meth:`acquire`, the SQLite transaction, which may
+		wait on the other processes, runs in a thread off the event loop.
+		"""
+		delay = await asyncio.to_thread(self._reserve, family, blocking, timeout, key)
+		if delay:
+			await asyncio.sleep(delay)
+		return delay
+
+
+# end-of-file
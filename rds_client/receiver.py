@@ -0,0 +1,499 @@
+""" Receiver of the webhooks RD Station delivers.
+
+An asyncio http server, with no dependency besides the standard library,
+receiving the `WEBHOOK.CONVERTED` and `WEBHOOK.MARKED_OPPORTUNITY` POSTs of
+the subscriptions of `resources/webhook.py`. Each delivery is parsed into
+typed contact records, put in a bounded queue and acknowledged right away;
+a fixed number of workers run the handler on the queued records. When the
+queue is full the delivery is answered with 503, so RD Station retries it
+later instead of the receiver buffering without bound.
+
+The payloads of both formats are accepted: the `{"leads": [...]}` one of the
+RD Station webhooks and the `{"event_type", "contact"}` one.
+
+ref: https://developers.rdstation.com/en/reference/webhooks
+"""
+
+import time
+import asyncio
+import logging
+from http import HTTPStatus
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+from codec import CODEC
+
+
+LOG = logging.getLogger(__name__)
+
+WEBHOOK_CONVERTED = 'WEBHOOK.CONVERTED'
+WEBHOOK_MARKED_OPPORTUNITY = 'WEBHOOK.MARKED_OPPORTUNITY'
+
+_CRLF = b'\r\n'
+
+
+@dataclass(slots=True)
+class RDSWebhookContact:
+	""" Contact delivered by a webhook, with the event that triggered the delivery. """
+
+	uuid: str
+	email: str
+	event_type: str = field(default=None)
+	event_identifier: str = field(default=None)
+	timestamp: str = field(default=None)
+	name: str = field(default=None)
+	company: str = field(default=None)
+	job_title: str = field(default=None)
+	lifecycle_stage: str = field(default=None)
+	opportunity: bool = field(default=None)
+	fit_score: str = field(default=None)
+	interest: int = field(default=None)
+	tags: list = field(default_factory=list)
+	custom_fields: dict = field(default_factory=dict)
+	received_at: float = field(default=None)
+	payload: dict = field(default=None, repr=False)
+
+
+def to_bool(value):
+	""" boolean of the 'true'/'false' strings of the payloads """
+	if value is None or isinstance(value, bool):
+		return value
+	return str(value).lower() == 'true'
+
+
+def to_dict(value):
+	""" the nested objects of the payloads, an empty dict when of another type """
+	return value if isinstance(value, dict) else {}
+
+
+def to_int(value):
+	""" integer of the numeric strings of the payloads, None when not numeric """
+	try:
+		return int(value)
+	except (TypeError, ValueError):
+		return None
+
+
+def parse_lead(lead, event_type=None, received_at=None):
+	"""
+	method responsible for parsing a lead of the `{"leads": [...]}` payloads.
+
+	:param lead: dict of the lead.
+	:param event_type: event of the subscription delivering the payload.
+	:return: `<rds_client.receiver.RDSWebhookContact>`.
+	"""
+	conversion = to_dict(lead.get('last_conversion'))
+	timestamp = conversion.get('created_at')
+	if event_type == WEBHOOK_MARKED_OPPORTUNITY:
+		timestamp = lead.get('last_marked_opportunity_date') or timestamp
+	return RDSWebhookContact(
+		uuid=lead.get('uuid'),
+		email=lead.get('email'),
+		event_type=event_type,
+		event_identifier=to_dict(conversion.get('content')).get('identificador'),
+		timestamp=timestamp,
+		name=lead.get('name'),
+		company=lead.get('company'),
+		job_title=lead.get('job_title'),
+		lifecycle_stage=lead.get('lead_stage'),
+		opportunity=to_bool(lead.get('opportunity')),
+		fit_score=lead.get('fit_score'),
+		interest=to_int(lead.get('interest')),
+		tags=lead.get('tags') or [],
+		custom_fields=lead.get('custom_fields') or {},
+		received_at=received_at,
+		payload=lead
+	)
+
+
+def parse_contact(payload, event_type=None, received_at=None):
+	"""
+	method responsible for parsing the `{"event_type", "contact"}` payloads.
+
+	:param payload: dict of the delivery.
+	:param event_type: event of the subscription, when the payload has none.
+	:return: `<rds_client.receiver.RDSWebhookContact>`.
+	"""
+	contact = payload['contact']
+	funnel = to_dict(contact.get('contact_funnel'))
+	company = contact.get('company')
+	return RDSWebhookContact(
+		uuid=contact.get('uuid'),
+		email=contact.get('email'),
+		event_type=payload.get('event_type') or event_type,
+		event_identifier=payload.get('event_identifier'),
+		timestamp=payload.get('event_timestamp') or payload.get('timestamp'),
+		name=contact.get('name'),
+		company=company.get('name') if isinstance(company, dict) else company,
+		job_title=contact.get('job_title'),
+		lifecycle_stage=funnel.get('lifecycle_stage'),
+		opportunity=to_bool(funnel.get('opportunity')),
+		fit_score=funnel.get('fit'),
+		interest=to_int(funnel.get('interest')),
+		tags=contact.get('tags') or [],
+		custom_fields={key: value for key, value in contact.items() if key.startswith('cf_')},
+		received_at=received_at,
+		payload=payload
+	)
+
+
+def parse_webhook(payload, event_type=None, received_at=None):
+	"""
+	method responsible for parsing a webhook delivery into contact records.
+
+	:param payload: decoded body of the delivery.
+	:param event_type: event of the subscription delivering the payload.
+	:return: list of `<rds_client.receiver.RDSWebhookContact>`.
+	:raises ValueError: when the payload is not a webhook delivery.
+	"""
+	if not isinstance(payload, dict):
+		raise ValueError("webhook payload must be an object.")
+	if isinstance(payload.get('leads'), list):
+		records = [parse_lead(lead, event_type, received_at)
+		           for lead in payload['leads'] if isinstance(lead, dict)]
+	elif isinstance(payload.get('contact'), dict):
+		records = [parse_contact(payload, event_type, received_at)]
+	else:
+		raise ValueError("webhook payload has no leads nor contact.")
+	if not records or any(record.uuid is None and record.email is None for record in records):
+		raise ValueError("webhook contact has no uuid nor email.")
+	return records
+
+
+def http_response(status, body=b'', close=False, headers=None):
+	"""
+	method responsible for encoding an http response.
+
+	:return: bytes of the response.
+	"""
+	status = HTTPStatus(status)
+	lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(body)}"]
+	lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+	if close:
+		lines.append("Connection: close")
+	return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+
+class RDSHttpError(Exception):
+	""" Request answered with an error status by the receiver. """
+
+	def __init__(self, status, close=False):
+		super().__init__(HTTPStatus(status).phrase)
+		self.status = status
+		self.close = close
+
+
+class RDSWebhookReceiver():
+	""" asyncio server receiving webhooks and handing them to a pool of workers.
+
+	usage:
+		def handler(contact):
+			crm.upsert(contact.email, contact.lifecycle_stage)
+
+		receiver = RDSWebhookReceiver(handler, port=8080, workers=16, routes={
+			'/webhooks/converted': WEBHOOK_CONVERTED,
+			'/webhooks/opportunity': WEBHOOK_MARKED_OPPORTUNITY
+		})
+		receiver.run()
+
+	within a running loop:
+		async with RDSWebhookReceiver(async_handler, port=8080) as receiver:
+			await receiver.serve_forever()
+	"""
+
+	def __init__(self, handler, host='127.0.0.1', port=8080, routes=None, workers=8, # pylint: disable=too-many-arguments
+	             max_queue=10000, max_body=1024 * 1024, metrics_path='/metrics', on_error=None,
+	             dedup=None, codec=CODEC):
+		"""
+		:param handler: callable(contact), or coroutine function, run for each received
+		`<rds_client.receiver.RDSWebhookContact>`. Plain callables run in a thread pool of
+		`workers` threads.
+		:param host: address listened on, the loopback by default; '0.0.0.0' exposes the
+		receiver on every interface, e.g. when it is not behind a reverse proxy.
+		:param routes: dict of path -> event type of the subscriptions pointing to it,
+		`{'/webhooks': None}` by default.
+		:param workers: number of records handled concurrently.
+		:param max_queue: records waiting for a worker before the deliveries are refused.
+		:param max_body: largest accepted body, in bytes.
+		:param metrics_path: path answering the `stats` as json on GET, None to disable it.
+		:param on_error: callable(contact, error) called when the handler fails.
+		:param dedup: `<rds_client.dedup.RDSDedup>` dropping the deliveries already received,
+		which are still acknowledged.
+		"""
+		self.handler = handler
+		self.host = host
+		self.port = port
+		self.routes = routes or {'/webhooks': None}
+		self.workers = workers
+		self.max_queue = max_queue
+		self.max_body = max_body
+		self.metrics_path = metrics_path
+		self.on_error = on_error
+		self.dedup = dedup
+		self.codec = codec
+		self.requests = 0
+		self.accepted = 0
+		self.rejected = 0
+		self.overflowed = 0
+		self.duplicates = 0
+		self.handled = 0
+		self.failed = 0
+		self.connections = 0
+		self.queue_peak = 0
+		self.handler_seconds = 0.0
+		self._server = None
+		self._closing = False
+		self._writers = set()
+		self._queue = None
+		self._tasks = []
+		self._executor = None
+		self._started = None
+		self._coroutine = asyncio.iscoroutinefunction(handler)
+		self._ok = http_response(200)
+		self._ok_close = http_response(200, close=True)
+		self._busy = http_response(503, headers={'Retry-After': 1})
+
+	@property
+	def address(self):
+		""" (host, port) the server listens on """
+		if self._server is None:
+			return None
+		return self._server.sockets[0].getsockname()[:2]
+
+	async def start(self):
+		""" method responsible for listening and starting the workers. """
+		if self._server is not None:
+			return
+		self._queue = asyncio.Queue(self.max_queue)
+		self._closing = False
+		if not self._coroutine:
+			self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='rds-webhook')
+		self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+		self._server = await asyncio.start_server(self._connection, self.host, self.port)
+		self._started = time.monotonic()
+		LOG.info(f"webhook receiver listening on {self.address}")
+
+	async def serve_forever(self):
+		""" method responsible for serving until cancelled. """
+		await self.start()
+		await self._server.serve_forever()
+
+	async def stop(self, timeout=10.0):
+		"""
+		method responsible for refusing new deliveries and draining the queue.
+
+		:param timeout: seconds waited for the queued records to be handled.
+		"""
+		if self._server is None:
+			return
+		self._closing = True
+		self._server.close()
+		for writer in list(self._writers):
+			writer.close()
+		try:
+			await asyncio.wait_for(self._queue.join(), timeout)
+		except asyncio.TimeoutError:
+			LOG.warning(f"webhook receiver stopped with {self._queue.qsize()} records not handled.")
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		if self._executor is not None:
+			self._executor.shutdown(wait=True)
+		if self.dedup is not None:
+			self.dedup.close()
+		self._server = self._executor = None
+		self._tasks = []
+
+	def run(self):
+		""" method responsible for serving in a new event loop until interrupted. """
+		async def serve():
+			try:
+				await self.serve_forever()
+			finally:
+				await self.stop()
+		try:
+			asyncio.run(serve())
+		except KeyboardInterrupt:
+			LOG.info("webhook receiver interrupted.")
+
+	async def __aenter__(self):
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_val, exc_tb):
+		await self.stop()
+
+	def stats(self):
+		"""
+		method responsible for reporting the activity of the receiver.
+
+		:return: dict with the counters of requests and records, the queue and the handler time.
+		"""
+		uptime = time.monotonic() - self._started if self._started else 0.0
+		handled = self.handled + self.failed
+		return {
+			'uptime': uptime,
+			'connections': self.connections,
+			'requests': self.requests,
+			'requests_per_second': self.requests / uptime if uptime else 0.0,
+			'accepted': self.accepted,
+			'rejected': self.rejected,
+			'overflowed': self.overflowed,
+			'duplicates': self.duplicates,
+			'handled': self.handled,
+			'failed': self.failed,
+			'queued': self._queue.qsize() if self._queue is not None else 0,
+			'queue_peak': self.queue_peak,
+			'max_queue': self.max_queue,
+			'workers': self.workers,
+			'handler_mean_ms': self.handler_seconds / handled * 1000 if handled else 0.0,
+			'dedup': self.dedup.stats() if self.dedup is not None else None
+		}
+
+	async def _connection(self, reader, writer):
+		self.connections += 1
+		self._writers.add(writer)
+		try:
+			while True:
+				try:
+					response, close = await self._request(reader, writer)
+				except RDSHttpError as error:
+					self.rejected += 1
+					response, close = http_response(error.status, close=error.close), error.close
+				except (asyncio.IncompleteReadError, ConnectionError):
+					return
+				writer.write(response)
+				if close:
+					await writer.drain()
+					return
+				# drains only when the socket buffer is filling up
+				if writer.transport.get_write_buffer_size() > 65536:
+					await writer.drain()
+		finally:
+			self.connections -= 1
+			self._writers.discard(writer)
+			writer.close()
+
+	async def _request(self, reader, writer):
+		try:
+			head = await reader.readuntil(b'\r\n\r\n')
+		except asyncio.LimitOverrunError as error:
+			raise RDSHttpError(431, close=True) from error
+		self.requests += 1
+		lines = head.decode('latin-1').split('\r\n')
+		try:
+			method, target, version = lines[0].split(' ', 2)
+		except ValueError as error:
+			raise RDSHttpError(400, close=True) from error
+		headers = {}
+		for line in lines[1:]:
+			if line:
+				name, _, value = line.partition(':')
+				headers[name.strip().lower()] = value.strip()
+		connection = headers.get('connection', '').lower()
+		close = connection == 'close' or (version != 'HTTP/1.1' and connection != 'keep-alive')
+		path = target.split('?', 1)[0]
+		if method == 'GET' and path == self.metrics_path:
+			return http_response(200, self.codec.dumps(self.stats()), close,
+			                     {'Content-Type': 'application/json'}), close
+		if path not in self.routes:
+			await self._read_body(reader, writer, headers)
+			raise RDSHttpError(404, close)
+		if method != 'POST':
+			await self._read_body(reader, writer, headers)
+			raise RDSHttpError(405, close)
+		body = await self._read_body(reader, writer, headers)
+		return self._accept(path, body, close), close
+
+	async def _read_body(self, reader, writer, headers):
+		if headers.get('expect', '').lower() == '100-continue':
+			writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+		if 'chunked' in headers.get('transfer-encoding', '').lower():
+			return await self._read_chunked(reader)
+		try:
+			length = int(headers.get('content-length', 0))
+		except ValueError as error:
+			raise RDSHttpError(400, close=True) from error
+		if length > self.max_body:
+			raise RDSHttpError(413, close=True)
+		return await reader.readexactly(length) if length else b''
+
+	async def _read_chunked(self, reader):
+		try:
+			return await self._read_chunks(reader)
+		except asyncio.LimitOverrunError as error:
+			# a chunk size or trailer line longer than the stream buffer
+			raise RDSHttpError(400, close=True) from error
+		except asyncio.IncompleteReadError as error:
+			# the body ended before its last chunk
+			raise RDSHttpError(400, close=True) from error
+
+	async def _read_chunks(self, reader):
+		body = bytearray()
+		while True:
+			line = await reader.readuntil(_CRLF)
+			try:
+				size = int(line.split(b';', 1)[0], 16)
+			except ValueError as error:
+				raise RDSHttpError(400, close=True) from error
+			if size < 0:
+				raise RDSHttpError(400, close=True)
+			if size == 0:
+				# trailers, up to the empty line, counted in the body limit
+				trailers = 0
+				while (line := await reader.readuntil(_CRLF)) != _CRLF:
+					trailers += len(line)
+					if len(body) + trailers > self.max_body:
+						raise RDSHttpError(413, close=True)
+				return bytes(body)
+			if len(body) + size > self.max_body:
+				raise RDSHttpError(413, close=True)
+			body += await reader.readexactly(size)
+			if await reader.readexactly(2) != _CRLF:
+				raise RDSHttpError(400, close=True)
+
+	def _accept(self, path, body, close):
+		try:
+			records = parse_webhook(self.codec.loads(body), self.routes[path], time.time())
+		except ValueError as error:
+			LOG.warning(f"webhook delivery rejected: {error}")
+			raise RDSHttpError(400, close) from error
+		queue = self._queue
+		if self._closing or queue.maxsize - queue.qsize() < len(records):
+			self.overflowed += len(records)
+			return self._busy
+		if self.dedup is not None:
+			fresh = [record for record in records if not self.dedup.seen_contact(record)]
+			self.duplicates += len(records) - len(fresh)
+			records = fresh
+		for record in records:
+			queue.put_nowait(record)
+		self.accepted += len(records)
+		self.queue_peak = max(self.queue_peak, queue.qsize())
+		return self._ok_close if close else self._ok
+
+	async def _work(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			record = await self._queue.get()
+			started = time.perf_counter()
+			try:
+				if self._coroutine:
+					await self.handler(record)
+				else:
+					await loop.run_in_executor(self._executor, self.handler, record)
+				self.handled += 1
+			except Exception as error: # pylint: disable=broad-except
+				self.failed += 1
+				LOG.error(f"webhook handler failed for {record.uuid or record.email}: {error}")
+				if self.on_error is not None:
+					try:
+						self.on_error(record, error)
+					except Exception as callback_error: # pylint: disable=broad-except
+						LOG.error(f"webhook on_error failed for {record.uuid or record.email}: {callback_error}")
+			finally:
+				self.handler_seconds += time.perf_counter() - started
+				self._queue.task_done()
+
+
+# end-of-file
@@ -0,0 +1,246 @@
+""" Declarative reconciliation of the webhook subscriptions of an account.
+
+The subscriptions the account should have are declared once; the reconciler
+fetches the current ones in a single call to `RDDWebhooksReceiver`, computes
+the smallest set of creations, updates and deletions turning one into the
+other and applies it concurrently. Reconciling an account already in the
+declared state costs that single call.
+
+Subscriptions are the same when their event type, event identifiers, url
+and included relations are the same. A current subscription differing from
+a declared one only in its identifiers, relations or http method is updated
+in place rather than deleted and created again, and the duplicates of a
+declared subscription are deleted.
+
+ref: https://developers.rdstation.com/en/reference/webhooks
+"""
+
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+
+LOG = logging.getLogger(__name__)
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+
+@dataclass(frozen=True)
+class RDSWebhookSubscription:
+	""" Webhook subscription, as declared or as returned by the api. """
+
+	event_type: str
+	url: str
+	event_identifiers: tuple = field(default=())
+	include_relations: tuple = field(default=())
+	entity_type: str = field(default='CONTACT')
+	http_method: str = field(default='POST')
+	uuid: str = field(default=None, compare=False)
+
+	@classmethod
+	def from_api(cls, webhook):
+		"""
+		:param webhook: dict of a subscription of the `webhooks` list.
+		:return: `<rds_client.reconciler.RDSWebhookSubscription>`.
+		"""
+		return cls(
+			event_type=webhook.get('event_type'),
+			url=webhook.get('url'),
+			event_identifiers=tuple(webhook.get('event_identifiers') or ()),
+			include_relations=tuple(webhook.get('include_relations') or ()),
+			entity_type=webhook.get('entity_type') or 'CONTACT',
+			http_method=webhook.get('http_method') or 'POST',
+			uuid=webhook.get('uuid')
+		)
+
+	@property
+	def key(self):
+		""" identity of the subscription, the order of the lists aside """
+		return (self.event_type, tuple(sorted(self.event_identifiers)), self.url,
+		        tuple(sorted(self.include_relations)))
+
+	def body(self):
+		""" request body of the subscription """
+		return {
+			'entity_type': self.entity_type,
+			'event_type': self.event_type,
+			'event_identifiers': list(self.event_identifiers),
+			'url': self.url,
+			'http_method': self.http_method,
+			'include_relations': list(self.include_relations)
+		}
+
+
+@dataclass
+class RDSReconcileAction:
+	""" Call of a reconciliation, with its outcome once applied. """
+
+	action: str
+	subscription: RDSWebhookSubscription
+	uuid: str = field(default=None)
+	response: object = field(default=None)
+	error: Exception = field(default=None)
+
+	@property
+	def ok(self):
+		""" True when the call succeeded """
+		return self.error is None
+
+
+@dataclass
+class RDSReconcilePlan:
+	""" Calls turning the current subscriptions into the declared ones. """
+
+	create: list = field(default_factory=list)
+	update: list = field(default_factory=list)
+	delete: list = field(default_factory=list)
+	keep: list = field(default_factory=list)
+
+	@property
+	def actions(self):
+		""" the calls of the plan, creations and updates first """
+		return self.create + self.update + self.delete
+
+	@property
+	def empty(self):
+		""" True when the account is already in the declared state """
+		return not self.actions
+
+	def summary(self):
+		""" counts of the plan """
+		return {
+			'create': len(self.create),
+			'update': len(self.update),
+			'delete': len(self.delete),
+			'keep': len(self.keep)
+		}
+
+
+class RDSWebhookReconciler():
+	""" Reconciler of the webhook subscriptions of an account.
+
+	usage:
+		reconciler = RDSWebhookReconciler(client)
+		plan = reconciler.reconcile([
+			RDSWebhookSubscription('WEBHOOK.CONVERTED', 'https://hooks.example.com/converted',
+			                       event_identifiers=('newsletter',)),
+			RDSWebhookSubscription('WEBHOOK.MARKED_OPPORTUNITY', 'https://hooks.example.com/opportunity',
+			                       include_relations=('COMPANY', 'CONTACT_FUNNEL'))
+		])
+		for action in plan.actions:
+			if not action.ok:
+				LOG.error(f"{action.action} {action.subscription.url}: {action.error}")
+	"""
+
+	def __init__(self, client, max_workers=4, prune=True):
+		"""
+		:param client: instance of `<rds_client.RDStationRestClient>`.
+		:param max_workers: calls applied concurrently.
+		:param prune: deletes the current subscriptions not declared, only the
+		declared ones are created or updated otherwise.
+		"""
+		self.client = client
+		self.max_workers = max_workers
+		self.prune = prune
+
+	def fetch(self):
+		"""
+		method responsible for listing the current subscriptions, in one call.
+
+		:return: list of `<rds_client.reconciler.RDSWebhookSubscription>`.
+		"""
+		response = self.client.receive_webhook()
+		return [RDSWebhookSubscription.from_api(webhook) for webhook in response.get('webhooks') or []]
+
+	def plan(self, desired, current):
+		"""
+		method responsible for computing the calls turning `current` into `desired`.
+
+		:param desired: iterable of `<rds_client.reconciler.RDSWebhookSubscription>`.
+		:param current: list of `<rds_client.reconciler.RDSWebhookSubscription>` of the account.
+		:return: `<rds_client.reconciler.RDSReconcilePlan>`.
+		"""
+		plan = RDSReconcilePlan()
+		declared = {}
+		for subscription in desired:
+			declared.setdefault(subscription.key, subscription)
+		existing = {}
+		for subscription in current:
+			existing.setdefault(subscription.key, []).append(subscription)
+		missing = []
+		for key, subscription in declared.items():
+			matches = existing.pop(key, [])
+			if not matches:
+				missing.append(subscription)
+				continue
+			kept, duplicates = matches[0], matches[1:]
+			if (kept.entity_type, kept.http_method) != (subscription.entity_type, subscription.http_method):
+				plan.update.append(RDSReconcileAction(UPDATE, subscription, kept.uuid))
+			else:
+				plan.keep.append(kept)
+			plan.delete += [RDSReconcileAction(DELETE, duplicate, duplicate.uuid) for duplicate in duplicates]
+		# the leftovers of the same event and url are updated in place
+		leftovers = {}
+		for matches in existing.values():
+			for subscription in matches:
+				leftovers.setdefault((subscription.event_type, subscription.url), []).append(subscription)
+		for subscription in missing:
+			candidates = leftovers.get((subscription.event_type, subscription.url))
+			if candidates:
+				plan.update.append(RDSReconcileAction(UPDATE, subscription, candidates.pop(0).uuid))
+			else:
+				plan.create.append(RDSReconcileAction(CREATE, subscription))
+		if self.prune:
+			plan.delete += [
+				RDSReconcileAction(DELETE, subscription, subscription.uuid)
+				for candidates in leftovers.values() for subscription in candidates
+			]
+		return plan
+
+	def apply(self, plan):
+		"""
+		method responsible for applying the calls of a plan concurrently.
+
+		The creations and updates are applied before the deletions, so no event
+		goes without a subscription while the plan is applied.
+
+		:param plan: `<rds_client.reconciler.RDSReconcilePlan>`.
+		:return: the plan, with the outcome of each call.
+		"""
+		with ThreadPoolExecutor(self.max_workers) as executor:
+			list(executor.map(self._apply, plan.create + plan.update))
+			list(executor.map(self._apply, plan.delete))
+		failed = sum(not action.ok for action in plan.actions)
+		LOG.info(f"webhooks reconciled: {plan.summary()}, failed: {failed}")
+		return plan
+
+	def reconcile(self, desired, dry_run=False):
+		"""
+		method responsible for bringing the subscriptions of the account to `desired`.
+
+		:param desired: iterable of `<rds_client.reconciler.RDSWebhookSubscription>`.
+		:param dry_run: computes the plan without applying it.
+		:return: `<rds_client.reconciler.RDSReconcilePlan>`.
+		"""
+		plan = self.plan(desired, self.fetch())
+		if dry_run or plan.empty:
+			return plan
+		return self.apply(plan)
+
+	def _apply(self, action):
+		try:
+			if action.action == CREATE:
+				action.response = self.client.create_webhook(action.subscription.body())
+			elif action.action == UPDATE:
+				action.response = self.client.update_webhook_by_uuid(action.uuid, action.subscription.body())
+			else:
+				action.response = self.client.delete_webhook(action.uuid)
+		except Exception as error: # pylint: disable=broad-except
+			action.error = error
+			LOG.error(f"webhook {action.action} of {action.subscription.url} failed: {error}")
+		return action
+
+
+# end-of-file
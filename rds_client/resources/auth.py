@@ -7,6 +7,8 @@ class RDAuthenticationResource(RDStationResource):
 	ref: https://api.rd.services/auth/token
 	"""
 	path = 'auth'
+	circuit = 'auth'
+	authenticated = False
 
 	def __init__(self, client):
 		super(RDAuthenticationResource, self).__init__(client)
@@ -63,8 +65,9 @@ class RDRefreshExpiredToken(RDAuthenticationResource):
 	"""
 	Every access_token is temporary, and its expiration time is defined by
 	the expires_in attribute in seconds, which is 86400 seconds (24 hours).
+	The refresh token is exchanged for a new access token at `auth/token`.
 	"""
-	path = "/".join((RDAuthenticationResource.path, "revoke"))
+	path = "/".join((RDAuthenticationResource.path, "token"))
 
 	def __call__(self, client_id, client_secret, refresh_token, **kwargs):
 		"""
@@ -91,10 +94,10 @@ class RDRefreshExpiredToken(RDAuthenticationResource):
 		    "client_secret": client_secret,
 		    "refresh_token": refresh_token
 		}
-		return self._post(self, data, **kwargs)
+		return self._post(data, **kwargs)
 
 	def _post(self, data, **kwargs):
-		return self.send_response("POST", data=data, **kwargs)
+		return self.send_request("POST", data=data, **kwargs)
 
 
 class RDRevokingAcessToken(RDAuthenticationResource):
@@ -103,11 +106,14 @@ class RDRevokingAcessToken(RDAuthenticationResource):
 	API key is a token that must be sent via Query String using the api_key parameter
 	"""
 
-	def __call__(self, client_id, **kwargs):
+	path = "/".join((RDAuthenticationResource.path, "revoke"))
+	authenticated = True
+
+	def __call__(self, client_id, client_secret, token=None, **kwargs):
 		"""
 		:param client_id: type: String Cliente
 		:param client_secret: type: String Secret of client
-		:param token_type_hint: type: token para atualização
+		:param token: type: String refresh token to revoke
 		:return: json response
 		{
 			"access_token":"eyJ0eXAiOiJKV1QiLCJhbGciOiJSUzI1NiIsImtpZCI6Ik5UZ3hRamM1UWpKR1FUUkNPRVE0UVRZeFJF"
@@ -128,10 +134,12 @@ class RDRevokingAcessToken(RDAuthenticationResource):
 		    "client_secret": client_secret,
 		    "token_type_hint": "refresh_token"
 		}
-		return self._post(self, data, **kwargs)
+		if token is not None:
+			data["token"] = token
+		return self._post(data, **kwargs)
 
 	def _post(self, data, **kwargs):
-		return self.send_response("POST", data=data, **kwargs)
+		return self.send_request("POST", data=data, **kwargs)
 
 
 # end-of-file
\ No newline at end of file
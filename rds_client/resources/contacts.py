@@ -13,7 +13,10 @@ class RDContactsResource(RDStationResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = 'plataform'
+	path = 'platform'
+	rate_limit = 'contacts'
+	circuit = 'contacts'
+	cache = 'contacts'
 
 	def __init__(self, client):
 		super(RDContactsResource, self).__init__(client)
@@ -29,7 +32,7 @@ class RDContactsUUID(RDContactsResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDContactsResource.path, "plataform", "contacts"))
+	path = "/".join((RDContactsResource.path, "contacts", "{uuid}"))
 
 	def __call__(self, uuid, **kwargs):
 		"""
@@ -59,13 +62,10 @@ class RDContactsUUID(RDContactsResource):
 		  ]
 		}
 		"""
-		# set uuid
-		RDContactsUUID.url = "/".join((RDContactsUUID.path, uuid))
-		
-		return self._get(self, **kwargs)
+		return self._get(route_params={'uuid': uuid}, **kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDContactsEmail(RDContactsResource):
@@ -74,7 +74,7 @@ class RDContactsEmail(RDContactsResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDContactsResource.path, "plataform", "contacts"))
+	path = "/".join((RDContactsResource.path, "contacts", "email:{email}"))
 
 	def __call__(self, email, **kwargs):
 		"""
@@ -104,13 +104,10 @@ class RDContactsEmail(RDContactsResource):
 		  ]
 		}
 		"""
-		# set email
-		RDContactsEmail.url = "/".join((RDContactsEmail.path, f'email:{email}'))
-
-		return self._get(self, **kwargs)
+		return self._get(route_params={'email': email}, **kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDUpdateContactPerUUID(RDContactsResource):
@@ -119,7 +116,7 @@ class RDUpdateContactPerUUID(RDContactsResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDContactsResource.path, "plataform", "contacts"))
+	path = "/".join((RDContactsResource.path, "contacts", "{uuid}"))
 
 	def __call__(self, uuid, body, **kwargs):
 		"""
@@ -150,13 +147,10 @@ class RDUpdateContactPerUUID(RDContactsResource):
 		  ]
 		}
 		"""
-		# set email
-		RDUpdateContactPerUUID.path = "/".join((RDUpdateContactPerUUID.path, uuid))
-
-		return self._patch(self, **kwargs)
+		return self._patch(body, route_params={'uuid': uuid}, **kwargs)
 
-	def _patch(self, **kwargs):
-		return self.send_response("PATCH", **kwargs)
+	def _patch(self, data, **kwargs):
+		return self.send_request("PATCH", data=data, **kwargs)
 
 
 class RDUpsertContactIndentifier(RDContactsResource):
@@ -165,14 +159,15 @@ class RDUpsertContactIndentifier(RDContactsResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDContactsResource.path, "plataform", "contacts"))
+	path = "/".join((RDContactsResource.path, "contacts", "{identifier}:{value}"))
 
-	def __call__(self, identifier, value, **kwargs):
+	def __call__(self, identifier, value, body=None, **kwargs):
 		"""
 		:identifier : type: string : The api_identifier of the Contact Field that uniquely identifies the Lead.
 		                             Currently only email or uuid are supported.
 		:value: type: string : The value for the given identifier
 		                             e.g. contact@example.org or 5408c5a3-4711-4f2e-8d0b-13407a3e30f3.
+		:body: type: dict : Request Body Default Parameters
 		:param kwargs: type: dict args
 		:return: json response
 		{
@@ -198,13 +193,10 @@ class RDUpsertContactIndentifier(RDContactsResource):
 		  ]
 		}
 		"""
-		# set email
-		RDUpsertContactIndentifier.path = "/".join((RDUpsertContactIndentifier.path, f"{identifier}:{value}"))
-
-		return self._pach(self, **kwargs)
+		return self._patch(body, route_params={'identifier': identifier, 'value': value}, **kwargs)
 
-	def _patch(self, **kwargs):
-		return self.send_response("PATCH", **kwargs)
+	def _patch(self, data, **kwargs):
+		return self.send_request("PATCH", data=data, **kwargs)
 
 
 # end-of-file
\ No newline at end of file
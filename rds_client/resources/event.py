@@ -2,11 +2,27 @@ from abc import ABC, abstractmethod
 from resources.resource import RDStationResource
 
 
+def event_contact(data):
+	"""
+	method responsible for finding the contact an event is about.
+
+	:param data: event body, or event model of `<rds_client.events>`.
+	:return: the email of the contact, its uuid without email, None when the event has neither.
+	"""
+	event = data.to_event() if hasattr(data, 'to_event') else data
+	payload = event.get('payload') if isinstance(event, dict) else None
+	if not isinstance(payload, dict):
+		return None
+	return payload.get('email') or payload.get('uuid') or payload.get('contact_uuid')
+
+
 class RDEventResource(RDStationResource):
 	""" The event's endpoint is responsible for receiving different event
 	types in which RD Station Contacts take part in. """
 
-	path = "plataform"
+	path = "platform"
+	rate_limit = 'events.account'
+	circuit = 'events'
 
 	def __init__(self, client):
 		super(RDEventResource, self).__init__(client)
@@ -22,6 +38,11 @@ class RDEvent(RDEventResource):
 	types in which RD Station Contacts take part in.
 	"""
 	path = "/".join((RDEventResource.path, "events"))
+	# a single event draws from the budget of its lead and from the account one
+	rate_limit = 'events.lead'
+
+	def rate_limits(self, data=None):
+		return [(self.rate_limit, event_contact(data)), (RDEventResource.rate_limit, None)]
 
 	def __call__(self, event_body,  **kwargs):
 		"""
@@ -76,10 +97,10 @@ class RDEvent(RDEventResource):
 		}
 		"""
 
-		return self._post(self, event_body, **kwargs)
+		return self._post(event_body, **kwargs)
 
 	def _post(self, data, **kwargs):
-		return self.send_response("POST", data=data, **kwargs)
+		return self.send_request("POST", data=data, **kwargs)
 
 
 class RDEventBatch(RDEventResource):
@@ -143,10 +164,10 @@ class RDEventBatch(RDEventResource):
 		}
 		"""
 
-		return self._post(self, event_body, **kwargs)
+		return self._post(event_body, **kwargs)
 
 	def _post(self, data, **kwargs):
-		return self.send_response("POST", data=data, **kwargs)
+		return self.send_request("POST", data=data, **kwargs)
 
 
 # end-of-file
\ No newline at end of file
@@ -6,10 +6,12 @@ class RDFieldsResource(RDStationResource):
 	"""
 	Class responsible for implementing the ´Fields´ api feature.
 	"""
-	path = 'platoform'
+	path = 'platform'
+	circuit = 'fields'
+	cache = 'fields'
 
 	def __init__(self, client):
-		super(RDEventResource, self).__init__(client)
+		super(RDFieldsResource, self).__init__(client)
 
 	@abstractmethod
 	def __call__(self):
@@ -26,7 +28,7 @@ class RDListFields(RDFieldsResource):
 
 	ref: https://developers.rdstation.com/en/reference/fields
 	"""
-	path = "/".join((RDFieldsResource.path, "contacts"))
+	path = "/".join((RDFieldsResource.path, "contacts", "fields"))
 
 	def __call__(self, **kwargs):
 		"""
@@ -93,11 +95,10 @@ class RDListFields(RDFieldsResource):
 		  ]
 		}
 		"""
-		RDListFields.path = "/".join((RDListFields.path, "fields"))
-		return self._get(self, **kwargs)
+		return self._get(**kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDInsertFieldCurrentAccount(RDFieldsResource):
@@ -106,7 +107,7 @@ class RDInsertFieldCurrentAccount(RDFieldsResource):
 	ref: https://developers.rdstation.com/en/reference/fields#methodGetDetails
 	"""
 
-	path = "/".join((RDFieldsResource.path, "contacts"))
+	path = "/".join((RDFieldsResource.path, "contacts", "fields"))
 
 	def __call__(self, fields, **kwargs):
 		"""
@@ -144,12 +145,10 @@ class RDInsertFieldCurrentAccount(RDFieldsResource):
  		 "uuid": "fdeba6ec-f1cf-4b13-b2ea-e93d47c0d828"
 		}
 		"""
-		RDInsertFieldCurrentAccount.path = \
-			"/".join((RDInsertFieldCurrentAccount.path, "fields"))
-		return self._post(self, fields, **kwargs)
+		return self._post(fields, **kwargs)
 
 	def _post(self, data, **kwargs):
-		return self.send_response("POST", data=fields, **kwargs)
+		return self.send_request("POST", data=data, **kwargs)
 
 
 class RDUpdateFieldCurrentAccount(RDFieldsResource):
@@ -158,11 +157,12 @@ class RDUpdateFieldCurrentAccount(RDFieldsResource):
 	ref: https://developers.rdstation.com/en/reference/fields#methodGetDetails
 	"""
 
-	path = "/".join((RDFieldsResource.path, "contacts"))
+	path = "/".join((RDFieldsResource.path, "contacts", "fields", "{uuid}"))
 
-	def __call__(self, uuid, **kwargs):
+	def __call__(self, uuid, body, **kwargs):
 		"""
-		:param field: type: dict : Request Body
+		:param uuid: type: string : The unique uuid associated to each RD Station field.
+		:param body: type: dict : Request Body
 		Update all attributes:
 		{
 		  "name": {
@@ -199,12 +199,10 @@ class RDUpdateFieldCurrentAccount(RDFieldsResource):
 		:return: json response * No response body
         {}
 		"""
-		RDUpdateFieldCurrentAccount.path = \
-			"/".join((RDUpdateFieldCurrentAccount.path, "fields", uuid))
-		return self._patch(self, fields, **kwargs)
+		return self._patch(body, route_params={'uuid': uuid}, **kwargs)
 
 	def _patch(self, data, **kwargs):
-		return self.send_response("PATCH", data=fields, **kwargs)
+		return self.send_request("PATCH", data=data, **kwargs)
 
 
 class RDDeleteFieldCurrentAccount(RDFieldsResource):
@@ -213,7 +211,7 @@ class RDDeleteFieldCurrentAccount(RDFieldsResource):
 	ref: https://developers.rdstation.com/en/reference/fields#methodGetDetails
 	"""
 
-	path = "/".join((RDFieldsResource.path, "fields"))
+	path = "/".join((RDFieldsResource.path, "contacts", "fields", "{uuid}"))
 
 	def __call__(self, uuid, **kwargs):
 		"""
@@ -222,12 +220,10 @@ class RDDeleteFieldCurrentAccount(RDFieldsResource):
 		response:
 		Success / Code: 204
 		"""
-		RDDeleteFieldCurrentAccount.path = \
-			"/".join((RDDeleteFieldCurrentAccount.path, f"{uuid}"))
-		return self._delete(self, **kwargs)
+		return self._delete(route_params={'uuid': uuid}, **kwargs)
 
-	def _delete(self, data, **kwargs):
-		return self.send_response("DELETE", **kwargs)
+	def _delete(self, **kwargs):
+		return self.send_request("DELETE", **kwargs)
 
 
 # end-of-file
\ No newline at end of file
@@ -14,7 +14,10 @@ class RDFunnelsResource(RDStationResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = 'plataform'
+	path = 'platform'
+	rate_limit = 'contacts'
+	circuit = 'contacts'
+	cache = 'funnels'
 
 	def __init__(self, client):
 		super(RDFunnelsResource, self).__init__(client)
@@ -30,7 +33,7 @@ class RDContactsUUIDDetails(RDFunnelsResource):
 
 	https://developers.rdstation.com/en/reference/contacts/funnels#methodGetByUuidDetails
 	"""
-	path = "/".join((RDFunnelsResource.path, "contacts"))
+	path = "/".join((RDFunnelsResource.path, "contacts", "{uuid}", "funnels", "{funnel_name}"))
 
 	def __call__(self, uuid, funnel_name, **kwargs):
 		"""
@@ -46,14 +49,10 @@ class RDContactsUUIDDetails(RDFunnelsResource):
 		  "interest": 100
 		}
 		"""
-		# set uuid
-		RDContactsUUIDDetails.path = "/".join(
-			(RDContactsUUIDDetails.path, uuid, 'funnels', funnel_name)
-		)
-		return self._get(self, **kwargs)
+		return self._get(route_params={'uuid': uuid, 'funnel_name': funnel_name}, **kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDContactsEmailDetails(RDFunnelsResource):
@@ -62,7 +61,7 @@ class RDContactsEmailDetails(RDFunnelsResource):
 
 	https://developers.rdstation.com/en/reference/contacts/funnels#methodGetByUuidDetails
 	"""
-	path = "/".join((RDFunnelsResource.path, "contacts"))
+	path = "/".join((RDFunnelsResource.path, "contacts", "email:{email}", "funnels", "{funnel_name}"))
 
 	def __call__(self, contact_email, funnel_name, **kwargs):
 		"""
@@ -78,13 +77,10 @@ class RDContactsEmailDetails(RDFunnelsResource):
 		  "interest": 100
 		}
 		"""
-		# set uuid
-		RDContactsEmailDetails.path = "/".join(
-			(RDContactsEmailDetails.path, f'email:{contact_email}', 'funnels', funnel_name))
-		return self._get(self, **kwargs)
+		return self._get(route_params={'email': contact_email, 'funnel_name': funnel_name}, **kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDUpdateContactsDetails(RDFunnelsResource):
@@ -93,15 +89,18 @@ class RDUpdateContactsDetails(RDFunnelsResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDFunnelsResource.path, "contacts"))
+	path = "/".join((RDFunnelsResource.path, "contacts", "{identifier}", "funnels", "{funnel_name}"))
 
-	def __call__(self, lifecycle_stage, opportunity,  contact_owner_email, **kwargs):
+	def __call__(self, identifier, lifecycle_stage, opportunity, contact_owner_email, # pylint: disable=too-many-arguments
+	             funnel_name='default', **kwargs):
 		"""
+		:param identifier: The contact uuid or `email:<address>` of the contact.
 		:param lifecycle_stage: The stage in the funnel which the contact belongs to. Valid options: 'Lead',
 		'Qualified Lead' and 'Client'.
 		:param opportunity: It indicates whether the contact is an opportunity or not in the funnel.
 		:param contact_owner_email: The email of the user responsible for the contact. Can be defined as null
 		for disassociate the current owner.
+		:param funnel_name: The contact funnel name. For now, the only accepted option is: "default".
 		:param kwargs: type: dict args
 		:return: json response
 		{
@@ -112,19 +111,16 @@ class RDUpdateContactsDetails(RDFunnelsResource):
 		  "interest": 100
 		}
 		"""
-		# set email
-		RDUpdateContactsDetails.path = "/".join(
-			(RDUpdateContactsDetails.path, uuid, f"|email:{contact_owner_email}", "funnels", funnel_name)
-		)
 		data = {
 		    "lifecycle_stage": lifecycle_stage,
 		    "opportunity": opportunity,
 		    "contact_owner_email": contact_owner_email
 		}
-		return self._put(self, data=data, **kwargs)
+		return self._put(data=data, route_params={'identifier': identifier, 'funnel_name': funnel_name},
+		                 **kwargs)
 
 	def _put(self, data, **kwargs):
-		return self.send_response("PUT", data, **kwargs)
+		return self.send_request("PUT", data, **kwargs)
 
 
 # end-of-file
\ No newline at end of file
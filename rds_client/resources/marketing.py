@@ -7,6 +7,8 @@ class RDMarketingResource(RDStationResource):
 	Class responsible for implementing the ´Marketing´ api resource.
 	"""
 	path = 'marketing'
+	circuit = 'marketing'
+	cache = 'marketing'
 
 	def __init__(self, client):
 		super(RDMarketingResource, self).__init__(client)
@@ -35,10 +37,10 @@ class RDMarketingAccountInfo(RDMarketingResource):
 		  "name": "Account Name"
 		}
 		"""
-		return self._get(self, **kwargs)
+		return self._get(**kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDMarketingTrackingCode(RDMarketingResource):
@@ -60,10 +62,10 @@ class RDMarketingTrackingCode(RDMarketingResource):
 		   "path": "https://d335luupugsy2.cloudfront.net/js/loader-scripts/8d2892c6-b15a-36916776e5e7-loader.js"
 		}
 		"""
-		return self._get(self, **kwargs)
+		return self._get(**kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 # end-of-file
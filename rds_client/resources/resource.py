@@ -1,8 +1,66 @@
+from string import Formatter
+from urllib.parse import quote
+
+
+class RDSRoute():
+	"""
+	Path template of a resource, e.g. `platform/contacts/{uuid}`, parsed once
+	when the resource class is defined. Building the path of a call formats a
+	new string, the template is never changed, so the resources are safe to
+	call from many threads at once.
+	"""
+	__slots__ = ('template', 'fields')
+
+	# characters the api accepts unquoted in a path segment, e.g. `email:contact@example.com`
+	SAFE = ':@'
+
+	def __init__(self, template):
+		self.template = template
+		self.fields = tuple(name for _, name, _, _ in Formatter().parse(template) if name)
+
+	def build(self, params=None):
+		"""
+		method responsible for building the path of a call.
+
+		:param params: dict with a value for each field of the template.
+		:return: the path, with the values quoted.
+		"""
+		if not self.fields:
+			return self.template
+		missing = [name for name in self.fields if name not in (params or {})]
+		if missing:
+			raise ValueError(f"route '{self.template}' is missing {', '.join(missing)}.")
+		return self.template.format(**{
+			name: quote(str(params[name]), safe=self.SAFE) for name in self.fields
+		})
+
+	def __repr__(self):
+		return f"{self.__class__.__name__}({self.template!r})"
+
 
 class RDStationResource(object):
 	"""
 	Class responsible for implementing an Abstract Factory.
 	"""
+	# path template of the resource, compiled to `route` once per class
+	path = None
+	route = None
+	# family of `settings.RDSTATION` limiting the requests of the resource
+	rate_limit = None
+	# `<rds_client.retry.RDSRetryPolicy>` overriding the client one for the resource
+	retry_policy = None
+	# family of the circuit breaker guarding the resource
+	circuit = None
+	# family of the response cache, reads are cached and writes invalidate it
+	cache = None
+	# sends the access token of the client
+	authenticated = True
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		if cls.path is not None:
+			cls.route = RDSRoute(cls.path)
+
 	def __init__(self, client):
 		"""
 		:param api: The instance of :class:`RDStationClient
@@ -10,7 +68,19 @@ class RDStationResource(object):
 		"""
 		self.client = client
 
+	def rate_limits(self, data=None): # pylint: disable=unused-argument
+		"""
+		method responsible for listing the budgets a request of the resource draws from.
+
+		:param data: body of the request.
+		:return: list of (family, key), the key is None for the budget of the whole family.
+		"""
+		return [(self.rate_limit, None)] if self.rate_limit else []
+
 	def send_request(self, method, data=None, *args, **kwargs):
+		"""
+		:param route_params: dict with the values of the fields of the path template.
+		"""
 		return self.client.send_request(self, method, data=data, *args, **kwargs)
 
-# end-of-file
\ No newline at end of file
+# end-of-file
@@ -15,6 +15,7 @@ class RDWebhooksResource(RDStationResource):
 	ref: https://developers.rdstation.com/en/reference/webhooks
 	"""
 	path = 'integrations'
+	circuit = 'webhooks'
 
 	def __init__(self, client):
 		super(RDWebhooksResource, self).__init__(client)
@@ -59,10 +60,10 @@ class RDDWebhooksReceiver(RDWebhooksResource):
 		  ]
 		}
 		"""
-		return self._get(self, **kwargs)
+		return self._get(**kwargs)
 
 	def _get(self, **kwargs):
-		return self.send_response("GET", **kwargs)
+		return self.send_request("GET", **kwargs)
 
 
 class RDWebhooksFactory(RDWebhooksResource):
@@ -97,13 +98,10 @@ class RDWebhooksFactory(RDWebhooksResource):
 		  "include_relations": ["COMPANY", "CONTACT_FUNNEL"]
 		}
 		"""
-		# set email
-		RDWebhooksFactory.path = \
-			"/".join((RDWebhooksFactory.path, f'email:{email}'))
-		return self._post(self, webhook, **kwargs)
+		return self._post(webhook, **kwargs)
 
 	def _post(self, data, **kwargs):
-		return self.send_response("POST", data=data, **kwargs)
+		return self.send_request("POST", data=data, **kwargs)
 
 
 class RDUpdateWebhookPerUUID(RDWebhooksResource):
@@ -112,7 +110,7 @@ class RDUpdateWebhookPerUUID(RDWebhooksResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDWebhooksResource.path, "webhooks"))
+	path = "/".join((RDWebhooksResource.path, "webhooks", "{uuid}"))
 
 	def __call__(self, uuid, body, **kwargs):
 		"""
@@ -144,13 +142,10 @@ class RDUpdateWebhookPerUUID(RDWebhooksResource):
 		  ]
 		}
 		"""
-		# set uiid to path
-		RDUpdateWebhookPerUUID.path = \
-			"/".join((RDUpdateWebhookPerUUID.path, uuid))
-		return self._put(self, body, **kwargs)
+		return self._put(body, route_params={'uuid': uuid}, **kwargs)
 
 	def _put(self, data, **kwargs):
-		return self.send_response("GET", datra=data, **kwargs)
+		return self.send_request("PUT", data=data, **kwargs)
 
 
 class RDDeleteWebhookPerUUID(RDWebhooksResource):
@@ -159,7 +154,7 @@ class RDDeleteWebhookPerUUID(RDWebhooksResource):
 
 	ref: https://developers.rdstation.com/en/reference/contacts
 	"""
-	path = "/".join((RDWebhooksResource.path, "webhooks"))
+	path = "/".join((RDWebhooksResource.path, "webhooks", "{uuid}"))
 
 	def __call__(self, uuid, **kwargs):
 		"""
@@ -169,12 +164,9 @@ class RDDeleteWebhookPerUUID(RDWebhooksResource):
 		Response examples:
 		Success | Code: 204
 		"""
-		# set uiid to path
-		RDDeleteWebhookPerUUID.path = \
-			"/".join((RDDeleteWebhookPerUUID.path, uuid))
-		return self._delete(self, **kwargs)
+		return self._delete(route_params={'uuid': uuid}, **kwargs)
 
-	def _detlete(self, data, **kwargs):
-		return self.send_response("DELETE", **kwargs)
+	def _delete(self, **kwargs):
+		return self.send_request("DELETE", **kwargs)
 
 # end-of-file
\ No newline at end of file
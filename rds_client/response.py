@@ -1,3 +1,6 @@
+from collections.abc import Mapping
+
+from codec import CODEC
 from exceptions import RDStationException
 from exceptions import RDUnauthorizedRequest
 from exceptions import RDForbiddenRequest
@@ -17,6 +20,8 @@ from exceptions import RDEmailAlreadyInUse
 from exceptions import RDValidationRelatedException
 
 
+_UNDECODED = object()
+
 RDS_CLIENT_EXCEPTIONS = {
     # Request related error types
     "UNAUTHORIZED": RDUnauthorizedRequest,
@@ -44,45 +49,145 @@ RDS_CLIENT_EXCEPTIONS = {
 }
 
 
-class RDSResponse():
-	""" RD Station Response."""
+def mapped_errors(error):
+	"""
+	method responsible for listing the mapped exceptions of a failure.
+
+	:param error: exception raised by `<rds_client.RDSJsonResponse>`.
+	:return: list of exceptions, one per error of the response.
+	"""
+	if error.args and isinstance(error.args[0], list) and error.args[0]:
+		return [item for item in error.args[0] if isinstance(item, Exception)] or [error]
+	return [error]
 
-	def __init__(self, response, raise_status=True, safe=False):
 
-		json_response = response.json()
-		exceptions = []
+class RDSResponse(Mapping):
+	""" RD Station Response.
 
-		if not json_response:
-			raise RDStationException("Response body has no return in json.")
+	The body is decoded on the first access, its top-level keys are exposed
+	as attributes and through the mapping interface. Bodyless responses, like
+	the 204 of the deletes, are never decoded.
 
-		if safe and isinstance(response.json(), dict):
-			raise TypeError(
-				'In order to allow non-dict objects to be serialized set the '
-				'safe parameter to False.'
-			)
-		for key, value in json_response.items():
-			setattr(self, key, value)
+	Every status from 400 raises `RDStationException`; when the body has
+	errors, the type raised is the mapped exception of the first one, e.g.
+	`RDResourceNotFound`, and every mapped exception is in its args.
+	"""
 
-		if self.errors:
-			for r in self.errors:
-				exceptions.append(
-					self.throw_exactly_matched_exception(
-						r['error_type'], r['error_message']))
-			if raise_status:
-				raise RDStationException(exceptions)
+	__slots__ = ('status_code', 'headers', 'safe', '_content', '_codec', '_data', '_post_data')
+
+	def __init__(self, response, raise_status=True, safe=False, codec=CODEC):
+		self.status_code = getattr(response, 'status_code', None)
+		self.headers = getattr(response, 'headers', None)
+		self.safe = safe
+		self._content = response.content or None
+		self._codec = codec
+		self._data = _UNDECODED if self._content else {}
+		self._post_data = None
+
+		if self.status_code is None or self.status_code < 400 or not raise_status:
+			return
+		if self._content is None:
+			raise self.failure(f"Response {self.status_code} has no body.")
 		try:
-			post_data = {}
-			for data in self.post_data.split("&"):
-				key, value = data.split('=')
-				post_data[key] = value
-		except AttributeError:
-			post_data = ''
-		finally:
-			setattr(self, 'post_data', post_data)
+			errors = self.get('errors')
+		except ValueError as error:
+			raise self.failure(f"Response {self.status_code} body is not json: {error}") from error
+		if errors:
+			raise self.failure(self.exceptions)
+		raise self.failure(f"Response {self.status_code}: {str(self.data)[:200]}")
+
+	def failure(self, message):
+		"""
+		method responsible for building the exception of a failed response.
+
+		:param message: text of the failure, or the mapped exceptions of its errors,
+		the type of the first one being the type raised.
+		:return: `RDStationException` carrying the http status of the response.
+		"""
+		exception = RDStationException
+		if isinstance(message, list) and message:
+			exception = type(message[0])
+		error = exception(message)
+		error.status_code = self.status_code
+		return error
+
+	@property
+	def data(self):
+		""" decoded body of the response """
+		if self._data is _UNDECODED:
+			self._data = self._codec.loads(self._content)
+			self._content = None
+			if self.safe and not isinstance(self._data, dict):
+				raise TypeError(
+					'In order to allow non-dict objects to be serialized set the '
+					'safe parameter to False.'
+				)
+		return self._data
+
+	@property
+	def exceptions(self):
+		""" mapped exceptions of the errors of the body """
+		errors = self.get('errors') or ()
+		if isinstance(errors, dict):
+			# the auth errors come as a single object
+			errors = (errors,)
+		return [
+			self.throw_exactly_matched_exception(error.get('error_type'), error.get('error_message'))
+			for error in errors
+		]
+
+	@property
+	def post_data(self):
+		""" `post_data` of the body parsed into a dict, '' when absent """
+		if self._post_data is None:
+			post_data = self.get('post_data')
+			if isinstance(post_data, str):
+				self._post_data = dict(item.split('=', 1) for item in post_data.split('&') if item)
+			else:
+				self._post_data = ''
+		return self._post_data
+
+	def __getattr__(self, name):
+		if name.startswith('__'):
+			raise AttributeError(name)
+		data = self.data
+		if isinstance(data, dict) and name in data:
+			return data[name]
+		raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+	def __getitem__(self, key):
+		return self.data[key]
+
+	def __iter__(self):
+		return iter(self.data)
+
+	def __len__(self):
+		return len(self.data)
+
+	def get(self, key, default=None):
+		data = self.data
+		return data.get(key, default) if isinstance(data, dict) else default
+
+	def __repr__(self):
+		return f"<RDSResponse [{self.status_code}]>"
 
 	def throw_exactly_matched_exception(self, error_type, error_message):
 		exception = RDS_CLIENT_EXCEPTIONS.get(error_type, RDStationException)
 		return exception(error_message)
 
 
+class RDSRawResponse():
+	""" Undecoded RD Station response, for the callers forwarding the body as it is. """
+
+	__slots__ = ('status_code', 'headers', 'content')
+
+	def __init__(self, response):
+		self.status_code = response.status_code
+		self.headers = response.headers
+		self.content = response.content
+
+	def __repr__(self):
+		return f"<RDSRawResponse [{self.status_code}]>"
+
+
 # end-of-file
\ No newline at end of file
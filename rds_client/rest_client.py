@@ -1,13 +1,29 @@
 """ https://developers.rdstation.com/en/overview """
 
-import json
 import time
 import logging
+from types import MappingProxyType
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from dataclasses import dataclass, field
 from requests import Session
+from requests.exceptions import Timeout
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
 import settings
+from codec import CODEC
 from response import RDSResponse
+from response import RDSRawResponse
+from exceptions import RDStationException
+from ratelimit import RDSRateLimiter
+from retry import RDSRetryPolicy
+from circuit import RDSCircuitBreakers
+from singleflight import RDSSingleFlight
+from cache import cache_key
+from cache import cache_tags
+from tokens import RDSTokenManager
+from tokens import is_unauthorized
 from resources.event import RDEvent
 from resources.event import RDEventBatch
 from resources.auth import RDGettingAcessToken
@@ -37,6 +53,44 @@ from resources.funnels import RDUpdateContactsDetails
 LOG = logging.getLogger(__name__)
 
 
+def unique(identifiers):
+	"""
+	method responsible for consuming identifiers lazily, each one only once.
+
+	:param identifiers: iterable of identifiers.
+	:return: generator of the identifiers not seen before.
+	"""
+	seen = set()
+	for identifier in identifiers:
+		if identifier not in seen:
+			seen.add(identifier)
+			yield identifier
+
+
+def fill_pending(identifiers, pending, submit, limit):
+	"""
+	method responsible for submitting identifiers until `limit` of them are pending.
+
+	:param identifiers: iterator of identifiers, consumed up to the limit.
+	:param pending: dict of future -> identifier, filled in place.
+	:param submit: callable(identifier) returning the future of its request.
+	"""
+	if len(pending) >= limit:
+		return
+	for identifier in identifiers:
+		pending[submit(identifier)] = identifier
+		if len(pending) >= limit:
+			return
+
+
+def outcome(future):
+	""" result of a done future, the exception it raised on failure """
+	try:
+		return future.result()
+	except Exception as error: # pylint: disable=broad-except
+		return error
+
+
 @dataclass
 class RDStationClient:
 	""" Class responsible for implementing input parameters for api.
@@ -57,12 +111,22 @@ class RDStationRestClient():  # pylint: disable=too-many-instance-attributes
 
 	def __init__(self, client, **kwargs):
 		self.client = client
-		self.session = Session()
-		self._access_token = None
-		self._expires = 0
-		self._refresh_token = None
+		# keeps the cached responses, the shared requests and the cached tokens of the accounts apart
+		self._account_id = kwargs.get('account_id') or client.client_id
+		self.session = kwargs.get('session') or self.create_session()
 		self._endpoint = kwargs.get('endpoint', settings.RDSTATION['endpoints']['base_domain'])
-		self._headers = kwargs.get('headers', settings.RDSTATION['default_headers'])
+		# snapshot replaced as a whole on change, never mutated in place
+		self._headers = MappingProxyType(dict(kwargs.get('headers') or settings.RDSTATION['default_headers']))
+		self._rate_limiter = kwargs.get('rate_limiter', RDSRateLimiter())
+		self._rate_limit_timeout = kwargs.get('rate_limit_timeout')
+		self._retry_policy = kwargs.get('retry_policy', RDSRetryPolicy())
+		self._circuit_breakers = kwargs.get('circuit_breakers', RDSCircuitBreakers())
+		self._response_cache = kwargs.get('response_cache')
+		self._single_flight = kwargs.get('single_flight', RDSSingleFlight())
+		self._dead_letters = kwargs.get('dead_letters')
+		self._codec = kwargs.get('codec') or CODEC
+		self._token_manager = kwargs.get('token_manager') or RDSTokenManager(
+			self, cache=kwargs.get('token_cache'), scheduler=kwargs.get('token_scheduler'))
 
 	@property
 	def access_token(self):
@@ -91,36 +155,288 @@ class RDStationRestClient():  # pylint: disable=too-many-instance-attributes
 		"""
 		return RDRevokingAcessToken(self)
 
-	def prepare_path(self, resource):
+	def create_session(self):
+		"""
+		method responsible for creating the http session used to send the requests.
+
+		:return: `<requests.Session>`.
+		"""
+		return Session()
+
+	def prepare_path(self, resource, route_params=None):
 		"""
 		method responsible for constructing the url based on the requested resource
 
 		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:param route_params: dict with the values of the fields of the resource path.
 		:return: the complete url.
 		"""
-		return "/".join((self._endpoint, resource.path))
+		return "/".join((self._endpoint, resource.route.build(route_params)))
+
+	def acquire_rate_limit(self, resource, data=None):
+		"""
+		method responsible for waiting the rate limit budgets of a request of the resource.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:param data: body of the request, keying the budgets of its contact.
+		:return: seconds waited.
+		"""
+		waited = 0.0
+		if self._rate_limiter is None:
+			return waited
+		for family, key in resource.rate_limits(data):
+			waited += self._rate_limiter.acquire(family, key=key, timeout=self._rate_limit_timeout)
+			LOG.debug(f"rate-limit {family} waited: {waited:.3f}s")
+		return waited
+
+	def get_retry_policy(self, resource):
+		"""
+		method responsible for choosing the retry policy of the resource.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:return: `<rds_client.retry.RDSRetryPolicy>` of the resource class or the client one.
+		"""
+		return resource.retry_policy or self._retry_policy
+
+	def get_circuit_breaker(self, resource):
+		"""
+		method responsible for choosing the circuit breaker of the resource family.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:return: `<rds_client.circuit.RDSCircuitBreaker>` or None.
+		"""
+		if self._circuit_breakers is None:
+			return None
+		return self._circuit_breakers.get(resource.circuit)
+
+	def get_cached_response(self, resource, method, url, params=None):
+		"""
+		method responsible for looking a read request up in the response cache.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:return: the cached `<rds_client.RDSJsonResponse>`, None on miss.
+		"""
+		if self._response_cache is None or resource.cache is None or method != "GET":
+			return None
+		return self._response_cache.get(cache_key(url, params, self._account_id))
+
+	def update_cache(self, resource, method, url, response, size, params=None): # pylint: disable=too-many-arguments
+		"""
+		method responsible for caching a read response or invalidating the
+		entries changed by a write.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:param response: `<rds_client.RDSJsonResponse>` of the request.
+		:param size: size in bytes of the response body.
+		"""
+		if self._response_cache is None or resource.cache is None:
+			return
+		tags = cache_tags(resource.cache, url, response)
+		if method == "GET":
+			if isinstance(response, RDSRawResponse):
+				return
+			key = cache_key(url, params, self._account_id)
+			self._response_cache.set(key, response, resource.cache, size, tags)
+			return
+		contact_tags = {tag for tag in tags if tag.startswith('contact:')}
+		self._response_cache.invalidate(contact_tags or tags)
+
+	def encode_body(self, data):
+		"""
+		method responsible for encoding the body of a request with the codec of the client.
+
+		:param data: object to send, bytes are sent as they are and the event
+		models of `<rds_client.events>`, alone or in a list, as their event body.
+		:return: bytes or None when there is no body.
+		"""
+		if data is None or isinstance(data, bytes):
+			return data
+		if hasattr(data, 'to_event'):
+			data = data.to_event()
+		elif isinstance(data, list):
+			data = [item.to_event() if hasattr(item, 'to_event') else item for item in data]
+		return self._codec.dumps(data)
+
+	def decode_response(self, response, raw=False):
+		"""
+		method responsible for mapping the http response.
+
+		:param raw: skip the decoding of the successful responses, the failures raise as decoded ones.
+		:return: `<rds_client.RDSJsonResponse>`, `<rds_client.response.RDSRawResponse>` when raw.
+		"""
+		if raw and response.status_code < 400:
+			return RDSRawResponse(response)
+		return RDSResponse(response, codec=self._codec)
+
+	def parse_response(self, resource, method, url, data, response, raw=False): # pylint: disable=too-many-arguments
+		"""
+		method responsible for mapping the http response, sending the writes
+		rejected because of their data to the dead-letter store.
+
+		:param raw: skip the decoding of the successful responses, the failures raise as decoded ones.
+		:return: `<rds_client.RDSJsonResponse>`, `<rds_client.response.RDSRawResponse>` when raw.
+		"""
+		try:
+			return self.decode_response(response, raw)
+		except RDStationException as error:
+			if self._dead_letters is not None and method != "GET":
+				self._dead_letters.record(resource, method, url, data, error)
+			raise
 
 	def send_request(self, resource, method, data=None, **kwargs): # pylint: disable=too-many-arguments
 		"""
 		method responsible for sending resource request processing.
 		:param resource: instance of `<rds_client.resources.RDSResource>`.
 		:param method: http method
-		:param kwargs: others params
+		:param kwargs: others params, `raw=True` returns the body undecoded and
+		`route_params` fills the fields of the resource path
 
-			:return: `<rds_client.RDSJsonResponse>`.
+			:return: `<rds_client.RDSJsonResponse>` or `<rds_client.response.RDSRawResponse>`.
 		"""
 		# get url to of resource
-		url = self.prepare_path(resource)
-		# pylint disable=bad-continuation
-		response = self.session.request(method=method, url=url, \
-				data=json.dumps(data), headers=self._headers, **kwargs)
-		# pylint disable=bad-continuation
+		url = self.prepare_path(resource, kwargs.pop('route_params', None))
+		raw = kwargs.pop('raw', False)
+		cached = None if raw else self.get_cached_response(resource, method, url, kwargs.get('params'))
+		if cached is not None:
+			return cached
+		if method == "GET" and self._single_flight is not None:
+			key = (cache_key(url, kwargs.get('params'), self._account_id), raw)
+			return self._single_flight.do(key, self.dispatch, resource, method, url, data, raw, **kwargs)
+		return self.dispatch(resource, method, url, data, raw, **kwargs)
+
+	def get_token(self, resource):
+		"""
+		method responsible for choosing the access token sent with a request.
+
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:return: the access token, None for the auth endpoints or without credentials.
+		"""
+		if not resource.authenticated:
+			return None
+		return self._token_manager.token()
+
+	def request_headers(self, token):
+		"""
+		method responsible for building the headers of a request.
+
+		:param token: access token of the request.
+		:return: headers of the request, a snapshot not changed by other threads.
+		"""
+		headers = self._headers
+		if token is None:
+			return headers
+		return {**headers, 'Authorization': f"Bearer {token}"}
+
+	def set_header(self, name, value):
+		"""
+		method responsible for changing a default header of the requests.
+
+		The requests already sent keep the headers they were built with.
+
+		:param name: name of the header.
+		:param value: value of the header, None removes it.
+		"""
+		headers = {key: item for key, item in self._headers.items() if key != name}
+		if value is not None:
+			headers[name] = value
+		self._headers = MappingProxyType(headers)
+
+	def dispatch(self, resource, method, url, data=None, raw=False, **kwargs): # pylint: disable=too-many-arguments
+		"""
+		method responsible for sending an authenticated request, renewing the
+		access token and sending it once more when the api rejects the token.
+		:param resource: instance of `<rds_client.resources.RDSResource>`.
+		:param method: http method
+		:param url: complete url of the request
+		:param raw: return the body undecoded
+		:param kwargs: others params
+
+			:return: `<rds_client.RDSJsonResponse>` or `<rds_client.response.RDSRawResponse>`.
+		"""
+		token = self.get_token(resource)
+		try:
+			return self.dispatch_once(resource, method, url, data, raw, token, **kwargs)
+		except RDStationException as error:
+			if token is None or not is_unauthorized(error):
+				raise
+			LOG.info(f"access token rejected by {method} {url}, renewing it.")
+			token = self._token_manager.refresh(stale=token)
+			return self.dispatch_once(resource, method, url, data, raw, token, **kwargs)
+
+	@staticmethod
+	def next_attempt(method, url, policy, breaker, attempt, status=None, retry_after=None, error=None): # pylint: disable=too-many-arguments
+		"""
+		method responsible for the bookkeeping of an attempt, shared by the sync
+		and the asyncio clients: records its outcome on the circuit breaker and
+		asks the retry policy whether to send the request again.
+
+		:param policy: `<rds_client.retry.RDSRetryPolicy>` of the resource, None not to retry.
+		:param breaker: `<rds_client.circuit.RDSCircuitBreaker>` of the resource, or None.
+		:param attempt: number of the attempt, from 0.
+		:param status: http status of the response, None when the attempt raised `error`.
+		:param retry_after: Retry-After header of the response.
+		:param error: connection or timeout error of the attempt.
+		:return: seconds to wait before the next attempt, None to stop retrying.
+		"""
+		if breaker is not None:
+			breaker.record(success=error is None and status < 500)
+		if policy is None:
+			return None
+		if error is not None:
+			if not policy.should_retry(method, attempt, exception=error):
+				return None
+			delay = policy.delay(attempt)
+		else:
+			if not policy.should_retry(method, attempt, status=status):
+				return None
+			delay = policy.delay(attempt, retry_after)
+			if delay is None:
+				LOG.warning(f"{method} {url} asked to retry past {policy.max_backoff}s, giving up.")
+				return None
+		LOG.warning(f"retrying {method} {url} ({attempt + 1}) in {delay:.2f}s")
+		return delay
+
+	def dispatch_once(self, resource, method, url, data=None, raw=False, token=None, **kwargs): # pylint: disable=too-many-arguments
+		"""
+		method responsible for sending a request through the circuit breaker,
+		the rate limiter and the retry policy of the resource.
+		:param token: access token sent in the Authorization header.
+
+			:return: `<rds_client.RDSJsonResponse>` or `<rds_client.response.RDSRawResponse>`.
+		"""
+		body = self.encode_body(data)
+		headers = self.request_headers(token)
+		policy = self.get_retry_policy(resource)
+		breaker = self.get_circuit_breaker(resource)
+		attempt = 0
+		while True:
+			if breaker is not None:
+				breaker.before_request()
+			self.acquire_rate_limit(resource, data)
+			try:
+				# pylint disable=bad-continuation
+				response = self.session.request(method=method, url=url, \
+						data=body, headers=headers, **kwargs)
+				# pylint disable=bad-continuation
+			except (RequestsConnectionError, Timeout) as error:
+				delay = self.next_attempt(method, url, policy, breaker, attempt, error=error)
+				if delay is None:
+					raise
+			else:
+				delay = self.next_attempt(method, url, policy, breaker, attempt, response.status_code,
+				                          response.headers.get('Retry-After'))
+				if delay is None:
+					break
+			attempt += 1
+			time.sleep(delay)
 		LOG.debug(response)
 		LOG.debug(response.text)
 		LOG.debug(response.headers)
 		LOG.debug(response.cookies)
 
-		return RDSResponse(response)
+		rds_response = self.parse_response(resource, method, url, data, response, raw)
+		self.update_cache(resource, method, url, rds_response, len(response.content), kwargs.get('params'))
+		return rds_response
 
 	@property
 	def get_account_info(self):
@@ -140,196 +456,237 @@ class RDStationRestClient():  # pylint: disable=too-many-instance-attributes
 		"""
 		return RDMarketingTrackingCode(self)
 
-	def get_contacts_by_uiid(self, uuid):
+	def get_contacts_by_uiid(self, uuid, **kwargs):
 		"""
 		method to obtain resource from RD Station, get contact per uuid.
-			:returns: the instance of :class:`RDContactsResource
+			:returns: the response of :class:`RDContactsResource
 		<rds_client.resources.contacts.RDContactsUUID>`.
 		"""
-		return RDContactsUUID(self, uuid)
+		return RDContactsUUID(self)(uuid, **kwargs)
 
-	def get_contacts_by_email(self):
+	def get_contacts_by_email(self, email, **kwargs):
 		"""
 		method to obtain resource from RD Station, get contact per email.
-			:returns: the instance of :class:`RDContactsResource
+			:returns: the response of :class:`RDContactsResource
 		<rds_client.resources.contacts.RDContactsEmail>`.
 		"""
-		return RDContactsEmail(self)
+		return RDContactsEmail(self)(email, **kwargs)
+
+	def get_contacts_many(self, identifiers, by='uuid', max_workers=8, **kwargs):
+		"""
+		method to obtain many contacts from RD Station concurrently.
+
+		The identifiers are deduplicated and consumed lazily, keeping at most
+		`max_workers` requests in flight under the contacts rate limit.
+
+		:param identifiers: iterable of contact uuids or emails.
+		:param by: `uuid` or `email`.
+		:param max_workers: number of concurrent requests.
+			:returns: generator of (identifier, response) in completion order,
+		the response being the exception raised for that identifier on failure.
+		"""
+		fetch = self._contacts_fetcher(by)
+		pending = {}
+		identifiers = unique(identifiers)
+		executor = ThreadPoolExecutor(max_workers=max_workers)
+		try:
+			while True:
+				fill_pending(identifiers, pending, lambda identifier: executor.submit(fetch, identifier, **kwargs),
+				             max_workers)
+				if not pending:
+					return
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield pending.pop(future), outcome(future)
+		finally:
+			executor.shutdown(wait=False, cancel_futures=True)
+
+	def _contacts_fetcher(self, by):
+		if by not in ('uuid', 'email'):
+			raise ValueError(f"contacts can only be fetched by uuid or email, not '{by}'.")
+		return self.get_contacts_by_uiid if by == 'uuid' else self.get_contacts_by_email
 
-	def update_contacts_by_uuid(self, uuid):
+	def update_contacts_by_uuid(self, uuid, body, **kwargs):
 		"""
 		method to obtain resource from RD Station, update contact per uuid.
-			:returns: the instance of :class:`RDContactsResource
+			:returns: the response of :class:`RDContactsResource
 		<rds_client.resources.contacts.RDUpdateContactPerUUID>`.
 		"""
-		return RDUpdateContactPerUUID(self, uuid)
+		return RDUpdateContactPerUUID(self)(uuid, body, **kwargs)
 
-	def upsert_contact_per_identifier(self, indentifier, value):
+	def upsert_contact_per_identifier(self, indentifier, value, body=None, **kwargs):
 		"""
 		method to obtain resource from RD Station, update and insert contact per indetifier.
-			:returns: the instance of :class:`RDContactsResource
+			:returns: the response of :class:`RDContactsResource
 		<rds_client.resources.contacts.RDUpsertContactIndentifier>`.
 		"""
-		return RDUpsertContactIndentifier(self, indentifier, value)
+		return RDUpsertContactIndentifier(self)(indentifier, value, body, **kwargs)
 
-	def get_contacts_by_uuid_funnel(self, uuid):
+	def get_contacts_by_uuid_funnel(self, uuid, funnel_name='default', **kwargs):
 		"""
 		method to obtain resource from RD Station, get contact per uuid.
-			:returns: the instance of :class:`RDFunnelsResource
+			:returns: the response of :class:`RDFunnelsResource
 		<rds_client.resources.funnels.RDContactsUUIDDetails>`.
 		"""
-		return RDContactsUUIDDetails(self, uuid)
+		return RDContactsUUIDDetails(self)(uuid, funnel_name, **kwargs)
 
-	def get_contacts_by_email_funnel(self, email):
+	def get_contacts_by_email_funnel(self, email, funnel_name='default', **kwargs):
 		"""
 		method to obtain resource from RD Station, get contact per email.
-			:returns: the instance of :class:`RDFunnelsResource
+			:returns: the response of :class:`RDFunnelsResource
 		<rds_client.resources.funnels.RDContactsEmailDetails>`.
 		"""
-		return RDContactsEmailDetails(self, email)
+		return RDContactsEmailDetails(self)(email, funnel_name, **kwargs)
 
 	def update_contact_by_indetifier_funnel(self, indentifier, **kwargs):
 		"""
 		method to obtain resource from RD Station, update contacty by indetifier.
-			:returns: the instance of :class:`RDFunnelsResource
+			:returns: the response of :class:`RDFunnelsResource
 		<rds_client.resources.funnels.RDUpdateContactsDetails>`.
 		"""
-		return RDUpdateContactsDetails(self, indentifier, **kwargs)
+		return RDUpdateContactsDetails(self)(indentifier, **kwargs)
 
-	def get_fields(self):
+	def get_fields(self, **kwargs):
 		"""
 		method to obtain resource from RD Station, get field.
-			:returns: the instance of :class:`RDFieldsResource
+			:returns: the response of :class:`RDFieldsResource
 		<rds_client.resources.fields.RDListFields>`.
 		"""
-		return RDListFields(self)
+		return RDListFields(self)(**kwargs)
 
-	def insert_field(self, body):
+	def insert_field(self, body, **kwargs):
 		"""
 		method to obtain resource from RD Station, insert a new field.
-			:returns: the instance of :class:`RDFieldsResource
+			:returns: the response of :class:`RDFieldsResource
 		<rds_client.resources.fields.RDInsertFieldCurrentAccount>`.
 		"""
-		return RDInsertFieldCurrentAccount(self, body)
+		return RDInsertFieldCurrentAccount(self)(body, **kwargs)
 
-	def update_field(self, body):
+	def update_field(self, uuid, body, **kwargs):
 		"""
 		method to obtain resource from RD Station, update field.
-			:returns: the instance of :class:`RDFieldsResource
+			:returns: the response of :class:`RDFieldsResource
 		<rds_client.resources.fields.RDUpdateFieldCurrentAccount>`.
 		"""
-		return RDUpdateFieldCurrentAccount(self, body)
+		return RDUpdateFieldCurrentAccount(self)(uuid, body, **kwargs)
 
-	def delete_field(self, body):
+	def delete_field(self, uuid, **kwargs):
 		"""
 		method to obtain resource from RD Station, delete field.
-			:returns: the instance of :class:`RDFieldsResource
+			:returns: the response of :class:`RDFieldsResource
 		<rds_client.resources.fields.RDDeleteFieldCurrentAccount>`.
 		"""
-		return RDDeleteFieldCurrentAccount(self, body)
+		return RDDeleteFieldCurrentAccount(self)(uuid, **kwargs)
 
 	# https://developers.rdstation.com/en/reference/webhooks
 
-	def receive_webhook(self):
+	def receive_webhook(self, **kwargs):
 		"""
 		method to obtain resource from RD Station, retrieve a webhook.
-			:returns: the instance of :class:`RDWebhooksResource
+			:returns: the response of :class:`RDWebhooksResource
 		<rds_client.resources.webhook.RDDWebhooksReceiver>`.
 		"""
-		return RDDWebhooksReceiver(self)
+		return RDDWebhooksReceiver(self)(**kwargs)
 
-	def create_webhook(self, body):
+	def create_webhook(self, body, **kwargs):
 		"""
 		method to obtain resource from RD Station, create a new webhook.
-			:returns: the instance of :class:`RDWebhooksResource
+			:returns: the response of :class:`RDWebhooksResource
 		<rds_client.resources.webhook.RDWebhooksFactory>`.
 		"""
-		return RDWebhooksFactory(self, body)
+		return RDWebhooksFactory(self)(body, **kwargs)
 
-	def update_webhook_by_uuid(self, uuid):
+	def update_webhook_by_uuid(self, uuid, body, **kwargs):
 		"""
 		method to obtain resource from RD Station, update webhook per uuid.
-			:returns: the instance of :class:`RDWebhooksResource
+			:returns: the response of :class:`RDWebhooksResource
 		<rds_client.resources.webhook.RDUpdateWebhookPerUUID>`.
 		"""
-		return RDUpdateWebhookPerUUID(self, uuid)
+		return RDUpdateWebhookPerUUID(self)(uuid, body, **kwargs)
 
-	def delete_webhook(self, uuid):
+	def delete_webhook(self, uuid, **kwargs):
 		"""
 		method to obtain resource from RD Station, delete webhook.
-			:returns: the instance of :class:`RDWebhooksResource
+			:returns: the response of :class:`RDWebhooksResource
 		<rds_client.resources.webhook.RDDeleteWebhookPerUUID>`.
 		"""
-		return RDDeleteWebhookPerUUID(self, uuid)
+		return RDDeleteWebhookPerUUID(self)(uuid, **kwargs)
 
 	# https://developers.rdstation.com/en/reference/events
-	def create_event(self):
+	def create_event(self, event_body, **kwargs):
 		"""
 		method to get creation resource for RD Station default event.
-			:returns: the instance of :class:`Appinit
+			:returns: the response of :class:`RDEventResource
 		<rds_client.resources.event.RDEvent>`.
 		"""
-		return RDEvent(self)
+		return RDEvent(self)(event_body, **kwargs)
 
-	def create_event_batch(self):
+	def create_event_batch(self, event_body, **kwargs):
 		"""
 		method to get creation resource for RD Station batch event.
-			:returns: the instance of :class:`RDEventBatch
+			:returns: the response of :class:`RDEventResource
 		<rds_client.resources.event.RDEventBatch>`.
 		"""
-		return RDEventBatch(self)
+		return RDEventBatch(self)(event_body, **kwargs)
 
 	def connect(self):
 		"""
-		method responsible for activating a connection with the RD Station api.
+		method responsible for activating a connection with the RD Station api,
+		fetching the access token and starting its background refresher.
 			<rds_client.RDStationClient.connect>`.
 		"""
-		if not self._access_token:
-			data = self.access_token()
-			try:
-				self._access_token = data['access_token']
-				self._expires = data['expires_in']
-				self._refresh_token = data['refresh_token']
-				self._headers['Authorization'] = f"Bearer {self._refresh_token}"
-			except (KeyError, TypeError):
-				return
-		self._expires =- 1
-		LOG.debug(f"access-token: {self._access_token}")
-		LOG.debug(f"refresh-token: {self._refresh_token}")
-		LOG.debug(f"expire-in: {self._expires}")
-		self._access_token = self._refresh_token
+		self._token_manager.token()
+		self._token_manager.start()
+		LOG.debug(f"expire-in: {self._token_manager.expires_in}")
+		return self
 
 	def run(self):
 		"""
-		method responsible for starting a running service with the RD Station api.
+		method responsible for starting a running service with the RD Station api,
+		keeping the access token renewed until interrupted.
 			<rds_client.RDStationClient.run>`.
 		"""
-		while True:
-			try:
-				self.connect()
-				time.sleep(1)
-			except KeyboardInterrupt:
-				LOG.warning('CTRL+C Detected!')
-				break
+		self.connect()
+		try:
+			self._token_manager.wait()
+		except KeyboardInterrupt:
+			LOG.warning('CTRL+C Detected!')
+		finally:
+			self._token_manager.stop()
 
 	@property
 	def get_access_token(self):
 		""" property to get current access token. """
-		return self._access_token
+		return self._token_manager.access_token
 
 	@property
 	def get_refresh_token(self):
 		""" property to get current access token refresh. """
-		return self._refresh_token
+		return self._token_manager.refresh_token
 
 	@property
 	def get_expires_in(self):
-		""" property to get current expire token """
-		return self._expires
+		""" property to get the seconds left before the access token expires """
+		return self._token_manager.expires_in
+
+	@property
+	def get_account_id(self):
+		""" identifier of the account of the client, its `client_id` by default """
+		return self._account_id
+
+	@property
+	def get_token_manager(self):
+		""" the manager of the access token of the client """
+		return self._token_manager
+
+	@property
+	def get_rate_limiter(self):
+		""" the rate limiter consulted before each request """
+		return self._rate_limiter
 
 	@property
 	def get_headers(self):
-		""" get the current http session headers """
+		""" get the current http session headers, read-only """
 		return self._headers
 
 	def __enter__(self):
@@ -337,6 +694,7 @@ class RDStationRestClient():  # pylint: disable=too-many-instance-attributes
 		return self
 
 	def __exit__(self, exc_type, exc_val, exc_tb):
+		self._token_manager.stop()
 		if exc_val:
 			LOG.warning(f'exc_type: {exc_type}')
 			LOG.warning(f'exc_value: {exc_val}')
@@ -345,7 +703,7 @@ class RDStationRestClient():  # pylint: disable=too-many-instance-attributes
 	def __repr__(self):
 		# pylint disable=bad-continuation
 		return (f'RDStation ('
-		        f'refresh-token={self._refresh_token[0:10]}.., '
-		        f'expire-in={self._expires})')
+		        f'refresh-token={(self.get_refresh_token or "")[0:10]}.., '
+		        f'expire-in={self.get_expires_in})')
 
 # end-of-file
\ No newline at end of file
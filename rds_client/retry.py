@@ -0,0 +1,96 @@
+""" Retry policy for the requests sent to the RD Station api.
+
+The backoff grows exponentially from `backoff` seconds and is capped by
+`settings.RDSTATION['endpoints']['time_sleep']`, with full jitter so the
+workers do not retry in lockstep. When the server answers with a
+`Retry-After` header, that exact wait is used instead, as long as it is
+within the cap; a longer one gives up the retries, the response is returned
+to the caller instead of holding the request for as long as the server asks.
+
+ref: https://developers.rdstation.com/en/request-limit
+"""
+
+import time
+import random
+from email.utils import parsedate_to_datetime
+
+import settings
+
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# the server did not process the request, so it is safe for any method
+UNPROCESSED_STATUSES = (429,)
+
+
+def parse_retry_after(value):
+	"""
+	method responsible for parsing a `Retry-After` header.
+
+	:param value: delay in seconds or http date.
+	:return: seconds to wait, None when absent or invalid.
+	"""
+	if not value:
+		return None
+	try:
+		return max(float(value), 0.0)
+	except ValueError:
+		pass
+	try:
+		return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+	except (TypeError, ValueError):
+		return None
+
+
+class RDSRetryPolicy():
+	""" Exponential backoff with jitter honouring `Retry-After`.
+
+	usage:
+		client = RDStationRestClient(credentials, retry_policy=RDSRetryPolicy(max_retries=3))
+		RDEvent.retry_policy = RDSRetryPolicy(methods=("POST",))
+	"""
+
+	def __init__(self, max_retries=None, backoff=0.5, max_backoff=None, # pylint: disable=too-many-arguments
+	             jitter=True, methods=IDEMPOTENT_METHODS, statuses=RETRY_STATUSES):
+		endpoints = settings.RDSTATION['endpoints']
+		self.max_retries = endpoints['max_retries'] if max_retries is None else max_retries
+		self.max_backoff = endpoints['time_sleep'] if max_backoff is None else max_backoff
+		self.backoff = backoff
+		self.jitter = jitter
+		self.methods = tuple(method.upper() for method in methods)
+		self.statuses = tuple(statuses)
+
+	def should_retry(self, method, attempt, status=None, exception=None):
+		"""
+		method responsible for deciding if a request must be sent again.
+
+		:param method: http method of the request.
+		:param attempt: number of retries already made.
+		:param status: http status of the response.
+		:param exception: connection error raised while sending the request.
+		:return: True when the request must be retried.
+		"""
+		if attempt >= self.max_retries:
+			return False
+		if status in UNPROCESSED_STATUSES and status in self.statuses:
+			return True
+		if method.upper() not in self.methods:
+			return False
+		return exception is not None or status in self.statuses
+
+	def delay(self, attempt, retry_after=None):
+		"""
+		method responsible for computing the wait before the next attempt.
+
+		:param attempt: number of retries already made.
+		:param retry_after: value of the `Retry-After` header.
+		:return: seconds to wait, None when the `Retry-After` exceeds `max_backoff`.
+		"""
+		seconds = parse_retry_after(retry_after)
+		if seconds is not None:
+			return seconds if seconds <= self.max_backoff else None
+		ceiling = min(self.max_backoff, self.backoff * (2 ** attempt))
+		return random.uniform(0, ceiling) if self.jitter else ceiling
+
+
+# end-of-file
@@ -0,0 +1,131 @@
+""" Single-flight execution of identical concurrent requests.
+
+While a call for a key is in flight, other callers asking for the same key
+wait for it and receive its very result (or exception) instead of issuing
+their own request.
+"""
+
+import asyncio
+import threading
+
+
+class _Call():
+	""" Call in flight shared by the waiters of a key. """
+
+	def __init__(self):
+		self.event = threading.Event()
+		self.done = False
+		self.result = None
+		self.error = None
+
+
+class RDSSingleFlight():
+	""" Collapses concurrent calls sharing a key, for threads and asyncio.
+
+	When the leader of a key is interrupted before finishing, e.g. its task is
+	cancelled, the waiters are not given its interruption: they send the call
+	again, one of them leading it.
+
+	usage:
+		flight = RDSSingleFlight()
+		response = flight.do(key, client.dispatch, resource, "GET", url)
+		response = await flight.do_async(key, client.dispatch, resource, "GET", url)
+	"""
+
+	def __init__(self):
+		self.calls = 0
+		self.shared = 0
+		self._calls = {}
+		self._futures = {}
+		self._lock = threading.Lock()
+
+	def do(self, key, function, *args, **kwargs):
+		"""
+		method responsible for running the function once per key in flight.
+
+		:param key: hashable key identifying identical calls.
+		:param function: callable producing the result.
+		:return: the result of the call, shared by every waiter.
+		"""
+		while True:
+			with self._lock:
+				call = self._calls.get(key)
+				leader = call is None
+				if leader:
+					call = self._calls[key] = _Call()
+					self.calls += 1
+				else:
+					self.shared += 1
+			if leader:
+				return self._lead(key, call, function, args, kwargs)
+			call.event.wait()
+			if not call.done:
+				continue
+			if call.error is not None:
+				raise call.error
+			return call.result
+
+	def _lead(self, key, call, function, args, kwargs):
+		try:
+			call.result = function(*args, **kwargs)
+			call.done = True
+			return call.result
+		except Exception as error:
+			call.error = error
+			call.done = True
+			raise
+		finally:
+			# set even when interrupted, so the waiters never block on a dead leader
+			with self._lock:
+				del self._calls[key]
+			call.event.set()
+
+	async def do_async(self, key, function, *args, **kwargs):
+		"""
+		coroutine version of :meth:`do`, `function` must return an awaitable.
+		"""
+		while True:
+			future = self._futures.get(key)
+			if future is None:
+				return await self._lead_async(key, function, args, kwargs)
+			self.shared += 1
+			try:
+				return await asyncio.shield(future)
+			except asyncio.CancelledError:
+				if not future.cancelled():
+					# the waiter itself was cancelled
+					raise
+
+	async def _lead_async(self, key, function, args, kwargs):
+		future = self._futures[key] = asyncio.get_running_loop().create_future()
+		self.calls += 1
+		try:
+			result = await function(*args, **kwargs)
+		except Exception as error:
+			future.set_exception(error)
+			# retrieved here so a key without waiters does not log a warning
+			future.exception()
+			raise
+		except BaseException:
+			# cancelled leader, the waiters send the call again
+			future.cancel()
+			raise
+		else:
+			future.set_result(result)
+			return result
+		finally:
+			if self._futures.get(key) is future:
+				del self._futures[key]
+
+	def stats(self):
+		"""
+		method responsible for reporting how many calls were collapsed.
+
+		:return: dict with calls sent, shared results and keys in flight.
+		"""
+		with self._lock:
+			in_flight = len(self._calls) + len(self._futures)
+		return {'calls': self.calls, 'shared': self.shared, 'in_flight': in_flight}
+
+
+# end-of-file
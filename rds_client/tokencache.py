@@ -0,0 +1,126 @@
+""" On-disk cache of the access tokens, shared by the processes of a host.
+
+Each account has a JSON file with its access token, refresh token and
+absolute expiry, written atomically, and a lock file. A process starting
+with a still valid token in the cache uses it right away; a process renewing
+the token holds the exclusive lock of its account, so the others wait
+for, and then read, the token it stored instead of renewing it themselves.
+
+The locks use `fcntl.flock`; where it is not available the cache still
+shares the tokens, without the cross-process exclusion of the renewals.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+
+
+class RDSTokenCacheLock():
+	""" Exclusive lock of the tokens of an account, across processes and threads. """
+
+	def __init__(self, path, local):
+		self.path = path
+		self._local = local
+		self._fd = None
+
+	def acquire(self):
+		""" method responsible for blocking until the lock is held. """
+		self._local.acquire()
+		try:
+			self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+			if fcntl is not None:
+				fcntl.flock(self._fd, fcntl.LOCK_EX)
+		except BaseException:
+			if self._fd is not None:
+				os.close(self._fd)
+				self._fd = None
+			self._local.release()
+			raise
+
+	def release(self):
+		""" method responsible for releasing the lock. """
+		try:
+			if fcntl is not None:
+				fcntl.flock(self._fd, fcntl.LOCK_UN)
+			os.close(self._fd)
+		finally:
+			self._fd = None
+			self._local.release()
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb):
+		self.release()
+
+
+class RDSTokenCache():
+	""" Directory of cached tokens, one file per account.
+
+	usage:
+		client = RDStationRestClient(credentials, token_cache=RDSTokenCache('/var/cache/rdstation'))
+	"""
+
+	def __init__(self, directory):
+		self.directory = directory
+		self._locks = {}
+		self._guard = threading.Lock()
+		os.makedirs(directory, mode=0o700, exist_ok=True)
+
+	def _path(self, account_id, suffix):
+		name = hashlib.sha256(str(account_id).encode('utf-8')).hexdigest()
+		return os.path.join(self.directory, f'{name}{suffix}')
+
+	def lock(self, account_id):
+		"""
+		method responsible for returning the renewal lock of an account.
+
+		:return: `<rds_client.tokencache.RDSTokenCacheLock>`.
+		"""
+		with self._guard:
+			local = self._locks.setdefault(account_id, threading.Lock())
+		return RDSTokenCacheLock(self._path(account_id, '.lock'), local)
+
+	def load(self, account_id):
+		"""
+		method responsible for reading the cached tokens of an account.
+
+		:return: dict with access_token, refresh_token and expires_at, None when absent.
+		"""
+		try:
+			with open(self._path(account_id, '.json'), encoding='utf-8') as source:
+				return json.load(source)
+		except (FileNotFoundError, ValueError):
+			return None
+
+	def store(self, account_id, tokens):
+		"""
+		method responsible for atomically writing the tokens of an account.
+
+		:param tokens: dict with access_token, refresh_token and expires_at.
+		"""
+		path = self._path(account_id, '.json')
+		temporary = f'{path}.{os.getpid()}.tmp'
+		fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+		with os.fdopen(fd, 'w', encoding='utf-8') as target:
+			json.dump(tokens, target)
+			target.flush()
+			os.fsync(target.fileno())
+		os.replace(temporary, path)
+
+	def clear(self, account_id):
+		""" method responsible for dropping the cached tokens of an account. """
+		try:
+			os.remove(self._path(account_id, '.json'))
+		except FileNotFoundError:
+			pass
+
+
+# end-of-file
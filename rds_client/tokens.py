@@ -0,0 +1,527 @@
+""" Management of the OAuth access token of the client.
+
+The manager keeps the access token with its absolute expiry, as returned by
+`auth/token`, and renews it through the refresh token (or the code grant when
+there is no refresh token yet). Concurrent callers needing a renewal, threads
+and asyncio tasks alike, share a single refresh in flight, and a background
+refresher renews the token ahead of its expiry, so the requests never wait on
+the auth endpoint. A token of unknown expiry is not polled: the refresher
+sleeps until a renewal tells it the expiry.
+
+The managers of many accounts share one `RDSTokenScheduler`, a single thread
+renewing each token when its time comes, instead of a thread per account.
+
+ref: https://developers.rdstation.com/en/authentication
+"""
+
+import time
+import heapq
+import asyncio
+import logging
+import threading
+from itertools import count
+from concurrent.futures import Future
+from concurrent.futures import CancelledError
+
+from exceptions import RDStationException
+from exceptions import RDUnauthorizedRequest
+from response import mapped_errors
+from resources.auth import RDGettingAcessToken
+from resources.auth import RDRefreshExpiredToken
+
+
+LOG = logging.getLogger(__name__)
+
+
+def is_unauthorized(error):
+	""" True when the api rejected the access token of a request """
+	if getattr(error, 'status_code', None) == 401:
+		return True
+	return any(isinstance(item, RDUnauthorizedRequest) for item in mapped_errors(error))
+
+
+class RDSTokenManager():
+	""" Thread and asyncio safe holder of the access token of a client.
+
+	usage:
+		client = RDStationRestClient(credentials)
+		client.connect()  # fetches the token and starts the background refresher
+		...
+		client.get_token_manager.stop()
+	"""
+
+	def __init__(self, client, refresh_margin=300, expiry_skew=10, retry_backoff=5.0, cache=None, # pylint: disable=too-many-arguments
+	             scheduler=None):
+		"""
+		:param client: instance of `<rds_client.RDStationRestClient>`.
+		:param refresh_margin: seconds before the expiry the background refresher renews the token.
+		:param expiry_skew: seconds before the expiry a token is no longer handed out.
+		:param retry_backoff: seconds between the attempts of the background refresher.
+		:param cache: `<rds_client.tokencache.RDSTokenCache>` sharing the tokens with other processes.
+		:param scheduler: `<rds_client.tokens.RDSTokenScheduler>` renewing the token in place of
+		a refresher thread of its own.
+		"""
+		credentials = client.client
+		self.client = client
+		self.refresh_margin = refresh_margin
+		self.expiry_skew = expiry_skew
+		self.retry_backoff = retry_backoff
+		self.access_token = credentials.access_token
+		self.refresh_token = credentials.refresh_token
+		# absolute expiry, None while unknown (a token given in the credentials)
+		self.expires_at = None
+		self.refreshes = 0
+		self._lock = threading.Lock()
+		# renewal in flight, shared by the threads and the asyncio tasks
+		self._renewal = None
+		self._stopping = threading.Event()
+		# set by each renewal and by `stop`, waking the background refresher
+		self._changed = threading.Event()
+		self._changed_async = None
+		self._loop = None
+		self._thread = None
+		self._task = None
+		self.scheduler = scheduler
+		self._scheduled = False
+		self.cache = cache
+		if cache is not None:
+			self.load_cached()
+
+	@property
+	def can_authenticate(self):
+		""" True when a token is held or can be obtained """
+		return bool(self.access_token or self.refresh_token or self.client.client.code)
+
+	@property
+	def expires_in(self):
+		""" seconds left before the access token expires, None when unknown """
+		if self.expires_at is None:
+			return None
+		return max(self.expires_at - time.time(), 0.0)
+
+	def valid(self, now=None):
+		""" True when the access token can still be sent """
+		if not self.access_token:
+			return False
+		if self.expires_at is None:
+			return True
+		return (now or time.time()) < self.expires_at - self.expiry_skew
+
+	def token(self):
+		"""
+		method responsible for returning a usable access token, refreshing it
+		first when it expired.
+
+		:return: the access token, None when the client has no credentials to obtain one.
+		"""
+		if self.valid():
+			return self.access_token
+		if not self.can_authenticate:
+			return None
+		return self.refresh()
+
+	async def token_async(self):
+		"""
+		coroutine version of :meth:`token`.
+		"""
+		if self.valid():
+			return self.access_token
+		if not self.can_authenticate:
+			return None
+		return await self.refresh_async()
+
+	def refresh(self, stale=None):
+		"""
+		method responsible for renewing the access token, once for every caller
+		asking concurrently, threads and asyncio tasks alike.
+
+		:param stale: the token rejected by the api, the renewal is skipped when
+		another caller already replaced it.
+		:return: the new access token.
+		"""
+		while True:
+			if stale is not None and self.access_token != stale and self.valid():
+				return self.access_token
+			renewal, leader = self._join_renewal()
+			if leader:
+				return self._lead_renewal(renewal)
+			try:
+				return renewal.result()
+			except CancelledError:
+				if not renewal.cancelled():
+					raise
+				# the leader was interrupted, the renewal is tried again
+
+	async def refresh_async(self, stale=None):
+		"""
+		coroutine version of :meth:`refresh`, waiting on the renewal of a
+		thread, if any, without blocking the event loop.
+		"""
+		while True:
+			if stale is not None and self.access_token != stale and self.valid():
+				return self.access_token
+			renewal, leader = self._join_renewal()
+			if leader:
+				return await self._lead_renewal_async(renewal)
+			try:
+				# shielded, the cancellation of a waiter must not cancel the renewal
+				return await asyncio.shield(asyncio.wrap_future(renewal))
+			except asyncio.CancelledError:
+				if not renewal.cancelled():
+					raise
+
+	def _join_renewal(self):
+		with self._lock:
+			if self._renewal is not None:
+				return self._renewal, False
+			self._renewal = Future()
+			return self._renewal, True
+
+	def _lead_renewal(self, renewal):
+		try:
+			token = self._refresh()
+		except Exception as error:
+			renewal.set_exception(error)
+			raise
+		except BaseException:
+			renewal.cancel()
+			raise
+		else:
+			renewal.set_result(token)
+			return token
+		finally:
+			with self._lock:
+				self._renewal = None
+
+	async def _lead_renewal_async(self, renewal):
+		try:
+			token = await self._refresh_async()
+		except Exception as error:
+			renewal.set_exception(error)
+			raise
+		except BaseException:
+			renewal.cancel()
+			raise
+		else:
+			renewal.set_result(token)
+			return token
+		finally:
+			with self._lock:
+				self._renewal = None
+
+	def _grant(self):
+		credentials = self.client.client
+		if self.refresh_token:
+			resource = RDRefreshExpiredToken(self.client)
+			return resource(credentials.client_id, credentials.client_secret, self.refresh_token)
+		return RDGettingAcessToken(self.client)()
+
+	def load_cached(self):
+		"""
+		method responsible for adopting the token of the cache, when it is valid
+		and newer than the one held.
+
+		:return: the adopted access token, None when the cache has none better.
+		"""
+		cached = self.cache.load(self.client.get_account_id)
+		if not cached or not cached.get('access_token') or cached['access_token'] == self.access_token:
+			return None
+		expires_at = cached.get('expires_at')
+		if expires_at is not None and time.time() >= expires_at - self.expiry_skew:
+			return None
+		if self.expires_at is not None and (expires_at is None or expires_at < self.expires_at):
+			return None
+		with self._lock:
+			self.access_token = cached['access_token']
+			self.refresh_token = cached.get('refresh_token') or self.refresh_token
+			self.expires_at = expires_at
+		LOG.debug("access token loaded from the cache.")
+		self._notify()
+		return self.access_token
+
+	def store_cached(self):
+		""" method responsible for writing the held tokens to the cache. """
+		with self._lock:
+			tokens = {
+				'access_token': self.access_token,
+				'refresh_token': self.refresh_token,
+				'expires_at': self.expires_at
+			}
+		self.cache.store(self.client.get_account_id, tokens)
+
+	def _refresh(self):
+		if self.cache is None:
+			return self._renew()
+		# one process renews, the others wait for the lock and read its token
+		with self.cache.lock(self.client.get_account_id):
+			token = self.load_cached()
+			if token is None:
+				token = self._renew()
+				self.store_cached()
+			return token
+
+	async def _refresh_async(self):
+		if self.cache is None:
+			return await self._renew_async()
+		lock = self.cache.lock(self.client.get_account_id)
+		acquiring = asyncio.get_running_loop().run_in_executor(None, lock.acquire)
+		try:
+			await asyncio.shield(acquiring)
+		except asyncio.CancelledError:
+			# the executor goes on blocking, the lock is released as soon as it is held
+			def abandon(future):
+				if not future.cancelled() and future.exception() is None:
+					lock.release()
+			acquiring.add_done_callback(abandon)
+			raise
+		try:
+			token = self.load_cached()
+			if token is None:
+				token = await self._renew_async()
+				self.store_cached()
+			return token
+		finally:
+			lock.release()
+
+	def _renew(self):
+		try:
+			return self.update(self._grant())
+		except RDStationException as error:
+			if not self.refresh_token or not self.client.client.code:
+				raise
+			# refresh token revoked, falls back to the code grant
+			LOG.warning(f"refresh token rejected, using the code grant: {error}")
+			self.refresh_token = None
+			return self.update(self._grant())
+
+	async def _renew_async(self):
+		try:
+			return self.update(await self._grant())
+		except RDStationException as error:
+			if not self.refresh_token or not self.client.client.code:
+				raise
+			LOG.warning(f"refresh token rejected, using the code grant: {error}")
+			self.refresh_token = None
+			return self.update(await self._grant())
+
+	def update(self, data):
+		"""
+		method responsible for storing the tokens returned by the auth endpoint.
+
+		:param data: `<rds_client.RDSJsonResponse>` or dict with access_token,
+		expires_in and refresh_token.
+		:return: the new access token.
+		"""
+		access_token = data.get('access_token')
+		if not access_token:
+			raise RDStationException("auth response has no access token.")
+		expires_in = data.get('expires_in')
+		with self._lock:
+			self.access_token = access_token
+			self.refresh_token = data.get('refresh_token') or self.refresh_token
+			self.expires_at = time.time() + float(expires_in) if expires_in else None
+			self.refreshes += 1
+		LOG.debug(f"access token renewed, expires-in: {expires_in}")
+		self._notify()
+		return access_token
+
+	def _notify(self):
+		# wakes the background refresher, to schedule the renewal of the new token
+		self._changed.set()
+		if self._scheduled:
+			self.scheduler.schedule(self)
+		loop, changed = self._loop, self._changed_async
+		if changed is not None:
+			try:
+				loop.call_soon_threadsafe(changed.set)
+			except RuntimeError:
+				# loop closed, its refresher is gone
+				pass
+
+	def next_refresh(self):
+		""" seconds until the background refresher renews the token """
+		if self.expires_at is None:
+			return None
+		return max(self.expires_at - self.refresh_margin - time.time(), 0.0)
+
+	def start(self):
+		""" method responsible for starting the background refresher thread, or scheduling the renewals. """
+		if self.scheduler is not None:
+			self._stopping.clear()
+			self._scheduled = True
+			self.scheduler.schedule(self)
+			return
+		if self._thread is not None and self._thread.is_alive():
+			return
+		self._stopping.clear()
+		self._thread = threading.Thread(target=self._run, name='rds-token-refresher', daemon=True)
+		self._thread.start()
+
+	def stop(self, timeout=None):
+		""" method responsible for stopping the background refresher. """
+		self._stopping.set()
+		if self._scheduled:
+			self._scheduled = False
+			self.scheduler.cancel(self)
+		self._notify()
+		if self._thread is not None:
+			self._thread.join(timeout)
+		if self._task is not None:
+			self._task.cancel()
+			self._task = None
+			self._changed_async = None
+
+	def wait(self, timeout=None):
+		"""
+		method responsible for blocking while the background refresher runs.
+
+		:return: True when the refresher stopped.
+		"""
+		return self._stopping.wait(timeout)
+
+	def _run(self):
+		while True:
+			self._changed.clear()
+			if self._stopping.is_set():
+				return
+			# without an expiry, sleeps until a renewal or `stop`
+			if self._changed.wait(self.next_refresh()):
+				continue
+			try:
+				self.refresh()
+			except Exception as error: # pylint: disable=broad-except
+				LOG.error(f"background token refresh failed: {error}")
+				if self._stopping.wait(self.retry_backoff):
+					return
+
+	def start_async(self):
+		""" method responsible for starting the background refresher as an asyncio task. """
+		if self._task is None or self._task.done():
+			self._stopping.clear()
+			self._loop = asyncio.get_running_loop()
+			self._changed_async = asyncio.Event()
+			self._task = self._loop.create_task(self._run_async(self._changed_async))
+
+	async def _run_async(self, changed):
+		while True:
+			changed.clear()
+			if self._stopping.is_set():
+				return
+			try:
+				await asyncio.wait_for(changed.wait(), self.next_refresh())
+				continue
+			except asyncio.TimeoutError:
+				pass
+			try:
+				await self.refresh_async()
+			except Exception as error: # pylint: disable=broad-except
+				LOG.error(f"background token refresh failed: {error}")
+				await asyncio.sleep(self.retry_backoff)
+
+
+class RDSTokenScheduler():
+	""" Single background refresher of the tokens of many managers.
+
+	The renewals are kept in a heap by due time; a manager is scheduled again
+	each time its token changes, and left out while its expiry is unknown.
+
+	usage:
+		scheduler = RDSTokenScheduler()
+		for credentials in accounts:
+			RDStationRestClient(credentials, token_scheduler=scheduler).connect()
+		...
+		scheduler.stop()
+	"""
+
+	def __init__(self):
+		self.refreshes = 0
+		self.failures = 0
+		self._condition = threading.Condition()
+		self._heap = []
+		# manager -> due time of its live entry of the heap, the others are stale
+		self._due = {}
+		self._order = count()
+		self._closed = False
+		self._thread = None
+
+	def schedule(self, manager, delay=None):
+		"""
+		method responsible for planning the next renewal of a manager.
+
+		:param manager: `<rds_client.tokens.RDSTokenManager>`.
+		:param delay: seconds until the renewal, `manager.next_refresh()` by default.
+		"""
+		if delay is None:
+			delay = manager.next_refresh()
+		with self._condition:
+			if self._closed:
+				return
+			if delay is None:
+				self._due.pop(manager, None)
+			else:
+				due = time.monotonic() + delay
+				self._due[manager] = due
+				heapq.heappush(self._heap, (due, next(self._order), manager))
+			self._condition.notify()
+		self.start()
+
+	def cancel(self, manager):
+		""" method responsible for dropping the renewals of a manager. """
+		with self._condition:
+			self._due.pop(manager, None)
+			self._condition.notify()
+
+	def __len__(self):
+		return len(self._due)
+
+	def start(self):
+		""" method responsible for starting the refresher thread, unless stopped. """
+		with self._condition:
+			if self._closed or (self._thread is not None and self._thread.is_alive()):
+				return
+			self._thread = threading.Thread(target=self._run, name='rds-token-scheduler', daemon=True)
+			self._thread.start()
+
+	def stop(self, timeout=None):
+		""" method responsible for stopping the refresher thread, the later schedules are ignored. """
+		with self._condition:
+			self._closed = True
+			self._heap.clear()
+			self._due.clear()
+			self._condition.notify()
+			thread = self._thread
+		if thread is not None and thread is not threading.current_thread():
+			thread.join(timeout)
+
+	def _next(self):
+		heap = self._heap
+		while heap:
+			due, _, manager = heap[0]
+			if self._due.get(manager) == due:
+				return manager, due - time.monotonic()
+			heapq.heappop(heap)
+		return None, None
+
+	def _run(self):
+		while True:
+			with self._condition:
+				while True:
+					if self._closed:
+						return
+					manager, wait = self._next()
+					if manager is not None and wait <= 0:
+						heapq.heappop(self._heap)
+						del self._due[manager]
+						break
+					self._condition.wait(wait)
+			try:
+				manager.refresh()
+				self.refreshes += 1
+			except Exception as error: # pylint: disable=broad-except
+				self.failures += 1
+				LOG.error(f"background token refresh failed: {error}")
+				if not manager.wait(0):
+					self.schedule(manager, manager.retry_backoff)
+
+
+# end-of-file
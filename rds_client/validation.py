@@ -0,0 +1,306 @@
+""" Local validation of the events before they are sent.
+
+The checks of each model of `events.py` are compiled once from its dataclass
+fields: required fields, field types, lowercase tags, email format and the
+structure of the legal bases. The errors use the error types of the api, so
+they map to the same exceptions `response.py` raises, without spending a
+round trip and rate limit budget on an event bound to be rejected.
+
+Dict event bodies, `{event_type, event_family, payload}`, are checked by the
+same compiled rules as the model of their event type, required fields
+included; the bodies of the custom event types, without a model, only get
+the checks of the attributes they carry.
+
+ref: https://developers.rdstation.com/en/reference/events
+"""
+
+import re
+from dataclasses import MISSING
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import fields
+from dataclasses import is_dataclass
+
+from exceptions import RDStationException
+from response import RDS_CLIENT_EXCEPTIONS
+from events import EVENT_ATTRIBUTES
+from events import RDConversionEvent
+from events import RDMarkOpportunityEvent
+from events import RDMarkOpportunityLostEvent
+from events import RDPlacedOrderEvent
+from events import RDPlacedOrderEventWithItem
+from events import RDAbandonedCartEvent
+from events import RDAbandonedCartEventWithItem
+from events import RDChatStartedEvent
+from events import RDChatFinishedEvent
+from events import RDCallFinishedEvent
+from events import RDMediaEvents
+from events import RDMediaPlaybackStoppedEvent
+
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# https://developers.rdstation.com/en/reference/contacts#legal-bases
+LEGAL_BASES = {
+	'category': ('communications',),
+	'type': (
+		'consent', 'pre_existent_contract', 'judicial_process',
+		'vital_interest', 'public_interest', 'legitimate_interest'
+	),
+	'status': ('granted', 'declined')
+}
+
+EVENT_FAMILIES = ('CDP',)
+
+# model of each event type, whose rules check the dict bodies of that type
+EVENT_MODELS = {
+	'CONVERSION': RDConversionEvent,
+	'OPPORTUNITY': RDMarkOpportunityEvent,
+	'OPPORTUNITY_LOST': RDMarkOpportunityLostEvent,
+	'ORDER_PLACED': RDPlacedOrderEvent,
+	'ORDER_PLACED_ITEM': RDPlacedOrderEventWithItem,
+	'CART_ABANDONED': RDAbandonedCartEvent,
+	'CART_ABANDONED_ITEM': RDAbandonedCartEventWithItem,
+	'CHAT_STARTED': RDChatStartedEvent,
+	'CHAT_FINISHED': RDChatFinishedEvent,
+	'CALL_FINISHED': RDCallFinishedEvent,
+	'MEDIA_PLAYBACK_STARTED': RDMediaEvents,
+	'MEDIA_PLAYBACK_STOPPED': RDMediaPlaybackStoppedEvent
+}
+
+# accepted python types per annotation of the models
+TYPES = {
+	str: (str,),
+	int: (int,),
+	float: (int, float),
+	bool: (bool,),
+	list: (list, tuple)
+}
+
+
+@dataclass
+class RDSValidationError:
+	""" Error of one field of an event, typed like the errors of the api. """
+
+	field: str
+	error_type: str
+	error_message: str
+
+	@property
+	def exception(self):
+		""" exception mapped by `response.py` for the error type """
+		exception = RDS_CLIENT_EXCEPTIONS.get(self.error_type, RDStationException)
+		return exception(f"{self.field}: {self.error_message}")
+
+
+@dataclass
+class RDSInvalidEvent:
+	""" Event rejected by the validation, with its position in the batch. """
+
+	index: int
+	event: object
+	errors: list = field(default_factory=list)
+
+	@property
+	def payload(self):
+		""" body of the events endpoint of the event """
+		return self.event.to_event() if hasattr(self.event, 'to_event') else self.event
+
+	@property
+	def exception(self):
+		""" `<rds_client.exceptions.RDStationException>` shaped like the api ones """
+		return RDStationException([error.exception for error in self.errors])
+
+
+@dataclass
+class RDSValidationReport:
+	""" Outcome of the validation of a batch of events. """
+
+	valid: list = field(default_factory=list)
+	invalid: list = field(default_factory=list)
+
+	@property
+	def ok(self):
+		""" True when every event is valid """
+		return not self.invalid
+
+
+def check_type(types, error_type):
+	""" check of the python type of a value """
+	def check(value):
+		if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+			return error_type, f"must be {' or '.join(item.__name__ for item in types)}."
+		return None
+	return check
+
+
+def check_email(value):
+	""" check of the format of an email """
+	if not isinstance(value, str):
+		return 'MUST_BE_STRING', "must be str."
+	if not EMAIL_PATTERN.match(value):
+		return 'INVALID_FORMAT', f"'{value}' is not a valid email."
+	return None
+
+
+def check_tags(value):
+	""" check of the tags, strings in lowercase """
+	for tag in value if isinstance(value, (list, tuple)) else ():
+		if not isinstance(tag, str):
+			return 'MUST_BE_STRING', "tags must be strings."
+		if tag != tag.lower():
+			return 'VALUES_MUST_BE_LOWERCASE', f"tag '{tag}' must be lowercase."
+	return None
+
+
+def check_legal_bases(value):
+	""" check of the legal bases, dicts of category, type and status """
+	for legal_base in value if isinstance(value, (list, tuple)) else ():
+		if not isinstance(legal_base, dict):
+			return 'INVALID', "legal bases must be objects."
+		for key, accepted in LEGAL_BASES.items():
+			if legal_base.get(key) not in accepted:
+				return 'INVALID', f"legal base {key} must be one of {', '.join(accepted)}."
+	return None
+
+
+def check_event_family(value):
+	""" check of the family of the event """
+	if isinstance(value, str) and value not in EVENT_FAMILIES:
+		return 'INCLUSION', f"event family must be one of {', '.join(EVENT_FAMILIES)}."
+	return None
+
+
+# checks of the attributes known by name, whatever the model
+NAMED_CHECKS = {
+	'email': check_email,
+	'tags': check_tags,
+	'legal_bases': check_legal_bases,
+	'event_family': check_event_family
+}
+
+
+class RDSEventValidator():
+	""" Validator of the `events.py` models and of dict event bodies.
+
+	usage:
+		validator = RDSEventValidator()
+		report = validator.validate_batch(events)
+		client.create_event_batch([event.to_event() for event in report.valid])
+		for invalid in report.invalid:
+			LOG.error(f"event {invalid.index}: {invalid.errors}")
+	"""
+
+	def __init__(self):
+		# (model, body) -> compiled validation function
+		self._compiled = {}
+
+	def compile(self, model, body=False):
+		"""
+		method responsible for generating the validation function of a model,
+		once, inlining the checks of each field.
+
+		:param model: dataclass of `events.py`.
+		:param body: generate the function checking the dict bodies of the model,
+		reading the fields from the payload instead of the attributes.
+		:return: function(event) -> list of `<rds_client.validation.RDSValidationError>`,
+		function(event, payload) for the bodies.
+		"""
+		compiled = self._compiled.get((model, body))
+		if compiled is not None:
+			return compiled
+		namespace = {'ERROR': RDSValidationError}
+		lines = ["def validate(event, payload):" if body else "def validate(self):", "\terrors = []"]
+		for item in fields(model):
+			name = item.name
+			required = item.default is MISSING and item.default_factory is MISSING
+			if not body:
+				lines.append(f"\tvalue = self.{name}")
+			elif name in EVENT_ATTRIBUTES:
+				# `event_tye` of some models is the `event_type` of the body
+				name = 'event_family' if name == 'event_family' else 'event_type'
+				lines.append(f"\tvalue = event.get('{name}')")
+			else:
+				lines.append(f"\tvalue = payload.get('{name}')")
+			lines.append("\tif value is None:")
+			lines.append(f"\t\terrors.append(ERROR('{name}', 'CANNOT_BE_NULL', 'is required.'))"
+			             if required else "\t\tpass")
+			if required and item.type is str:
+				lines += [
+					"\telif isinstance(value, str) and not value.strip():",
+					f"\t\terrors.append(ERROR('{name}', 'CANNOT_BE_BLANK', 'can not be blank.'))"
+				]
+			if item.type in TYPES:
+				types = TYPES[item.type]
+				namespace[f'TYPES_{name}'] = types
+				condition = f"not isinstance(value, TYPES_{name})"
+				if bool not in types:
+					condition += " or value.__class__ is bool"
+				message = f"must be {' or '.join(kind.__name__ for kind in types)}."
+				error_type = 'MUST_BE_STRING' if item.type is str else 'INVALID'
+				lines += [f"\telif {condition}:", f"\t\terrors.append(ERROR('{name}', '{error_type}', '{message}'))"]
+			if name in NAMED_CHECKS:
+				namespace[f'CHECK_{name}'] = NAMED_CHECKS[name]
+				lines += [
+					f"\telif (error := CHECK_{name}(value)) is not None:",
+					f"\t\terrors.append(ERROR('{name}', *error))"
+				]
+		lines.append("\treturn errors")
+		exec("\n".join(lines), namespace) # pylint: disable=exec-used
+		compiled = self._compiled[(model, body)] = namespace['validate']
+		return compiled
+
+	def validate(self, event):
+		"""
+		method responsible for validating an event.
+
+		:param event: instance of `<rds_client.events.RDRequestBody>` or dict event body.
+		:return: list of `<rds_client.validation.RDSValidationError>`, empty when valid.
+		"""
+		if is_dataclass(event):
+			return self.compile(type(event))(event)
+		return self._validate_body(event)
+
+	def validate_batch(self, events):
+		"""
+		method responsible for validating a batch of events in a single pass.
+
+		:param events: iterable of events.
+		:return: `<rds_client.validation.RDSValidationReport>`.
+		"""
+		report = RDSValidationReport()
+		for index, event in enumerate(events):
+			errors = self.validate(event)
+			if errors:
+				report.invalid.append(RDSInvalidEvent(index, event, errors))
+			else:
+				report.valid.append(event)
+		return report
+
+	def _validate_body(self, event):
+		if not isinstance(event, dict):
+			return [RDSValidationError('event', 'INVALID', "must be an object.")]
+		errors = []
+		if not event.get('event_type'):
+			errors.append(RDSValidationError('event_type', 'CANNOT_BE_NULL', "is required."))
+		error = check_event_family(event.get('event_family'))
+		if not event.get('event_family'):
+			errors.append(RDSValidationError('event_family', 'CANNOT_BE_NULL', "is required."))
+		elif error is not None:
+			errors.append(RDSValidationError('event_family', *error))
+		payload = event.get('payload')
+		if not isinstance(payload, dict):
+			errors.append(RDSValidationError('payload', 'INVALID', "must be an object."))
+			return errors
+		model = EVENT_MODELS.get(event.get('event_type'))
+		if model is not None:
+			return self.compile(model, body=True)(event, payload)
+		for name, check in NAMED_CHECKS.items():
+			if name != 'event_family' and payload.get(name) is not None:
+				error = check(payload[name])
+				if error is not None:
+					errors.append(RDSValidationError(name, *error))
+		return errors
+
+
+# end-of-file
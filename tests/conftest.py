@@ -0,0 +1,135 @@
+""" Fixtures of the test suite.
+
+The modules of `rds_client` import each other by their flat names, so the
+package directory goes in `sys.path` as it does for the benchmarks. The `api`
+fixture is a local http server standing in for the RD Station api.
+"""
+
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rds_client'))
+
+# pylint: disable=wrong-import-position
+from retry import RDSRetryPolicy
+from rest_client import RDStationClient
+from rest_client import RDStationRestClient
+
+
+class FakeRequest():
+	""" Request received by the fake api. """
+
+	def __init__(self, command, path, headers, body):
+		self.command = command
+		self.path = path
+		self.headers = headers
+		self.body = body
+
+	@property
+	def json(self):
+		""" decoded body of the request """
+		return json.loads(self.body) if self.body else None
+
+
+class FakeApi():
+	""" Local api answering each path prefix with a route, an echo of the request by default.
+
+	usage:
+		api.route('/platform/contacts', lambda request: (404, {}, {'errors': [...]}))
+		client.get_contacts_by_uiid('u1')
+		assert api.requests[-1].path == '/platform/contacts/u1'
+	"""
+
+	def __init__(self):
+		self.routes = {}
+		self.requests = []
+		self._lock = threading.Lock()
+		self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+		self.server.daemon_threads = True
+		self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+		self.route('/auth/token', lambda request: (200, {}, {
+			'access_token': 'token', 'refresh_token': 'refresh', 'expires_in': 86400}))
+		threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+	def route(self, prefix, answer):
+		"""
+		:param answer: callable(request) returning (status, headers, body), a dict or
+		list body is sent as json, bytes as they are.
+		"""
+		self.routes[prefix] = answer
+
+	def calls(self, prefix=''):
+		""" requests whose path starts with `prefix` """
+		with self._lock:
+			return [request for request in self.requests if request.path.startswith(prefix)]
+
+	def _handler(self):
+		api = self
+
+		class Handler(BaseHTTPRequestHandler):
+			protocol_version = 'HTTP/1.1'
+
+			def log_message(self, *args): # pylint: disable=arguments-differ
+				pass
+
+			def _answer(self):
+				length = int(self.headers.get('Content-Length') or 0)
+				# the handler serves every request of a keep-alive connection, each one is recorded apart
+				request = FakeRequest(self.command, self.path, dict(self.headers),
+				                      self.rfile.read(length) if length else b'')
+				with api._lock: # pylint: disable=protected-access
+					api.requests.append(request)
+				for prefix in sorted(api.routes, key=len, reverse=True):
+					if request.path.startswith(prefix):
+						status, headers, body = api.routes[prefix](request)
+						break
+				else:
+					status, headers, body = 200, {}, {'method': request.command, 'path': request.path}
+				if not isinstance(body, bytes):
+					body = json.dumps(body).encode('utf-8')
+				self.send_response(status)
+				for name, value in headers.items():
+					self.send_header(name, value)
+				self.send_header('Content-Length', str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _answer
+
+		return Handler
+
+	def close(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+
+@pytest.fixture
+def api():
+	""" local api, closed after the test """
+	fake = FakeApi()
+	yield fake
+	fake.close()
+
+
+@pytest.fixture
+def credentials():
+	""" credentials with a code grant """
+	return RDStationClient('client-id', 'client-secret', code='code')
+
+
+@pytest.fixture
+def client(api, credentials):
+	""" client of the local api, without rate limit nor retry delays """
+	rest_client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None,
+	                                  retry_policy=RDSRetryPolicy(backoff=0.0, jitter=False))
+	yield rest_client
+	rest_client.get_token_manager.stop()
+
+
+# end-of-file
@@ -0,0 +1,101 @@
+""" Tests of the asyncio client and of the per call routes of the resources. """
+
+import asyncio
+import threading
+
+import pytest
+
+from async_client import AsyncRDStationRestClient
+from deadletter import RDSDeadLetterStore
+from exceptions import RDStationException
+from retry import RDSRetryPolicy
+
+
+def async_client(api, credentials, **kwargs):
+	return AsyncRDStationRestClient(credentials, endpoint=api.url, rate_limiter=None,
+	                                retry_policy=RDSRetryPolicy(backoff=0.0, jitter=False), **kwargs)
+
+
+def test_concurrent_requests_keep_their_own_path(api, credentials):
+	async def fetch():
+		async with async_client(api, credentials) as rds:
+			return await asyncio.gather(*(rds.get_contacts_by_uiid(f'u{index}') for index in range(20)))
+	responses = asyncio.run(fetch())
+	assert [response['path'] for response in responses] == [
+		f'/platform/contacts/u{index}' for index in range(20)]
+	assert all(request.headers['Authorization'] == 'Bearer token' for request in api.calls('/platform'))
+
+
+def test_sync_contacts_by_email_are_quoted_per_call(client, api):
+	client.get_contacts_by_email('a+b@c.d')
+	client.get_contacts_by_uiid('u1')
+	assert [request.path for request in api.calls('/platform')] == [
+		'/platform/contacts/email:a%2Bb@c.d', '/platform/contacts/u1']
+
+
+def test_async_errors_are_mapped(api, credentials):
+	api.route('/platform/contacts', lambda request: (404, {}, {
+		'errors': {'error_type': 'RESOURCE_NOT_FOUND', 'error_message': 'not found'}}))
+	async def fetch():
+		async with async_client(api, credentials) as rds:
+			await rds.get_contacts_by_uiid('missing')
+	with pytest.raises(RDStationException):
+		asyncio.run(fetch())
+
+
+def test_async_token_is_renewed_once_on_unauthorized(api, credentials):
+	answers = iter([(401, {}, {'errors': {'error_type': 'UNAUTHORIZED', 'error_message': 'expired'}}),
+	                (200, {}, {'uuid': 'u1'})])
+	api.route('/platform/contacts', lambda request: next(answers))
+	async def fetch():
+		async with async_client(api, credentials) as rds:
+			return await rds.get_contacts_by_uiid('u1')
+	assert dict(asyncio.run(fetch())) == {'uuid': 'u1'}
+	assert len(api.calls('/auth/token')) == 2
+
+
+def test_async_contacts_many_yields_each_identifier_once(api, credentials):
+	async def fetch():
+		async with async_client(api, credentials) as rds:
+			return [identifier async for identifier, _ in rds.get_contacts_many(['u1', 'u2', 'u1'], max_workers=2)]
+	assert sorted(asyncio.run(fetch())) == ['u1', 'u2']
+
+
+
+def test_async_dead_letters_are_written_off_the_loop(api, credentials, tmp_path):
+	store = RDSDeadLetterStore(str(tmp_path / 'dead-letters.db'))
+	writers, record = [], store.record
+
+	def recording(*args):
+		writers.append(threading.current_thread())
+		return record(*args)
+
+	store.record = recording
+	api.route('/platform/events', lambda request: (400, {}, {
+		'errors': [{'error_type': 'INVALID_FORMAT', 'error_message': 'invalid email'}]}))
+
+	async def send():
+		async with async_client(api, credentials, dead_letters=store) as rds:
+			await rds.create_event({'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {
+				'conversion_identifier': 'signup', 'email': 'a@b.c'}})
+
+	with pytest.raises(RDStationException):
+		asyncio.run(send())
+	assert len(writers) == 1 and writers[0] is not threading.main_thread()
+	assert store.summary() == {'RDInvalidFormat': 1}
+
+
+def test_async_retries_share_the_sync_bookkeeping(api, credentials):
+	api.route('/platform/contacts', lambda request: (503, {}, {}))
+
+	async def fetch():
+		async with async_client(api, credentials, circuit_breakers=None) as rds:
+			await rds.get_contacts_by_uiid('u1')
+
+	with pytest.raises(RDStationException) as raised:
+		asyncio.run(fetch())
+	assert raised.value.status_code == 503
+	assert len(api.calls('/platform/contacts')) == RDSRetryPolicy().max_retries + 1
+
+
+# end-of-file
@@ -0,0 +1,128 @@
+""" Tests of the automatic event batching. """
+
+import threading
+
+import pytest
+
+from batcher import RDEventBatcher
+from codec import CODEC
+from events import RDConversionEvent
+from exceptions import RDStationException
+from validation import RDSEventValidator
+
+
+class BatchClient():
+	""" client recording the batches, failing them while `fail` is set """
+
+	def __init__(self, fail=False):
+		self.batches = []
+		self.bodies = []
+		self.encoded = 0
+		self.fail = fail
+
+	def encode_body(self, data):
+		self.encoded += 1
+		return CODEC.dumps(data)
+
+	def create_event_batch(self, batch):
+		if self.fail:
+			raise RDStationException('unavailable')
+		self.bodies.append(batch)
+		self.batches.append(CODEC.loads(batch))
+
+
+def conversion(index, email=None):
+	return RDConversionEvent('CONVERSION', 'CDP', 'signup', email or f'contact{index}@b.c')
+
+
+def test_batches_are_flushed_by_size():
+	client = BatchClient()
+	with RDEventBatcher(client, max_items=10, linger=60) as batcher:
+		for index in range(25):
+			batcher.submit(conversion(index))
+		assert batcher.flush(5)
+	assert [len(batch) for batch in client.batches] == [10, 10, 5]
+	assert client.batches[0][0] == {'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {
+		'conversion_identifier': 'signup', 'email': 'contact0@b.c', 'available_for_mailing': False}}
+	assert batcher.stats()['sent'] == 25
+
+
+def test_batches_are_flushed_by_bytes_and_linger():
+	client = BatchClient()
+	batcher = RDEventBatcher(client, max_items=100, max_bytes=300, linger=0.05)
+	for index in range(4):
+		batcher.submit(conversion(index))
+	while batcher.stats()['sent'] < 4:
+		threading.Event().wait(0.01)
+	batcher.close()
+	assert len(client.batches) >= 2
+
+
+def test_failed_batches_are_reported():
+	failures = []
+	client = BatchClient(fail=True)
+	with RDEventBatcher(client, on_error=lambda batch, error: failures.append((len(batch), error))) as batcher:
+		batcher.submit(conversion(0))
+		batcher.submit(conversion(1))
+	assert [count for count, _ in failures] == [2]
+	assert batcher.stats()['failed'] == 2
+	with pytest.raises(RDStationException):
+		batcher.submit(conversion(2))
+
+
+def test_invalid_events_are_not_batched():
+	client = BatchClient()
+	invalid = []
+	with RDEventBatcher(client, validator=RDSEventValidator(), on_invalid=invalid.append) as batcher:
+		batcher.submit(conversion(0))
+		batcher.submit(conversion(1, email='not an email'))
+	assert [len(batch) for batch in client.batches] == [1]
+	assert [item.index for item in invalid] == [1]
+
+
+
+def test_events_are_encoded_once():
+	client = BatchClient()
+	with RDEventBatcher(client, max_items=2, linger=60) as batcher:
+		for index in range(3):
+			batcher.submit(conversion(index))
+	assert client.encoded == 3
+	assert all(isinstance(body, bytes) for body in client.bodies)
+	assert [len(batch) for batch in client.batches] == [2, 1]
+
+
+def test_unencodable_events_are_rejected_and_the_sender_survives():
+	client = BatchClient()
+	invalid = []
+	with RDEventBatcher(client, on_invalid=invalid.append) as batcher:
+		batcher.submit({'event_type': 'CONVERSION', 'payload': {'broken': object()}})
+		batcher.submit(conversion(0))
+		assert batcher.flush(5)
+	assert [item.index for item in invalid] == [0]
+	assert invalid[0].errors[0].error_type == 'INVALID_FORMAT'
+	assert [len(batch) for batch in client.batches] == [1]
+
+
+def test_failing_callbacks_do_not_stop_the_sender():
+	def fail(*args):
+		raise ValueError('callback')
+
+	client = BatchClient(fail=True)
+	batcher = RDEventBatcher(client, on_error=fail, on_invalid=fail)
+	batcher.submit({'payload': object()})
+	batcher.submit(conversion(0))
+	assert batcher.flush(5)
+	client.fail = False
+	batcher.submit(conversion(1))
+	assert batcher.flush(5)
+	batcher.close(5)
+	assert batcher.stats()['failed'] == 1 and batcher.stats()['sent'] == 1 and batcher.stats()['invalid'] == 1
+
+
+def test_flush_of_a_closed_batcher_returns_at_once():
+	batcher = RDEventBatcher(BatchClient())
+	batcher.close(5)
+	assert batcher.flush() is False
+
+
+# end-of-file
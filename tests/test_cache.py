@@ -0,0 +1,63 @@
+""" Tests of the response cache of the read endpoints. """
+
+import time
+
+from cache import RDSResponseCache
+from cache import cache_key
+from cache import cache_tags
+from rest_client import RDStationRestClient
+
+
+def test_cache_key_sorts_params_and_keeps_accounts_apart():
+	assert cache_key('u', {'b': 1, 'a': 2}) == cache_key('u', {'a': 2, 'b': 1})
+	assert cache_key('u', None, 'first') != cache_key('u', None, 'second')
+
+
+def test_cache_tags_of_a_contact_by_email():
+	tags = cache_tags('contacts', 'https://api/platform/contacts/email:a%40b.c')
+	assert tags == {'family:contacts', 'contact:email:a@b.c'}
+	assert cache_tags('fields', 'https://api/platform/contacts/fields') == {'family:fields'}
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+	cache = RDSResponseCache(ttls={'contacts': 10})
+	now = time.monotonic()
+	monkeypatch.setattr(time, 'monotonic', lambda: now)
+	cache.set('key', 'response', 'contacts', 10)
+	assert cache.get('key') == 'response'
+	monkeypatch.setattr(time, 'monotonic', lambda: now + 11)
+	assert cache.get('key') is None
+	assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+	cache = RDSResponseCache(max_entries=2)
+	cache.set('a', 1, 'contacts', 1)
+	cache.set('b', 2, 'contacts', 1)
+	cache.get('a')
+	cache.set('c', 3, 'contacts', 1)
+	assert cache.get('b') is None
+	assert cache.get('a') == 1 and cache.get('c') == 3
+	assert cache.stats()['evictions'] == 1
+
+
+def test_families_without_ttl_are_not_cached():
+	cache = RDSResponseCache()
+	cache.set('key', 'response', 'webhooks', 1)
+	assert cache.get('key') is None
+
+
+def test_client_serves_reads_from_cache_and_writes_invalidate(api, credentials):
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None,
+	                             response_cache=RDSResponseCache())
+	first = client.get_contacts_by_uiid('u1')
+	second = client.get_contacts_by_uiid('u1')
+	assert first is second
+	client.get_contacts_by_uiid('u2')
+	assert len(api.calls('/platform/contacts')) == 2
+	client.update_contacts_by_uuid('u1', {'name': 'changed'})
+	client.get_contacts_by_uiid('u1')
+	assert [request.command for request in api.calls('/platform/contacts/u1')] == ['GET', 'PATCH', 'GET']
+
+
+# end-of-file
@@ -0,0 +1,69 @@
+""" Tests of the circuit breakers. """
+
+import time
+
+import pytest
+
+from circuit import CLOSED, HALF_OPEN, OPEN
+from circuit import RDSCircuitBreaker
+from circuit import RDSCircuitBreakers
+from exceptions import RDCircuitOpen
+from exceptions import RDStationException
+from rest_client import RDStationRestClient
+from retry import RDSRetryPolicy
+
+
+def test_breaker_opens_after_the_threshold_and_recovers(monkeypatch):
+	breaker = RDSCircuitBreaker('contacts', failure_threshold=2, recovery_timeout=10)
+	now = time.monotonic()
+	monkeypatch.setattr(time, 'monotonic', lambda: now)
+	breaker.record(success=False)
+	assert breaker.state == CLOSED
+	breaker.record(success=False)
+	assert breaker.state == OPEN
+	with pytest.raises(RDCircuitOpen):
+		breaker.before_request()
+	monkeypatch.setattr(time, 'monotonic', lambda: now + 10)
+	assert breaker.state == HALF_OPEN
+	breaker.before_request()
+	with pytest.raises(RDCircuitOpen):
+		breaker.before_request()
+	breaker.record(success=True)
+	assert breaker.state == CLOSED
+
+
+def test_failed_trial_opens_the_breaker_again(monkeypatch):
+	breaker = RDSCircuitBreaker('events', failure_threshold=1, recovery_timeout=5)
+	now = time.monotonic()
+	monkeypatch.setattr(time, 'monotonic', lambda: now)
+	breaker.record(success=False)
+	monkeypatch.setattr(time, 'monotonic', lambda: now + 5)
+	breaker.before_request()
+	breaker.record(success=False)
+	assert breaker.state == OPEN
+	assert breaker.rejected == 0
+
+
+def test_breakers_are_kept_per_family():
+	breakers = RDSCircuitBreakers()
+	assert breakers.get('contacts') is breakers.get('contacts')
+	assert breakers.get('contacts') is not breakers.get('events')
+	assert breakers.get(None) is None
+	assert breakers.states() == {'contacts': CLOSED, 'events': CLOSED}
+
+
+def test_client_fails_fast_once_the_family_breaker_opened(api, credentials):
+	api.route('/platform/contacts', lambda request: (503, {}, {'errors': []}))
+	breakers = RDSCircuitBreakers(failure_threshold=2)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, circuit_breakers=breakers,
+	                             retry_policy=RDSRetryPolicy(max_retries=1, backoff=0.0, jitter=False))
+	with pytest.raises(RDStationException) as failure:
+		client.get_contacts_by_uiid('u1')
+	assert failure.value.status_code == 503
+	with pytest.raises(RDCircuitOpen):
+		client.get_contacts_by_uiid('u2')
+	assert len(api.calls('/platform/contacts')) == 2
+	assert breakers.states()['contacts'] == OPEN
+
+
+# end-of-file
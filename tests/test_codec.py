@@ -0,0 +1,48 @@
+""" Tests of the json codecs. """
+
+import pytest
+
+import codec
+from codec import RDSJSONCodec
+from codec import get_codec
+from rest_client import RDStationRestClient
+
+DOCUMENT = {'name': 'José', 'tags': ['mql', '2019'], 'value': 1.5, 'available_for_mailing': True, 'empty': None}
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'ujson'])
+def test_codecs_round_trip_to_bytes(name):
+	try:
+		selected = get_codec(name)
+	except ImportError:
+		pytest.skip(f'{name} is not installed')
+	encoded = selected.dumps(DOCUMENT)
+	assert isinstance(encoded, bytes)
+	assert selected.loads(encoded) == DOCUMENT
+	assert selected.loads(encoded.decode('utf-8')) == DOCUMENT
+	assert RDSJSONCodec().loads(selected.dumps(DOCUMENT, indent=True)) == DOCUMENT
+
+
+def test_missing_codec_is_reported(monkeypatch):
+	monkeypatch.setattr(codec, 'ujson', None)
+	with pytest.raises(ImportError):
+		get_codec('ujson')
+
+
+def test_client_sends_the_body_encoded_by_its_codec(api, credentials):
+	class RecordingCodec(RDSJSONCodec):
+		""" codec recording the objects it encoded """
+		encoded = []
+
+		def dumps(self, obj, indent=False):
+			self.encoded.append(obj)
+			return super().dumps(obj, indent)
+
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, codec=RecordingCodec())
+	client.update_contacts_by_uuid('u1', {'name': 'José'})
+	assert api.calls('/platform/contacts')[-1].json == {'name': 'José'}
+	assert {'name': 'José'} in RecordingCodec.encoded
+	assert client.encode_body(b'raw') == b'raw' and client.encode_body(None) is None
+
+
+# end-of-file
@@ -0,0 +1,47 @@
+""" Tests of the bulk concurrent contact fetch. """
+
+import pytest
+
+from exceptions import RDResourceNotFound
+from response import mapped_errors
+
+
+def not_found(request):
+	if request.path.endswith('/missing'):
+		return 404, {}, {'errors': [{'error_type': 'RESOURCE_NOT_FOUND', 'error_message': 'not found'}]}
+	return 200, {}, {'uuid': request.path.rsplit('/', 1)[-1]}
+
+
+def test_each_identifier_is_fetched_once_with_its_outcome(client, api):
+	api.route('/platform/contacts', not_found)
+	results = dict(client.get_contacts_many(['u1', 'missing', 'u2', 'u1'], max_workers=2))
+	assert results['u1']['uuid'] == 'u1' and results['u2']['uuid'] == 'u2'
+	assert isinstance(mapped_errors(results['missing'])[0], RDResourceNotFound)
+	assert len(api.calls('/platform/contacts')) == 3
+
+
+def test_contacts_are_fetched_by_email(client, api):
+	results = dict(client.get_contacts_many(['a@b.c'], by='email'))
+	assert results['a@b.c']['path'] == '/platform/contacts/email:a@b.c'
+
+
+def test_unknown_lookup_is_rejected(client):
+	with pytest.raises(ValueError):
+		list(client.get_contacts_many(['u1'], by='phone'))
+
+
+def test_identifiers_are_consumed_lazily(client):
+	consumed = []
+
+	def identifiers():
+		for index in range(100):
+			consumed.append(index)
+			yield f'u{index}'
+
+	stream = client.get_contacts_many(identifiers(), max_workers=4)
+	next(stream)
+	assert len(consumed) <= 5
+	stream.close()
+
+
+# end-of-file
@@ -0,0 +1,151 @@
+""" Tests of the dead-letter store of the rejected writes. """
+
+import asyncio
+import threading
+
+import pytest
+
+from async_client import AsyncRDStationRestClient
+from deadletter import RDSDeadLetterStore
+from events import RDConversionEvent
+from exceptions import RDInvalidFormat
+from exceptions import RDStationException
+from resources.event import RDEvent
+from rest_client import RDStationRestClient
+
+EVENT = {'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {
+	'conversion_identifier': 'signup', 'email': 'a@b.c'}}
+
+
+def invalid_format(request):
+	return 400, {}, {'errors': [{'error_type': 'INVALID_FORMAT', 'error_message': 'invalid email'}]}
+
+
+def rejection():
+	try:
+		raise RDStationException([RDStationException('generic')])
+	except RDStationException as error:
+		return error
+
+
+@pytest.fixture
+def store(tmp_path):
+	return RDSDeadLetterStore(str(tmp_path / 'dead-letters.db'))
+
+
+def test_rejected_writes_are_stored(api, credentials, store):
+	api.route('/platform/events', invalid_format)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store)
+	with pytest.raises(RDStationException):
+		client.create_event(EVENT)
+	rows = store.select()
+	assert [(row['resource'], row['error_type'], row['payload']) for row in rows] == [
+		('RDEvent', 'RDInvalidFormat', EVENT)]
+	assert store.summary() == {'RDInvalidFormat': 1}
+
+
+def test_reads_and_other_errors_are_not_stored(api, credentials, store):
+	api.route('/platform/contacts', lambda request: (404, {}, {
+		'errors': [{'error_type': 'RESOURCE_NOT_FOUND', 'error_message': 'not found'}]}))
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store)
+	with pytest.raises(RDStationException):
+		client.get_contacts_by_uiid('u1')
+	with pytest.raises(RDStationException):
+		client.update_contacts_by_uuid('u1', {'name': 'name'})
+	assert store.select() == []
+
+
+def test_models_and_bytes_are_stored_as_sent(client, store):
+	error = RDStationException([RDInvalidFormat('invalid email')])
+	resource = RDEvent(client)
+	model = RDConversionEvent('CONVERSION', 'CDP', 'signup', 'a@b.c')
+	assert store.record(resource, 'POST', 'url', model, error)
+	assert store.record(resource, 'POST', 'url', b'{"raw":true}', error)
+	assert store.record(resource, 'POST', 'url', b'not json', error)
+	assert not store.record(resource, 'POST', 'url', b'\xff', error)
+	assert not store.record(resource, 'POST', 'url', object(), error)
+	payloads = [row['payload'] for row in store.select()]
+	assert payloads[0] == model.to_event()
+	assert payloads[1:] == [{'raw': True}, 'not json']
+	assert not store.record(resource, 'POST', 'url', model, rejection())
+
+
+def test_replay_deletes_the_accepted_requests(api, credentials, store):
+	api.route('/platform/events', invalid_format)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store)
+	with pytest.raises(RDStationException):
+		client.create_event(EVENT)
+	assert store.replay(client, rate=1000) == {'replayed': 0, 'failed': 1, 'skipped': 0}
+	assert store.select()[0]['attempts'] == 1
+	api.route('/platform/events', lambda request: (200, {}, {'event_uuid': 'e1'}))
+	fixed = lambda payload: {**payload, 'payload': {**payload['payload'], 'email': 'fixed@b.c'}}
+	assert store.replay(client, rate=1000, transform=fixed) == {'replayed': 1, 'failed': 0, 'skipped': 0}
+	assert api.calls('/platform/events')[-1].json['payload']['email'] == 'fixed@b.c'
+	assert store.select() == []
+
+
+def test_async_clients_are_replayed_by_replay_async(api, credentials, store):
+	api.route('/platform/events', invalid_format)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store)
+	with pytest.raises(RDStationException):
+		client.create_event(EVENT)
+	api.route('/platform/events', lambda request: (200, {}, {'event_uuid': 'e1'}))
+
+	async def replay():
+		async with AsyncRDStationRestClient(credentials, endpoint=api.url, rate_limiter=None) as rds:
+			with pytest.raises(TypeError):
+				store.replay(rds)
+			assert store.select()
+			return await store.replay_async(rds, rate=1000)
+
+	assert asyncio.run(replay()) == {'replayed': 1, 'failed': 0, 'skipped': 0}
+	assert store.select() == []
+
+
+def test_live_rejections_are_recorded_during_replay_async(api, credentials, store):
+	api.route('/platform/events', invalid_format)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store)
+	with pytest.raises(RDStationException):
+		client.create_event(EVENT)
+	live = threading.Event()
+
+	def events(request):
+		# the replayed event is answered once the live one was rejected, both are in flight together
+		if request.json['payload']['conversion_identifier'] == 'live':
+			live.set()
+			return invalid_format(request)
+		live.wait(5)
+		return 200, {}, {'event_uuid': 'e1'}
+
+	api.route('/platform/events', events)
+	event = dict(EVENT, payload=dict(EVENT['payload'], conversion_identifier='live'))
+
+	async def traffic(rds):
+		with pytest.raises(RDStationException):
+			await rds.create_event(event)
+
+	async def replay():
+		async with AsyncRDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store) as rds:
+			return (await asyncio.gather(store.replay_async(rds, rate=1000), traffic(rds)))[0]
+
+	assert asyncio.run(replay()) == {'replayed': 1, 'failed': 0, 'skipped': 0}
+	rows = store.select()
+	assert len(rows) == 1
+	assert 'live' in str(rows[0])
+
+
+def test_replay_async_does_not_record_its_own_rejections(api, credentials, store):
+	api.route('/platform/events', invalid_format)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store)
+	with pytest.raises(RDStationException):
+		client.create_event(EVENT)
+
+	async def replay():
+		async with AsyncRDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, dead_letters=store) as rds:
+			return await store.replay_async(rds, rate=1000)
+
+	assert asyncio.run(replay()) == {'replayed': 0, 'failed': 1, 'skipped': 0}
+	assert len(store.select()) == 1
+
+
+# end-of-file
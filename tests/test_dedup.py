@@ -0,0 +1,107 @@
+""" Tests of the deduplication of the webhook deliveries. """
+
+import threading
+
+import pytest
+
+import dedup as dedup_module
+from dedup import RDSDedup
+from dedup import RDSBloomDedup
+from dedup import RDSWindowDedup
+
+
+def test_base_is_abstract():
+	with pytest.raises(TypeError):
+		RDSDedup(60) # pylint: disable=abstract-class-instantiated
+
+
+def test_window_forgets_past_the_window_and_the_size():
+	dedup = RDSWindowDedup(window=10, max_entries=2)
+	assert not dedup.seen('a', 100) and dedup.seen('a', 101)
+	assert not dedup.seen('a', 112)
+	dedup.seen('b', 113)
+	dedup.seen('c', 114)
+	assert len(dedup) == 2 and not dedup.seen('a', 115)
+	assert dedup.stats()['duplicates'] == 1
+
+
+@pytest.mark.parametrize('factory', [
+	lambda path: RDSWindowDedup(window=None, path=path),
+	lambda path: RDSBloomDedup(capacity=100, window=None, path=path)
+])
+def test_restarted_deduplicator_keeps_the_deliveries(tmp_path, factory):
+	path = str(tmp_path / 'dedup')
+	first = factory(path)
+	for index in range(50):
+		first.seen(f'key-{index}')
+	first.close()
+	second = factory(path)
+	assert all(second.seen(f'key-{index}') for index in range(50))
+	assert not second.seen('other')
+
+
+def test_periodic_writes_run_off_the_caller(tmp_path, monkeypatch):
+	path = str(tmp_path / 'dedup')
+	dedup = RDSWindowDedup(path=path, persist_every=0.0)
+	started, release, writers = threading.Event(), threading.Event(), []
+
+	def write_atomic(target, data):
+		writers.append(threading.current_thread().name)
+		started.set()
+		release.wait(5)
+		with open(target, 'wb') as output:
+			output.write(data)
+
+	monkeypatch.setattr(dedup_module, 'write_atomic', write_atomic)
+	assert not dedup.seen('a')
+	assert started.wait(5)
+	# the write in progress neither blocks the checks nor starts another one
+	assert dedup.seen('a') and not dedup.seen('b')
+	release.set()
+	dedup.close()
+	assert writers == ['rds-dedup-persist', 'MainThread']
+	assert RDSWindowDedup(path=path).seen('b')
+
+
+def test_failed_periodic_write_is_logged(tmp_path, caplog):
+	dedup = RDSWindowDedup(path=str(tmp_path / 'missing' / 'dedup'), persist_every=0.0)
+	dedup.seen('a')
+	persisting = dedup._persisting # pylint: disable=protected-access
+	if persisting is not None:
+		persisting.join(5)
+	assert 'not saved' in caplog.text
+
+
+@pytest.mark.parametrize('factory', [
+	lambda path: RDSWindowDedup(path=path),
+	lambda path: RDSBloomDedup(capacity=100, path=path)
+])
+def test_saved_state_is_encoded_outside_the_lock(tmp_path, factory):
+	dedup = factory(str(tmp_path / 'dedup'))
+	dedup.seen('a')
+	dump, locked = dedup._dump, [] # pylint: disable=protected-access
+
+	def encode(snapshot):
+		locked.append(dedup._lock.locked()) # pylint: disable=protected-access
+		return dump(snapshot)
+
+	dedup._dump = encode # pylint: disable=protected-access
+	dedup.save()
+	assert locked == [False]
+	assert factory(dedup.path).seen('a')
+
+
+def test_window_slices_keep_the_chain_under_the_error_rate():
+	dedup = RDSBloomDedup(capacity=10, error_rate=0.01, window=100)
+	for now in range(1000, 1100, 10):
+		dedup.seen(f'key-{now}', now)
+	rates = [item.error_rate for item in dedup._slices] # pylint: disable=protected-access
+	assert len(rates) == 2 and rates[1] < rates[0]
+	for now in range(1100, 2000, 10):
+		dedup.seen(f'key-{now}', now)
+	rates = [item.error_rate for item in dedup._slices] # pylint: disable=protected-access
+	assert sum(rates) < 0.01
+	assert rates[0] >= 0.01 * 0.5 ** 3
+
+
+# end-of-file
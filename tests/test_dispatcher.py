@@ -0,0 +1,111 @@
+""" Tests of the sharded dispatcher of the webhook deliveries. """
+
+import threading
+from queue import Full
+
+import pytest
+
+from dispatcher import RDSShard
+from dispatcher import RDSShardedDispatcher
+
+
+def test_deliveries_of_a_contact_keep_their_order():
+	handled = []
+	with RDSShardedDispatcher(handled.append, shards=4, key=lambda item: item[0]) as dispatcher:
+		for index in range(200):
+			dispatcher.submit((f'contact-{index % 7}', index))
+		assert dispatcher.join(5)
+	for contact in {item[0] for item in handled}:
+		indexes = [index for key, index in handled if key == contact]
+		assert indexes == sorted(indexes)
+	assert len(handled) == 200
+
+
+def test_shard_put_honours_the_bound():
+	shard = RDSShard(0, max_queue=1)
+	shard.put(('bucket', 'a', 0.0))
+	with pytest.raises(Full):
+		shard.put(('bucket', 'b', 0.0), block=False)
+	with pytest.raises(Full):
+		shard.put(('bucket', 'b', 0.0), timeout=0.01)
+
+
+def test_parked_bucket_holds_at_most_max_queue():
+	release, handled = threading.Event(), []
+
+	def handler(item):
+		release.wait(5)
+		handled.append(item)
+
+	dispatcher = RDSShardedDispatcher(handler, shards=2, buckets=2, max_queue=2, key=lambda item: 'contact',
+	                                  rebalance_every=None)
+	bucket = dispatcher.bucket('first')
+	dispatcher.submit('first')
+	with dispatcher._lock: # pylint: disable=protected-access
+		# the bucket moves while its first delivery is being handled
+		target = 1 - dispatcher._table[bucket] # pylint: disable=protected-access
+		dispatcher._parked[bucket] = (target, []) # pylint: disable=protected-access
+	dispatcher.submit('second')
+	dispatcher.submit('third')
+	assert dispatcher.stats()['parked'] == 2
+	with pytest.raises(Full):
+		dispatcher.submit('fourth', block=False)
+	with pytest.raises(Full):
+		dispatcher.submit('fourth', timeout=0.01)
+	waiting = threading.Thread(target=dispatcher.submit, args=('fourth',))
+	waiting.start()
+	waiting.join(0.1)
+	assert waiting.is_alive()
+	release.set()
+	waiting.join(5)
+	assert not waiting.is_alive()
+	assert dispatcher.join(5)
+	dispatcher.close()
+	assert handled == ['first', 'second', 'third', 'fourth']
+	assert dispatcher.shard_of('first') == target
+	assert dispatcher.stats()['submitted'] == 4
+
+
+def test_close_hands_the_parked_deliveries_to_their_new_shard():
+	release, handled = threading.Event(), []
+
+	def handler(item):
+		release.wait(5)
+		handled.append(item)
+
+	dispatcher = RDSShardedDispatcher(handler, shards=2, buckets=2, key=lambda item: 'contact', rebalance_every=None)
+	bucket = dispatcher.bucket('first')
+	dispatcher.submit('first')
+	with dispatcher._lock: # pylint: disable=protected-access
+		dispatcher._parked[bucket] = (1 - dispatcher._table[bucket], []) # pylint: disable=protected-access
+	dispatcher.submit('second')
+	closing = threading.Thread(target=dispatcher.close)
+	closing.start()
+	closing.join(0.1)
+	release.set()
+	closing.join(5)
+	assert not closing.is_alive()
+	assert handled == ['first', 'second']
+	assert dispatcher.join(1)
+
+
+def test_failing_on_error_keeps_the_worker_alive():
+	errors = []
+
+	def handler(item):
+		if item == 'bad':
+			raise ValueError(item)
+
+	def on_error(item, error):
+		errors.append(item)
+		raise RuntimeError('on_error')
+
+	with RDSShardedDispatcher(handler, shards=1, key=str, on_error=on_error, rebalance_every=None) as dispatcher:
+		dispatcher.submit('bad')
+		dispatcher.submit('good')
+		assert dispatcher.join(5)
+	assert errors == ['bad']
+	assert dispatcher.stats()['processed'] == 1
+
+
+# end-of-file
@@ -0,0 +1,46 @@
+""" Tests of the serialization of the event models. """
+
+import pytest
+
+from events import RDConversionEvent
+from events import RDConversionEventSlots
+from events import RDEventsBatch
+from events import RDEventsBatchSlots
+from events import RDMarkOpportunityEvent
+
+
+def test_only_the_attributes_set_go_in_the_payload():
+	event = RDMarkOpportunityEvent('OPPORTUNITY', 'CDP', 'default', 'a@b.c')
+	assert event.to_event() == {'event_type': 'OPPORTUNITY', 'event_family': 'CDP', 'payload': {
+		'funnel_name': 'default', 'email': 'a@b.c'}}
+	event.update({'value': 10.0, 'cf_plan': 'pro'})
+	assert event.to_event()['payload'] == {'funnel_name': 'default', 'email': 'a@b.c', 'value': 10.0, 'cf_plan': 'pro'}
+
+
+def test_slotted_variants_serialize_like_their_model():
+	event = RDConversionEvent('CONVERSION', 'CDP', 'signup', 'a@b.c', name='Name', tags=['mql'])
+	slotted = RDConversionEventSlots('CONVERSION', 'CDP', 'signup', 'a@b.c', name='Name', tags=['mql'])
+	assert slotted.to_event() == event.to_event()
+	assert not hasattr(slotted, '__dict__')
+
+
+@pytest.mark.parametrize('model', [RDEventsBatch, RDEventsBatchSlots])
+def test_batches_serialize_as_the_list_of_their_events(model):
+	events = [RDConversionEvent('CONVERSION', 'CDP', 'signup', 'a@b.c'),
+	          {'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {'email': 'd@e.f'}}]
+	assert model('CONVERSION', 'CDP', events).to_event() == [events[0].to_event(), events[1]]
+
+
+def test_client_sends_models_as_their_event_body(client, api):
+	event = RDConversionEvent('CONVERSION', 'CDP', 'signup', 'a@b.c')
+	client.create_event(event)
+	client.create_event_batch(RDEventsBatch('CONVERSION', 'CDP', [event]))
+	client.create_event_batch([event, RDConversionEventSlots('CONVERSION', 'CDP', 'signup', 'd@e.f')])
+	bodies = [request.json for request in api.calls('/platform/events')]
+	assert bodies[0] == event.to_event()
+	assert bodies[1] == [event.to_event()]
+	assert [item['payload']['email'] for item in bodies[2]] == ['a@b.c', 'd@e.f']
+	assert 'name' not in bodies[0]['payload']
+
+
+# end-of-file
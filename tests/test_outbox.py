@@ -0,0 +1,172 @@
+""" Tests of the durable event outbox and of its sender. """
+
+import os
+import threading
+
+from events import RDConversionEvent
+from exceptions import RDCircuitOpen
+from exceptions import RDStationException
+from outbox import RDEventOutbox
+from outbox import RDOutboxSender
+
+
+def status_error(status):
+	error = RDStationException(f'status {status}')
+	error.status_code = status
+	return error
+
+
+class OutboxClient():
+	""" client raising the queued failures before accepting the batches """
+
+	def __init__(self, failures=()):
+		self.failures = list(failures)
+		self.batches = []
+		self.sent = threading.Event()
+
+	def create_event_batch(self, events):
+		if self.failures:
+			raise self.failures.pop(0)
+		self.batches.append(events)
+		self.sent.set()
+
+
+def conversion(index):
+	return RDConversionEvent('CONVERSION', 'CDP', 'signup', f'contact{index}@b.c')
+
+
+def drain(client, outbox, **kwargs):
+	sender = RDOutboxSender(client, outbox, backoff=0.001, **kwargs)
+	sender.start()
+	client.sent.wait(5)
+	sender.stop(timeout=5)
+	return sender
+
+
+def test_events_survive_a_reopen(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	for index in range(3):
+		outbox.append(conversion(index))
+	outbox.close()
+	reopened = RDEventOutbox(str(tmp_path))
+	records = reopened.read(reopened.cursor())
+	assert [event['payload']['email'] for _, event in records] == [f'contact{index}@b.c' for index in range(3)]
+	reopened.close()
+
+
+def test_torn_record_is_dropped_on_recovery(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append(conversion(0))
+	outbox.close()
+	path = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+	with open(path, 'ab') as segment:
+		segment.write(b'\x10\x00\x00\x00partial')
+	reopened = RDEventOutbox(str(tmp_path))
+	assert len(reopened.read(reopened.cursor())) == 1
+	reopened.close()
+
+
+def test_segments_rotate_and_are_deleted_once_acknowledged(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path), segment_bytes=256)
+	for index in range(10):
+		outbox.append(conversion(index))
+	assert len(outbox.segments()) > 1
+	client = OutboxClient()
+	sender = RDOutboxSender(client, outbox, batch_size=100, backoff=0.001)
+	sender.start()
+	sender.stop(timeout=5)
+	assert sum(len(batch) for batch in client.batches) == 10
+	assert len(outbox.segments()) == 1
+	outbox.close()
+
+
+def test_rejected_data_is_acknowledged(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append(conversion(0))
+	rejected = []
+	client = OutboxClient([status_error(422)])
+	sender = RDOutboxSender(client, outbox, backoff=0.001, on_error=lambda events, error: rejected.append(events))
+	sender.start()
+	sender.stop(timeout=5)
+	assert len(rejected) == 1 and not client.batches
+	assert sender.stats()['rejected'] == 1
+	assert outbox.read(outbox.cursor()) == []
+	outbox.close()
+
+
+def test_server_and_transport_failures_are_retried(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append(conversion(0))
+	client = OutboxClient([status_error(503), status_error(429), RDCircuitOpen('open'), ConnectionError('reset')])
+	sender = drain(client, outbox)
+	assert len(client.batches) == 1
+	assert sender.stats()['retries'] == 4 and sender.stats()['rejected'] == 0
+	outbox.close()
+
+
+def test_failing_batches_stay_for_the_next_start(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append(conversion(0))
+	client = OutboxClient([status_error(500)] * 1000)
+	sender = RDOutboxSender(client, outbox, backoff=0.001)
+	sender.start()
+	while not sender.stats()['retries']:
+		threading.Event().wait(0.001)
+	sender.stop(timeout=5)
+	assert len(outbox.read(outbox.cursor())) == 1
+	outbox.close()
+
+
+def test_client_errors_carry_their_status(client, api):
+	api.route('/platform/events', lambda request: (422, {}, {
+		'errors': [{'error_type': 'INVALID', 'error_message': 'invalid email'}]}))
+	try:
+		client.create_event_batch([conversion(0).to_event()])
+	except RDStationException as error:
+		assert error.status_code == 422
+	else:
+		raise AssertionError('the 422 was not raised')
+
+
+
+def test_permanent_client_errors_are_rejected(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	for index in range(3):
+		outbox.append(conversion(index))
+	rejected = []
+	client = OutboxClient([status_error(404), status_error(413)])
+	sender = drain(client, outbox, batch_size=1, on_error=lambda events, error: rejected.append(error.status_code))
+	assert rejected == [404, 413] and len(client.batches) == 1
+	assert sender.stats()['retries'] == 0
+	outbox.close()
+
+
+def test_batches_are_given_up_after_max_attempts(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append(conversion(0))
+	outbox.append(conversion(1))
+	rejected = []
+	client = OutboxClient([status_error(503)] * 3)
+	sender = drain(client, outbox, batch_size=1, max_attempts=3,
+	               on_error=lambda events, error: rejected.append(events))
+	assert len(rejected) == 1 and len(client.batches) == 1
+	assert sender.stats()['retries'] == 2 and sender.stats()['rejected'] == 1
+	outbox.close()
+
+
+def test_failing_error_handler_does_not_stop_the_sender(tmp_path):
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append(conversion(0))
+	outbox.append(conversion(1))
+
+	def fail(events, error):
+		raise ValueError('handler')
+
+	client = OutboxClient([status_error(400)])
+	sender = drain(client, outbox, batch_size=1, on_error=fail)
+	assert len(client.batches) == 1 and sender.stats()['rejected'] == 1
+	assert outbox.read(outbox.cursor()) == []
+	outbox.close()
+
+
+# end-of-file
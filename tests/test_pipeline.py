@@ -0,0 +1,72 @@
+""" Tests of the streaming upsert pipeline. """
+
+import json
+import threading
+
+from pipeline import RDSUpsertPipeline
+
+
+class UpsertClient():
+	""" client failing the records whose value starts with `bad` """
+
+	def __init__(self):
+		self.sent = []
+		self._lock = threading.Lock()
+
+	def upsert_contact_per_identifier(self, identifier, value, body):
+		with self._lock:
+			self.sent.append(value)
+		if value.startswith('bad'):
+			raise ValueError(value)
+		return {'identifier': identifier, 'value': value, **body}
+
+
+def records(count, bad=()):
+	for index in range(count):
+		yield 'email', f"{'bad' if index in bad else 'ok'}{index}@b.c", {'name': str(index)}
+
+
+def test_every_record_has_an_outcome():
+	client = UpsertClient()
+	pipeline = RDSUpsertPipeline(client, max_workers=4)
+	outcomes = sorted(pipeline.run(records(50, bad={3, 7})), key=lambda outcome: outcome.index)
+	assert [outcome.index for outcome in outcomes] == list(range(50))
+	assert [outcome.index for outcome in outcomes if not outcome.ok] == [3, 7]
+	assert outcomes[0].response == {'identifier': 'email', 'value': 'ok0@b.c', 'name': '0'}
+	stats = pipeline.stats()
+	assert (stats['acknowledged'], stats['succeeded'], stats['failed']) == (50, 48, 2)
+
+
+def test_a_resumed_run_skips_the_acknowledged_records(tmp_path):
+	checkpoint = str(tmp_path / 'checkpoint.json')
+	pipeline = RDSUpsertPipeline(UpsertClient(), max_workers=2, checkpoint=checkpoint, checkpoint_every=5)
+	run = pipeline.run(records(30))
+	for _ in range(12):
+		next(run)
+	run.close()
+	with open(checkpoint, encoding='utf-8') as source:
+		acknowledged = json.load(source)['acknowledged']
+	assert 0 < acknowledged <= 12
+	client = UpsertClient()
+	resumed = RDSUpsertPipeline(client, max_workers=2, checkpoint=checkpoint)
+	indexes = {outcome.index for outcome in resumed.run(records(30))}
+	assert indexes == set(range(acknowledged, 30))
+	assert resumed.stats()['skipped'] == acknowledged
+
+
+def test_in_flight_records_are_bounded():
+	consumed = []
+
+	def source():
+		for record in records(1000):
+			consumed.append(record)
+			yield record
+
+	pipeline = RDSUpsertPipeline(UpsertClient(), max_workers=2, max_in_flight=8)
+	run = pipeline.run(source())
+	next(run)
+	assert len(consumed) <= 9
+	run.close()
+
+
+# end-of-file
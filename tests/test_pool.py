@@ -0,0 +1,68 @@
+""" Tests of the pool of clients of many accounts. """
+
+import threading
+
+from pool import RDStationClientPool
+from rest_client import RDStationClient
+from rest_client import RDStationRestClient
+from cache import RDSResponseCache
+from tokencache import RDSTokenCache
+from tokens import RDSTokenScheduler
+
+
+def test_account_id_defaults_to_the_client_id(credentials):
+	assert RDStationRestClient(credentials).get_account_id == 'client-id'
+	assert RDStationRestClient(credentials, account_id='account').get_account_id == 'account'
+
+
+def test_accounts_sharing_an_app_keep_their_caches_apart(api, tmp_path):
+	responses, tokens = RDSResponseCache(), RDSTokenCache(str(tmp_path))
+	issued = iter(('first', 'second'))
+	api.route('/auth/token', lambda request: (200, {}, {'access_token': next(issued), 'expires_in': 86400}))
+	with RDStationClientPool(endpoint=api.url, rate_limiter=None, response_cache=responses,
+	                         token_cache=tokens) as pool:
+		for account_id in ('a', 'b'):
+			pool.register(account_id, RDStationClient('app', 'secret', code=f'code-{account_id}'))
+		assert pool['a'].get_token_manager.token() == 'first'
+		assert pool['b'].get_token_manager.token() == 'second'
+		pool['a'].get_fields()
+		pool['b'].get_fields()
+		assert len(api.calls('/platform/contacts/fields')) == 2
+		assert tokens.load('a')['access_token'] == 'first'
+		assert tokens.load('b')['access_token'] == 'second'
+		assert tokens.load('app') is None
+
+
+def test_pool_renews_the_tokens_from_one_scheduler(api):
+	renewed = threading.Event()
+
+	def grant(request):
+		if len(api.calls('/auth/token')) > 4:
+			renewed.set()
+		return 200, {}, {'access_token': 'token', 'expires_in': 0.2}
+
+	api.route('/auth/token', grant)
+	with RDStationClientPool(endpoint=api.url, rate_limiter=None) as pool:
+		for account_id in ('a', 'b'):
+			pool.register(account_id, RDStationClient(account_id, 'secret', code='code'))
+		pool.connect()
+		assert renewed.wait(5)
+		names = [thread.name for thread in threading.enumerate()]
+		assert names.count('rds-token-scheduler') == 1 and 'rds-token-refresher' not in names
+		scheduler = pool.scheduler
+	assert not scheduler._thread.is_alive() # pylint: disable=protected-access
+
+
+def test_stopped_scheduler_is_not_restarted_by_token_updates(api, credentials):
+	scheduler = RDSTokenScheduler()
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, token_scheduler=scheduler)
+	client.connect()
+	scheduler.stop(5)
+	client.get_token_manager.refresh()
+	scheduler.start()
+	assert len(scheduler) == 0
+	assert not scheduler._thread.is_alive() # pylint: disable=protected-access
+	client.get_token_manager.stop()
+
+
+# end-of-file
@@ -0,0 +1,143 @@
+""" Tests of the client side rate limit. """
+
+import time
+import asyncio
+import sqlite3
+import threading
+import multiprocessing
+
+import pytest
+
+import settings
+from exceptions import RDRateLimitExceeded
+from ratelimit import RDSRateLimiter
+from ratelimit import RDSSharedRateLimiter
+from ratelimit import rate_limit_families
+from rest_client import RDStationRestClient
+from resources.event import RDEvent
+from resources.event import RDEventBatch
+
+LIMITS = {'contacts': {'max_requests': 2, 'period': 60}, 'events': {
+	'lead': {'max_requests': 1, 'period': 60}, 'account': {'max_requests': 3, 'period': 60}}}
+
+
+class RecordingLimiter(RDSRateLimiter):
+	""" rate limiter recording the families acquired """
+
+	def __init__(self):
+		super().__init__()
+		self.families = []
+
+	def acquire(self, family, blocking=True, timeout=None, key=None):
+		self.families.append((family, key) if key else family)
+		return 0.0
+
+
+def test_families_of_the_settings():
+	assert rate_limit_families(settings.RDSTATION) == {
+		'contacts': (24, 24), 'events.lead': (24, 24), 'events.account': (24, 24)}
+
+
+def test_exhausted_budget_is_rejected_without_blocking():
+	limiter = RDSRateLimiter(LIMITS)
+	assert limiter.try_acquire('contacts') and limiter.try_acquire('contacts')
+	assert not limiter.try_acquire('contacts')
+	with pytest.raises(RDRateLimitExceeded):
+		limiter.acquire('contacts', timeout=0.1)
+	assert limiter.acquire('unlimited') == 0.0
+	assert limiter.stats()['contacts']['rejected'] == 2
+
+
+def test_each_event_endpoint_draws_from_its_own_family(api, credentials):
+	assert RDEvent.rate_limit == 'events.lead'
+	assert RDEventBatch.rate_limit == 'events.account'
+	limiter = RecordingLimiter()
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=limiter)
+	client.create_event({'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {
+		'conversion_identifier': 'signup', 'email': 'a@b.c'}})
+	client.create_event_batch([{'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {
+		'conversion_identifier': 'signup', 'email': 'a@b.c'}}])
+	client.get_contacts_by_uiid('u1')
+	assert [family for family in limiter.families if family] == [
+		('events.lead', 'a@b.c'), 'events.account', 'events.account', 'contacts']
+
+
+def test_shared_budget_is_kept_per_account(tmp_path):
+	path = str(tmp_path / 'ratelimit.db')
+	first = RDSSharedRateLimiter(path, 'first', LIMITS)
+	same = RDSSharedRateLimiter(path, 'first', LIMITS)
+	second = RDSSharedRateLimiter(path, 'second', LIMITS)
+	assert first.try_acquire('events.lead')
+	assert not same.try_acquire('events.lead')
+	assert second.try_acquire('events.lead')
+	assert same.try_acquire('events.account')
+	assert round(first.stats()['events.account']['tokens']) == 2
+	assert round(second.stats()['events.account']['tokens']) == 3
+
+
+
+def test_single_events_draw_per_lead_and_from_the_account(api, credentials):
+	limiter = RDSRateLimiter(LIMITS)
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=limiter, rate_limit_timeout=0)
+	event = {'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {'conversion_identifier': 'signup'}}
+	client.create_event({**event, 'payload': {**event['payload'], 'email': 'a@b.c'}})
+	client.create_event({**event, 'payload': {**event['payload'], 'email': 'd@e.f'}})
+	with pytest.raises(RDRateLimitExceeded):
+		client.create_event({**event, 'payload': {**event['payload'], 'email': 'a@b.c'}})
+	assert round(limiter.stats()['events.account']['tokens']) == 1
+	client.create_event({**event, 'payload': {**event['payload'], 'email': 'g@h.i'}})
+	with pytest.raises(RDRateLimitExceeded):
+		client.create_event({**event, 'payload': {**event['payload'], 'email': 'j@k.l'}})
+
+
+def test_keyed_buckets_are_bounded():
+	limiter = RDSRateLimiter(LIMITS, max_keys=2)
+	assert limiter.try_acquire('events.lead', key='a') and not limiter.try_acquire('events.lead', key='a')
+	assert limiter.try_acquire('events.lead', key='b') and limiter.try_acquire('events.lead', key='c')
+	# the least recently used key was forgotten, with its exhausted bucket
+	assert limiter.try_acquire('events.lead', key='a')
+	assert not limiter.try_acquire('events.lead', key='c')
+	assert limiter.bucket('unlimited', 'a') is None
+
+
+def test_shared_keyed_rows_of_idle_keys_are_dropped(tmp_path):
+	path = str(tmp_path / 'ratelimit.db')
+	limits = {'events': {'lead': {'max_requests': 1, 'period': 0.01}}}
+	limiter = RDSSharedRateLimiter(path, 'account', limits)
+	assert limiter.try_acquire('events.lead', key='a')
+	time.sleep(0.05)
+	limiter.try_acquire('events.lead', key='b')
+	with sqlite3.connect(path) as connection:
+		families = [row[0] for row in connection.execute("SELECT family FROM rate_limits ORDER BY family")]
+	assert families == ['events.lead', 'events.lead:b']
+
+
+
+def take_shared_budget(path, attempts):
+	""" worker process drawing from the shared budget, returns the requests it was granted """
+	limiter = RDSSharedRateLimiter(path, 'account', LIMITS)
+	return sum(limiter.try_acquire('events.account') for _ in range(attempts))
+
+
+def test_shared_budget_is_split_between_processes(tmp_path):
+	path = str(tmp_path / 'ratelimit.db')
+	RDSSharedRateLimiter(path, 'account', LIMITS)
+	with multiprocessing.get_context('spawn').Pool(4) as pool:
+		granted = pool.starmap(take_shared_budget, [(path, 5)] * 4)
+	assert sum(granted) == LIMITS['events']['account']['max_requests']
+
+
+def test_shared_async_acquire_runs_off_the_loop(tmp_path):
+	limiter = RDSSharedRateLimiter(str(tmp_path / 'ratelimit.db'), 'account', LIMITS)
+	threads, reserve = [], limiter._reserve # pylint: disable=protected-access
+
+	def recording(*args):
+		threads.append(threading.current_thread())
+		return reserve(*args)
+
+	limiter._reserve = recording # pylint: disable=protected-access
+	assert asyncio.run(limiter.acquire_async('events.account')) == 0.0
+	assert len(threads) == 1 and threads[0] is not threading.main_thread()
+
+
+# end-of-file
@@ -0,0 +1,105 @@
+""" Tests of the webhook receiver. """
+
+import asyncio
+
+from codec import CODEC
+from receiver import RDSWebhookReceiver
+from receiver import WEBHOOK_CONVERTED
+from receiver import parse_webhook
+
+
+PAYLOAD = CODEC.dumps({'leads': [{'uuid': 'u1', 'email': 'contact@example.com'}]})
+
+HEAD = b"POST /webhooks HTTP/1.1\r\nHost: localhost\r\nTransfer-Encoding: chunked\r\n\r\n"
+
+
+def exchange(request, eof=False, handler=None, **kwargs):
+	""" sends a raw request to a receiver, returns its status line and the received contacts """
+	received = []
+
+	async def collect(contact):
+		if handler is not None:
+			handler(contact)
+		received.append(contact)
+
+	async def run():
+		async with RDSWebhookReceiver(collect, port=0, routes={'/webhooks': WEBHOOK_CONVERTED}, **kwargs) as receiver:
+			reader, writer = await asyncio.open_connection(*receiver.address)
+			writer.write(request)
+			if eof:
+				writer.write_eof()
+			status = await asyncio.wait_for(reader.readline(), 5)
+			writer.close()
+			await receiver.stop()
+			return status
+
+	return asyncio.run(run()), received
+
+
+def test_listens_on_the_loopback_by_default():
+	assert RDSWebhookReceiver(lambda contact: None).host == '127.0.0.1'
+
+
+def test_chunked_delivery_is_accepted():
+	body = b''.join((b'%x\r\n' % len(PAYLOAD[:10]), PAYLOAD[:10], b'\r\n',
+	                 b'%x;ext=1\r\n' % len(PAYLOAD[10:]), PAYLOAD[10:], b'\r\n',
+	                 b'0\r\nX-Trailer: yes\r\n\r\n'))
+	status, received = exchange(HEAD + body)
+	assert status.startswith(b'HTTP/1.1 200')
+	assert [contact.uuid for contact in received] == ['u1']
+
+
+def test_oversized_chunk_line_is_rejected():
+	status, received = exchange(HEAD + b'1' * 70000)
+	assert status.startswith(b'HTTP/1.1 400') and received == []
+
+
+def test_truncated_chunk_is_rejected():
+	status, received = exchange(HEAD + b'40\r\n' + PAYLOAD[:10], eof=True)
+	assert status.startswith(b'HTTP/1.1 400') and received == []
+
+
+def test_chunk_without_its_line_end_is_rejected():
+	status, _ = exchange(HEAD + b'%x\r\n' % len(PAYLOAD) + PAYLOAD + b'XX0\r\n\r\n')
+	assert status.startswith(b'HTTP/1.1 400')
+
+
+def test_chunks_past_the_body_limit_are_rejected():
+	status, _ = exchange(HEAD + b'%x\r\n' % len(PAYLOAD) + PAYLOAD + b'\r\n0\r\n\r\n', max_body=10)
+	assert status.startswith(b'HTTP/1.1 413')
+
+
+def post(payload):
+	body = CODEC.dumps(payload)
+	return b"POST /webhooks HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+
+def test_nested_values_of_other_types_are_ignored():
+	lead = parse_webhook({'leads': [{'uuid': 'u1', 'last_conversion': 'oops'}]})[0]
+	contact = parse_webhook({'contact': {'uuid': 'u2', 'contact_funnel': 'oops'}})[0]
+	assert (lead.uuid, lead.event_identifier, lead.timestamp) == ('u1', None, None)
+	assert (contact.uuid, contact.lifecycle_stage, contact.fit_score) == ('u2', None, None)
+	status, received = exchange(post({'leads': [{'uuid': 'u1', 'last_conversion': {'content': 'oops'}}]}))
+	assert status.startswith(b'HTTP/1.1 200')
+	assert [record.uuid for record in received] == ['u1']
+
+
+def test_failing_on_error_keeps_the_worker_alive():
+	errors = []
+
+	def handler(contact):
+		if contact.uuid == 'u1':
+			raise RuntimeError('handler')
+
+	def on_error(contact, error):
+		errors.append(contact.uuid)
+		raise RuntimeError('on_error')
+
+	payload = {'leads': [{'uuid': 'u1'}, {'uuid': 'u2'}]}
+	status, received = exchange(post(payload), handler=handler, workers=1, on_error=on_error)
+	assert status.startswith(b'HTTP/1.1 200')
+	assert errors == ['u1']
+	assert [record.uuid for record in received] == ['u2']
+
+
+# end-of-file
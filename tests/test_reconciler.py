@@ -0,0 +1,93 @@
+""" Tests of the reconciliation of the webhook subscriptions. """
+
+from reconciler import RDSWebhookReconciler
+from reconciler import RDSWebhookSubscription
+
+
+CONVERTED = 'WEBHOOK.CONVERTED'
+OPPORTUNITY = 'WEBHOOK.MARKED_OPPORTUNITY'
+
+
+def webhook(uuid, event_type, url, identifiers=(), relations=(), http_method='POST'):
+	""" subscription as listed by the api """
+	return {'uuid': uuid, 'event_type': event_type, 'entity_type': 'CONTACT', 'url': url,
+	        'http_method': http_method, 'event_identifiers': list(identifiers),
+	        'include_relations': list(relations)}
+
+
+def serve(api, webhooks, failing=()):
+	""" answers the webhook calls of the api with `webhooks` as the current subscriptions """
+
+	def answer(request):
+		if request.command == 'GET':
+			return 200, {}, {'webhooks': webhooks}
+		if request.path.rsplit('/', 1)[-1] in failing:
+			return 500, {}, {'errors': [{'error_type': 'INTERNAL', 'error_message': 'down'}]}
+		return 200, {}, {'method': request.command, 'path': request.path}
+
+	api.route('/integrations/webhooks', answer)
+
+
+def changes(api):
+	""" calls of the api other than the listing, in the order received """
+	return [(request.command, request.path) for request in api.calls('/integrations') if request.command != 'GET']
+
+
+def test_account_in_the_declared_state_costs_one_call(api, client):
+	serve(api, [webhook('w1', CONVERTED, 'https://a', ('b', 'a'))])
+	plan = RDSWebhookReconciler(client).reconcile([RDSWebhookSubscription(CONVERTED, 'https://a', ('a', 'b'))])
+	assert plan.empty and plan.summary()['keep'] == 1
+	assert len(api.calls('/integrations')) == 1
+
+
+def test_plan_creates_updates_and_deletes(api, client):
+	serve(api, [
+		webhook('same', CONVERTED, 'https://a'),
+		webhook('duplicate', CONVERTED, 'https://a'),
+		webhook('changed', OPPORTUNITY, 'https://b', ('old',)),
+		webhook('stray', OPPORTUNITY, 'https://stray')
+	])
+	plan = RDSWebhookReconciler(client, max_workers=1).reconcile([
+		RDSWebhookSubscription(CONVERTED, 'https://a'),
+		RDSWebhookSubscription(OPPORTUNITY, 'https://b', ('new',)),
+		RDSWebhookSubscription(CONVERTED, 'https://c')
+	])
+	assert plan.summary() == {'create': 1, 'update': 1, 'delete': 2, 'keep': 1}
+	assert all(action.ok for action in plan.actions)
+	calls = changes(api)
+	assert calls[:2] == [('POST', '/integrations/webhooks'), ('PUT', '/integrations/webhooks/changed')]
+	assert sorted(calls[2:]) == [('DELETE', '/integrations/webhooks/duplicate'),
+	                             ('DELETE', '/integrations/webhooks/stray')]
+	update = api.calls('/integrations/webhooks/changed')[0]
+	assert update.json['event_identifiers'] == ['new']
+
+
+def test_http_method_change_is_an_update(api, client):
+	serve(api, [webhook('w1', CONVERTED, 'https://a', http_method='PUT')])
+	plan = RDSWebhookReconciler(client).reconcile([RDSWebhookSubscription(CONVERTED, 'https://a')])
+	assert [(action.action, action.uuid) for action in plan.actions] == [('update', 'w1')]
+
+
+def test_without_prune_the_strays_are_kept(api, client):
+	serve(api, [webhook('stray', OPPORTUNITY, 'https://stray')])
+	plan = RDSWebhookReconciler(client, prune=False).reconcile([RDSWebhookSubscription(CONVERTED, 'https://a')])
+	assert plan.summary()['delete'] == 0
+	assert changes(api) == [('POST', '/integrations/webhooks')]
+
+
+def test_dry_run_applies_nothing(api, client):
+	serve(api, [webhook('stray', OPPORTUNITY, 'https://stray')])
+	plan = RDSWebhookReconciler(client).reconcile([RDSWebhookSubscription(CONVERTED, 'https://a')], dry_run=True)
+	assert plan.summary() == {'create': 1, 'update': 0, 'delete': 1, 'keep': 0}
+	assert changes(api) == []
+
+
+def test_failed_calls_are_reported_on_their_action(api, client):
+	serve(api, [webhook('w1', OPPORTUNITY, 'https://stray'), webhook('w2', OPPORTUNITY, 'https://other')],
+	      failing=('w1',))
+	plan = RDSWebhookReconciler(client).reconcile([])
+	outcomes = {action.uuid: action.ok for action in plan.actions}
+	assert outcomes == {'w1': False, 'w2': True}
+
+
+# end-of-file
@@ -0,0 +1,85 @@
+""" Tests of the response mapping, decoded and raw. """
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from exceptions import RDInvalidFormat
+from exceptions import RDResourceNotFound
+from exceptions import RDStationException
+from outbox import RDEventOutbox
+from outbox import RDOutboxSender
+from response import RDSResponse
+from response import mapped_errors
+
+
+def response(status, content=b''):
+	return SimpleNamespace(status_code=status, headers={}, content=content)
+
+
+def test_body_is_decoded_on_first_access():
+	decoded = RDSResponse(response(200, b'{"uuid": "u1", "tags": ["mql"]}'))
+	assert decoded.uuid == 'u1' and decoded['tags'] == ['mql'] and dict(decoded) == {'uuid': 'u1', 'tags': ['mql']}
+	assert len(RDSResponse(response(204))) == 0
+	with pytest.raises(AttributeError):
+		decoded.missing # pylint: disable=pointless-statement
+
+
+@pytest.mark.parametrize('status, content', [
+	(404, b''),
+	(500, b'{"message": "internal error"}'),
+	(503, b'<html>unavailable</html>'),
+	(429, b'{"errors": []}')
+])
+def test_every_failure_status_raises(status, content):
+	with pytest.raises(RDStationException) as failure:
+		RDSResponse(response(status, content))
+	assert failure.value.status_code == status
+	assert type(failure.value) is RDStationException # pylint: disable=unidiomatic-typecheck
+
+
+def test_errors_choose_the_type_raised():
+	content = b'{"errors": [{"error_type": "INVALID_FORMAT", "error_message": "email"},' \
+	          b' {"error_type": "RESOURCE_NOT_FOUND", "error_message": "uuid"}]}'
+	with pytest.raises(RDInvalidFormat) as failure:
+		RDSResponse(response(400, content))
+	assert failure.value.status_code == 400
+	assert [type(item) for item in mapped_errors(failure.value)] == [RDInvalidFormat, RDResourceNotFound]
+
+
+def test_auth_errors_come_as_a_single_object():
+	content = b'{"errors": {"error_type": "RESOURCE_NOT_FOUND", "error_message": "missing"}}'
+	with pytest.raises(RDResourceNotFound):
+		RDSResponse(response(404, content))
+
+
+def test_failures_can_be_read_without_raising():
+	assert RDSResponse(response(500, b'{"message": "error"}'), raise_status=False)['message'] == 'error'
+
+
+def test_outbox_keeps_the_batches_of_bodyless_failures(client, api, tmp_path):
+	answers = iter([(502, {}, b''), (200, {}, {'event_uuid': 'e1'})])
+	api.route('/platform/events/batch', lambda request: next(answers))
+	outbox = RDEventOutbox(str(tmp_path))
+	outbox.append({'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': {'email': 'a@b.c'}})
+	sender = RDOutboxSender(client, outbox, backoff=0.001)
+	sender.start()
+	while not sender.stats()['sent']:
+		threading.Event().wait(0.001)
+	sender.stop(timeout=5)
+	assert sender.stats() == {'sent': 1, 'rejected': 0, 'retries': 1, 'appended': 1}
+	outbox.close()
+
+
+def test_raw_mode_returns_the_body_undecoded_and_raises_failures(client, api):
+	api.route('/platform/contacts/u1', lambda request: (200, {}, b'{"uuid": "u1"}'))
+	api.route('/platform/contacts/u2', lambda request: (404, {}, b'not found'))
+	raw = client.get_contacts_by_uiid('u1', raw=True)
+	assert (raw.status_code, raw.content) == (200, b'{"uuid": "u1"}')
+	with pytest.raises(RDStationException) as failure:
+		client.get_contacts_by_uiid('u2', raw=True)
+	assert failure.value.status_code == 404
+
+
+# end-of-file
@@ -0,0 +1,51 @@
+""" Tests of the retry policy and of the retries of the client. """
+
+import pytest
+
+from exceptions import RDStationException
+from retry import RDSRetryPolicy
+from retry import parse_retry_after
+
+
+def test_retry_after_in_seconds_and_http_date():
+	assert parse_retry_after('3') == 3.0
+	assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+	assert parse_retry_after('soon') is None
+	assert parse_retry_after(None) is None
+
+
+def test_backoff_grows_up_to_the_cap():
+	policy = RDSRetryPolicy(backoff=1.0, max_backoff=5, jitter=False)
+	assert [policy.delay(attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 5, 5]
+
+
+def test_retry_after_past_the_cap_gives_up():
+	policy = RDSRetryPolicy(max_backoff=10)
+	assert policy.delay(0, '7') == 7.0
+	assert policy.delay(0, '3600') is None
+
+
+def test_posts_are_only_retried_when_unprocessed():
+	policy = RDSRetryPolicy(max_retries=2)
+	assert policy.should_retry('POST', 0, status=429)
+	assert not policy.should_retry('POST', 0, status=503)
+	assert policy.should_retry('GET', 1, status=503)
+	assert not policy.should_retry('GET', 2, status=503)
+
+
+def test_client_retries_server_errors(client, api):
+	answers = iter([(503, {}, {'errors': []}), (200, {}, {'uuid': 'u1'})])
+	api.route('/platform/contacts', lambda request: next(answers))
+	assert client.get_contacts_by_uiid('u1')['uuid'] == 'u1'
+	assert len(api.calls('/platform/contacts')) == 2
+
+
+def test_client_does_not_wait_a_long_retry_after(client, api):
+	api.route('/platform/contacts', lambda request: (429, {'Retry-After': '3600'}, {
+		'errors': {'error_type': 'TOO_MANY_REQUESTS', 'error_message': 'slow down'}}))
+	with pytest.raises(RDStationException):
+		client.get_contacts_by_uiid('u1')
+	assert len(api.calls('/platform/contacts')) == 1
+
+
+# end-of-file
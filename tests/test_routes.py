@@ -0,0 +1,66 @@
+""" Tests of the resource routes and of the default headers of the client. """
+
+import threading
+
+import pytest
+
+from resources.resource import RDSRoute
+from resources.resource import RDStationResource
+
+
+def test_route_quotes_each_value():
+	route = RDSRoute('platform/contacts/{identifier}/funnels/{funnel}')
+	assert route.fields == ('identifier', 'funnel')
+	path = route.build({'identifier': 'email:a b@example.com', 'funnel': 'x/y?z'})
+	assert path == 'platform/contacts/email:a%20b@example.com/funnels/x%2Fy%3Fz'
+	assert route.template == 'platform/contacts/{identifier}/funnels/{funnel}'
+
+
+def test_route_without_fields_is_the_template():
+	assert RDSRoute('platform/contacts/fields').build() == 'platform/contacts/fields'
+
+
+def test_route_reports_the_missing_fields():
+	with pytest.raises(ValueError, match='uuid'):
+		RDSRoute('platform/contacts/{uuid}').build({})
+
+
+def test_route_is_compiled_once_per_class():
+
+	class Resource(RDStationResource):
+		path = 'platform/things/{uuid}'
+
+	assert isinstance(Resource.route, RDSRoute) and Resource.route.fields == ('uuid',)
+
+
+def test_contact_paths_do_not_grow_across_calls(client, api):
+	client.get_contacts_by_uiid('u1')
+	client.get_contacts_by_uiid('u2')
+	client.get_contacts_by_email('a@example.com')
+	assert [request.path for request in api.calls('/platform')] == [
+		'/platform/contacts/u1', '/platform/contacts/u2', '/platform/contacts/email:a@example.com']
+
+
+def test_concurrent_calls_keep_their_own_path(client, api):
+	threads = [threading.Thread(target=client.get_contacts_by_uiid, args=(f'u{index}',)) for index in range(16)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(5)
+	assert sorted(request.path for request in api.calls('/platform')) == sorted(
+		f'/platform/contacts/u{index}' for index in range(16))
+
+
+def test_set_header_replaces_the_snapshot(client, api):
+	before = client.get_headers
+	client.set_header('X-Trace', 'one')
+	assert 'X-Trace' not in before and client.get_headers['X-Trace'] == 'one'
+	with pytest.raises(TypeError):
+		client.get_headers['X-Trace'] = 'two' # pylint: disable=unsupported-assignment-operation
+	client.get_fields()
+	assert api.calls('/platform')[-1].headers['X-Trace'] == 'one'
+	client.set_header('X-Trace', None)
+	assert 'X-Trace' not in client.get_headers
+
+
+# end-of-file
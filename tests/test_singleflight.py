@@ -0,0 +1,151 @@
+""" Tests of the single-flight of identical requests. """
+
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import RDSSingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+	flight = RDSSingleFlight()
+	release = threading.Event()
+	calls = []
+
+	def function():
+		calls.append(1)
+		release.wait(5)
+		return 'result'
+
+	results = []
+	threads = [threading.Thread(target=lambda: results.append(flight.do('key', function))) for _ in range(4)]
+	for thread in threads:
+		thread.start()
+	while flight.shared < 3:
+		threading.Event().wait(0.01)
+	release.set()
+	for thread in threads:
+		thread.join(5)
+	assert results == ['result'] * 4 and len(calls) == 1
+	assert flight.stats() == {'calls': 1, 'shared': 3, 'in_flight': 0}
+
+
+def test_waiters_receive_the_error_of_the_leader():
+	flight = RDSSingleFlight()
+	started, release = threading.Event(), threading.Event()
+	errors = []
+
+	def function():
+		started.set()
+		release.wait(5)
+		raise ValueError('failed')
+
+	def call():
+		try:
+			flight.do('key', function)
+		except ValueError as error:
+			errors.append(error)
+
+	leader = threading.Thread(target=call)
+	leader.start()
+	started.wait(5)
+	waiter = threading.Thread(target=call)
+	waiter.start()
+	while not flight.shared:
+		threading.Event().wait(0.01)
+	release.set()
+	leader.join(5)
+	waiter.join(5)
+	assert len(errors) == 2 and errors[0] is errors[1]
+
+
+def test_waiters_call_again_when_the_thread_leader_is_interrupted():
+	flight = RDSSingleFlight()
+	started, release = threading.Event(), threading.Event()
+	results = []
+
+	def interrupted():
+		started.set()
+		release.wait(5)
+		raise SystemExit
+
+	def leader():
+		with pytest.raises(SystemExit):
+			flight.do('key', interrupted)
+
+	thread = threading.Thread(target=leader)
+	thread.start()
+	started.wait(5)
+	waiter = threading.Thread(target=lambda: results.append(flight.do('key', lambda: 'again')))
+	waiter.start()
+	while not flight.shared:
+		threading.Event().wait(0.01)
+	release.set()
+	thread.join(5)
+	waiter.join(5)
+	assert results == ['again']
+
+
+def test_async_waiters_share_the_result():
+	async def run():
+		flight = RDSSingleFlight()
+		calls = []
+
+		async def function():
+			calls.append(1)
+			await asyncio.sleep(0.01)
+			return 'result'
+
+		results = await asyncio.gather(*(flight.do_async('key', function) for _ in range(5)))
+		return results, calls, flight.stats()
+
+	results, calls, stats = asyncio.run(run())
+	assert results == ['result'] * 5 and len(calls) == 1
+	assert stats['in_flight'] == 0
+
+
+def test_async_waiters_call_again_when_the_leader_is_cancelled():
+	async def run():
+		flight = RDSSingleFlight()
+		answers = iter(['never', 'again'])
+
+		async def function():
+			answer = next(answers)
+			await asyncio.sleep(0.05 if answer == 'never' else 0)
+			return answer
+
+		leader = asyncio.ensure_future(flight.do_async('key', function))
+		await asyncio.sleep(0)
+		waiter = asyncio.ensure_future(flight.do_async('key', function))
+		await asyncio.sleep(0)
+		leader.cancel()
+		result = await asyncio.wait_for(waiter, 1)
+		with pytest.raises(asyncio.CancelledError):
+			await leader
+		return result, flight.stats()
+
+	result, stats = asyncio.run(run())
+	assert result == 'again'
+	assert stats['in_flight'] == 0
+
+
+def test_cancelled_async_waiter_leaves_the_leader_running():
+	async def run():
+		flight = RDSSingleFlight()
+
+		async def function():
+			await asyncio.sleep(0.02)
+			return 'result'
+
+		leader = asyncio.ensure_future(flight.do_async('key', function))
+		await asyncio.sleep(0)
+		waiter = asyncio.ensure_future(flight.do_async('key', function))
+		await asyncio.sleep(0)
+		waiter.cancel()
+		return await leader
+
+	assert asyncio.run(run()) == 'result'
+
+
+# end-of-file
@@ -0,0 +1,107 @@
+""" Tests of the on-disk token cache shared by the processes. """
+
+import asyncio
+import os
+import time
+import threading
+
+from async_client import AsyncRDStationRestClient
+from rest_client import RDStationRestClient
+from tokencache import RDSTokenCache
+
+
+def test_tokens_are_stored_private_and_read_back(tmp_path):
+	cache = RDSTokenCache(str(tmp_path / 'tokens'))
+	tokens = {'access_token': 'token', 'refresh_token': 'refresh', 'expires_at': time.time() + 60}
+	cache.store('client-id', tokens)
+	assert cache.load('client-id') == tokens
+	assert cache.load('other') is None
+	assert [oct(os.stat(os.path.join(cache.directory, name)).st_mode & 0o777)
+	        for name in os.listdir(cache.directory)] == ['0o600']
+	cache.clear('client-id')
+	assert cache.load('client-id') is None
+
+
+def test_corrupted_file_reads_as_absent(tmp_path):
+	cache = RDSTokenCache(str(tmp_path))
+	cache.store('client-id', {'access_token': 'token'})
+	with open(cache._path('client-id', '.json'), 'w', encoding='utf-8') as target: # pylint: disable=protected-access
+		target.write('{"access')
+	assert cache.load('client-id') is None
+
+
+def test_lock_is_exclusive(tmp_path):
+	cache = RDSTokenCache(str(tmp_path))
+	held, order = threading.Event(), []
+
+	def holder():
+		with cache.lock('client-id'):
+			held.set()
+			time.sleep(0.05)
+			order.append('holder')
+
+	thread = threading.Thread(target=holder)
+	thread.start()
+	held.wait(5)
+	with cache.lock('client-id'):
+		order.append('waiter')
+	thread.join(5)
+	assert order == ['holder', 'waiter']
+
+
+def test_clients_adopt_a_valid_cached_token(api, credentials, tmp_path):
+	cache = RDSTokenCache(str(tmp_path))
+	first = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, token_cache=cache)
+	assert first.get_token_manager.token() == 'token'
+	second = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, token_cache=cache)
+	assert second.get_access_token == 'token'
+	assert second.get_token_manager.token() == 'token'
+	assert len(api.calls('/auth/token')) == 1
+
+
+def test_expired_cached_token_is_renewed(api, credentials, tmp_path):
+	cache = RDSTokenCache(str(tmp_path))
+	cache.store('client-id', {'access_token': 'old', 'refresh_token': 'refresh', 'expires_at': time.time() - 1})
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, token_cache=cache)
+	assert client.get_token_manager.token() == 'token'
+	assert cache.load('client-id')['access_token'] == 'token'
+
+
+def test_cancelled_async_renewal_releases_the_lock(api, credentials, tmp_path):
+	cache = RDSTokenCache(str(tmp_path))
+	client = AsyncRDStationRestClient(credentials, endpoint=api.url, rate_limiter=None, token_cache=cache)
+	held, release = threading.Event(), threading.Event()
+
+	def holder():
+		with cache.lock('client-id'):
+			held.set()
+			release.wait(5)
+
+	async def cancel_while_waiting():
+		renewal = asyncio.create_task(client.get_token_manager.token_async())
+		await asyncio.sleep(0.05)
+		renewal.cancel()
+		try:
+			await renewal
+		except asyncio.CancelledError:
+			pass
+		release.set()
+		# the abandoned acquisition is released on the loop, once the executor got the lock
+		await asyncio.sleep(0.1)
+
+	thread = threading.Thread(target=holder)
+	thread.start()
+	held.wait(5)
+	asyncio.run(cancel_while_waiting())
+	thread.join(5)
+	acquired = threading.Event()
+
+	def waiter():
+		with cache.lock('client-id'):
+			acquired.set()
+
+	threading.Thread(target=waiter, daemon=True).start()
+	assert acquired.wait(2)
+
+
+# end-of-file
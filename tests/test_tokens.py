@@ -0,0 +1,245 @@
+""" Tests of the access token manager. """
+
+import time
+import asyncio
+import threading
+
+import pytest
+
+from exceptions import RDStationException
+from rest_client import RDStationClient
+from rest_client import RDStationRestClient
+from tokens import RDSTokenManager
+from tokens import RDSTokenScheduler
+
+
+class SlowRenewals():
+	""" renewals of a manager blocked until released, counted """
+
+	def __init__(self, manager):
+		self.manager = manager
+		self.started = threading.Event()
+		self.release = threading.Event()
+		self.count = 0
+		manager._refresh = self.renew # pylint: disable=protected-access
+		manager._refresh_async = self.renew_async # pylint: disable=protected-access
+
+	def renew(self):
+		self.count += 1
+		self.started.set()
+		self.release.wait(5)
+		return self.manager.update({'access_token': f'token-{self.count}', 'expires_in': 3600})
+
+	async def renew_async(self):
+		self.count += 1
+		self.started.set()
+		await asyncio.get_running_loop().run_in_executor(None, self.release.wait, 5)
+		return self.manager.update({'access_token': f'token-{self.count}', 'expires_in': 3600})
+
+
+def test_expired_token_is_renewed_once_by_concurrent_threads(client):
+	manager = client.get_token_manager
+	renewals = SlowRenewals(manager)
+	tokens = []
+	threads = [threading.Thread(target=lambda: tokens.append(manager.token())) for _ in range(5)]
+	for thread in threads:
+		thread.start()
+	renewals.started.wait(5)
+	renewals.release.set()
+	for thread in threads:
+		thread.join(5)
+	assert tokens == ['token-1'] * 5 and renewals.count == 1
+
+
+def test_task_joins_the_renewal_of_a_thread(client):
+	manager = client.get_token_manager
+	renewals = SlowRenewals(manager)
+	tokens = []
+	thread = threading.Thread(target=lambda: tokens.append(manager.refresh()))
+	thread.start()
+	renewals.started.wait(5)
+
+	async def join():
+		task = asyncio.ensure_future(manager.refresh_async())
+		await asyncio.sleep(0.01)
+		renewals.release.set()
+		return await task
+
+	tokens.append(asyncio.run(join()))
+	thread.join(5)
+	assert tokens == ['token-1', 'token-1'] and renewals.count == 1
+
+
+def test_thread_joins_the_renewal_of_a_task(client):
+	manager = client.get_token_manager
+	renewals = SlowRenewals(manager)
+	tokens = []
+
+	async def lead():
+		task = asyncio.ensure_future(manager.refresh_async())
+		await asyncio.get_running_loop().run_in_executor(None, renewals.started.wait, 5)
+		thread = threading.Thread(target=lambda: tokens.append(manager.refresh()))
+		thread.start()
+		await asyncio.sleep(0.01)
+		renewals.release.set()
+		token = await task
+		await asyncio.get_running_loop().run_in_executor(None, thread.join, 5)
+		return token
+
+	assert asyncio.run(lead()) == 'token-1'
+	assert tokens == ['token-1'] and renewals.count == 1
+
+
+def test_cancelled_task_leader_lets_the_waiters_renew(client):
+	manager = client.get_token_manager
+	renewals = SlowRenewals(manager)
+	renewals.release.set()
+
+	async def cancel():
+		renewals.release.clear()
+		leader = asyncio.ensure_future(manager.refresh_async())
+		await asyncio.get_running_loop().run_in_executor(None, renewals.started.wait, 5)
+		waiter = asyncio.ensure_future(manager.refresh_async())
+		await asyncio.sleep(0.01)
+		leader.cancel()
+		renewals.release.set()
+		return await asyncio.wait_for(waiter, 5)
+
+	assert asyncio.run(cancel()) == 'token-2'
+
+
+def test_rejected_token_is_renewed_once_and_the_request_sent_again(client, api):
+	answers = iter([(401, {}, {'errors': {'error_type': 'UNAUTHORIZED', 'error_message': 'expired'}}),
+	                (200, {}, {'uuid': 'u1'})])
+	api.route('/platform/contacts', lambda request: next(answers))
+	assert client.get_contacts_by_uiid('u1')['uuid'] == 'u1'
+	assert len(api.calls('/auth/token')) == 2
+	assert api.calls('/auth/token')[-1].json['refresh_token'] == 'refresh'
+
+
+def test_revoked_refresh_token_falls_back_to_the_code_grant(api):
+	def grant(request):
+		if request.json.get('refresh_token'):
+			return 401, {}, {'errors': {'error_type': 'INVALID_REFRESH_TOKEN', 'error_message': 'revoked'}}
+		return 200, {}, {'access_token': 'fresh', 'refresh_token': 'new', 'expires_in': 3600}
+
+	api.route('/auth/token', grant)
+	credentials = RDStationClient('client-id', 'client-secret', code='code', refresh_token='revoked')
+	client = RDStationRestClient(credentials, endpoint=api.url, rate_limiter=None)
+	assert client.get_token_manager.token() == 'fresh'
+	assert client.get_refresh_token == 'new'
+
+
+def test_missing_credentials_send_no_token(api):
+	client = RDStationRestClient(RDStationClient('client-id', 'client-secret'), endpoint=api.url, rate_limiter=None)
+	assert client.get_token_manager.token() is None
+	with pytest.raises(RDStationException):
+		client.get_token_manager.update({'expires_in': 10})
+
+
+def test_refresher_sleeps_until_a_token_of_known_expiry(client):
+	manager = RDSTokenManager(client, refresh_margin=0, expiry_skew=0, retry_backoff=0.001)
+	manager.access_token = 'given'
+	renewed = threading.Event()
+	calls = []
+
+	def refresh(stale=None):
+		calls.append(stale)
+		renewed.set()
+		manager.expires_at = None
+		return 'renewed'
+
+	manager.refresh = refresh
+	manager.start()
+	assert not renewed.wait(0.1) and calls == []
+	manager.update({'access_token': 'short', 'expires_in': 0.05})
+	assert renewed.wait(5)
+	manager.stop(timeout=5)
+	assert len(calls) == 1
+
+
+def test_async_refresher_sleeps_until_a_token_of_known_expiry(client):
+	manager = RDSTokenManager(client, refresh_margin=0, expiry_skew=0, retry_backoff=0.001)
+	manager.access_token = 'given'
+	calls = []
+
+	async def refresh_async(stale=None):
+		calls.append(stale)
+		manager.expires_at = None
+		return 'renewed'
+
+	manager.refresh_async = refresh_async
+
+	async def run():
+		manager.start_async()
+		await asyncio.sleep(0.1)
+		assert calls == []
+		manager.update({'access_token': 'short', 'expires_in': 0.05})
+		for _ in range(100):
+			if calls:
+				break
+			await asyncio.sleep(0.01)
+		manager.stop()
+
+	asyncio.run(run())
+	assert len(calls) == 1
+
+
+
+def test_scheduler_renews_many_managers_from_one_thread(client):
+	scheduler = RDSTokenScheduler()
+	managers, renewed = [], threading.Event()
+	for _ in range(3):
+		manager = RDSTokenManager(client, refresh_margin=0, expiry_skew=0, scheduler=scheduler)
+		manager.access_token = 'given'
+
+		def refresh(stale=None, manager=manager):
+			manager.expires_at = None
+			if all(item.expires_at is None for item in managers):
+				renewed.set()
+			return 'renewed'
+
+		manager.refresh = refresh
+		managers.append(manager)
+	for manager in managers:
+		manager.start()
+	assert len(scheduler) == 0
+	for manager in managers:
+		manager.update({'access_token': 'short', 'expires_in': 0.05})
+	assert renewed.wait(5)
+	assert [thread.name for thread in threading.enumerate()].count('rds-token-scheduler') == 1
+	assert not any(thread.name == 'rds-token-refresher' for thread in threading.enumerate())
+	assert scheduler.refreshes == 3 and len(scheduler) == 0
+	scheduler.stop(timeout=5)
+
+
+def test_scheduler_drops_stopped_managers_and_retries_failures(client):
+	scheduler = RDSTokenScheduler()
+	stopped = RDSTokenManager(client, scheduler=scheduler)
+	failing = RDSTokenManager(client, retry_backoff=0.01, scheduler=scheduler)
+	attempts = []
+
+	def refresh(stale=None):
+		attempts.append(stale)
+		if len(attempts) < 3:
+			raise RDStationException('auth down')
+		failing.expires_at = None
+		return 'renewed'
+
+	failing.refresh = refresh
+	stopped.start()
+	stopped.update({'access_token': 'token', 'expires_in': 3600})
+	assert len(scheduler) == 1
+	stopped.stop()
+	assert len(scheduler) == 0
+	failing.start()
+	scheduler.schedule(failing, 0)
+	for _ in range(500):
+		if len(attempts) == 3:
+			break
+		time.sleep(0.01)
+	scheduler.stop(timeout=5)
+	assert len(attempts) == 3 and scheduler.failures == 2
+
+
+# end-of-file
@@ -0,0 +1,71 @@
+""" Tests of the local validation of the events. """
+
+import pytest
+
+from events import RDConversionEvent
+from events import RDPlacedOrderEvent
+from exceptions import RDInvalidFormat
+from response import mapped_errors
+from validation import RDSEventValidator
+
+
+@pytest.fixture
+def validator():
+	return RDSEventValidator()
+
+
+def errors_of(errors):
+	return sorted((error.field, error.error_type) for error in errors)
+
+
+def conversion_body(**payload):
+	return {'event_type': 'CONVERSION', 'event_family': 'CDP', 'payload': payload}
+
+
+def test_valid_models_and_bodies_pass(validator):
+	assert validator.validate(RDConversionEvent('CONVERSION', 'CDP', 'signup', 'a@b.c', tags=['mql'])) == []
+	assert validator.validate(conversion_body(conversion_identifier='signup', email='a@b.c')) == []
+
+
+def test_model_fields_are_checked(validator):
+	event = RDConversionEvent('CONVERSION', 'SALES', ' ', 'not an email', tags=['MQL'], available_for_mailing='yes')
+	assert errors_of(validator.validate(event)) == [
+		('available_for_mailing', 'INVALID'), ('conversion_identifier', 'CANNOT_BE_BLANK'),
+		('email', 'INVALID_FORMAT'), ('event_family', 'INCLUSION'), ('tags', 'VALUES_MUST_BE_LOWERCASE')]
+
+
+def test_bodies_get_the_required_fields_of_their_event_type(validator):
+	assert errors_of(validator.validate(conversion_body(conversion_identifier=None))) == [
+		('conversion_identifier', 'CANNOT_BE_NULL'), ('email', 'CANNOT_BE_NULL')]
+	order = {'event_type': 'ORDER_PLACED', 'event_family': 'CDP', 'payload': {
+		'email': 'a@b.c', 'cf_order_id': '1', 'cf_order_total_items': '2', 'cf_order_status': 'paid',
+		'cf_order_payment_method': 'Credit Card'}}
+	assert errors_of(validator.validate(order)) == [
+		('cf_order_payment_amount', 'CANNOT_BE_NULL'), ('cf_order_total_items', 'INVALID')]
+
+
+def test_bodies_and_models_report_the_same_errors(validator):
+	model = RDPlacedOrderEvent('ORDER_PLACED', 'CDP', 'bad', '1', 2, 'paid', None, 10.5)
+	errors = errors_of(validator.validate(model))
+	assert errors == [('cf_order_payment_method', 'CANNOT_BE_NULL'), ('email', 'INVALID_FORMAT')]
+	assert errors_of(validator.validate(model.to_event())) == errors
+
+
+def test_custom_event_types_only_check_their_attributes(validator):
+	body = {'event_type': 'CUSTOM', 'event_family': 'CDP', 'payload': {'email': 'bad'}}
+	assert errors_of(validator.validate(body)) == [('email', 'INVALID_FORMAT')]
+	assert errors_of(validator.validate({'payload': None})) == [
+		('event_family', 'CANNOT_BE_NULL'), ('event_type', 'CANNOT_BE_NULL'), ('payload', 'INVALID')]
+
+
+def test_batch_report_keeps_the_positions(validator):
+	report = validator.validate_batch([
+		conversion_body(conversion_identifier='signup', email='a@b.c'),
+		conversion_body(conversion_identifier='signup', email='bad')])
+	assert not report.ok and len(report.valid) == 1
+	invalid = report.invalid[0]
+	assert invalid.index == 1
+	assert isinstance(mapped_errors(invalid.exception)[0], RDInvalidFormat)
+
+
+# end-of-file